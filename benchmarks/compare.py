@@ -0,0 +1,44 @@
+"""
+Compara dois resultados de `benchmarks/run.py` (ex.: antes e depois de um commit).
+
+Uso:
+    python benchmarks/compare.py antes.json depois.json --threshold 1.2
+
+Mostra a razão depois/antes dos tempos de `fit` e `predict` para cada par
+(conjunto, algoritmo) presente nos dois arquivos e termina com código 1 se
+alguma razão passar de `--threshold` (regressão).
+"""
+import argparse
+import json
+import sys
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding='utf-8') as file:
+        return {(r['dataset'], r['learner']): r for r in json.load(file)['results']}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark.")
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="Razão de tempo a partir da qual há regressão.")
+    args = parser.parse_args(argv)
+
+    baseline, candidate = _load(args.baseline), _load(args.candidate)
+    regressions = 0
+    print(f"{'conjunto':<28} {'algoritmo':<10} {'fit':>8} {'predict':>8} {'nós':>14}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        ratios = [after[metric] / before[metric] if before[metric] > 0 else float('nan')
+                  for metric in ('fit_time', 'predict_time')]
+        flag = ' <- regressão' if any(ratio > args.threshold for ratio in ratios) else ''
+        regressions += bool(flag)
+        print(f"{key[0]:<28} {key[1]:<10} {ratios[0]:7.2f}x {ratios[1]:7.2f}x "
+              f"{before['n_nodes']:>6}->{after['n_nodes']:<6}{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
+
+def make_dataset(n_rows: int, n_numeric: int, n_categorical: int, cardinality: int = 8,
+                 n_classes: int = 2, noise: float = 0.1, seed: int = 0):
+    """
+    Gera um conjunto sintético de classificação, reproduzível pela semente.
+
+    As colunas contínuas são normais padrão e as categóricas são strings
+    ('c0', 'c1', ...) uniformes. A classe é obtida dos quantis de um escore
+    que combina pesos lineares das contínuas e um efeito aleatório por
+    categoria; uma fração `noise` dos rótulos é sorteada ao acaso.
+
+    Args:
+        n_rows: Número de linhas.
+        n_numeric: Número de colunas contínuas.
+        n_categorical: Número de colunas categóricas.
+        cardinality: Número de categorias de cada coluna categórica.
+        n_classes: Número de classes.
+        noise: Fração de rótulos aleatórios.
+        seed: Semente do gerador.
+
+    Returns:
+        Tupla (X, y) com X um DataFrame e y uma Series.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    score = np.zeros(n_rows)
+    for j in range(n_numeric):
+        values = rng.standard_normal(n_rows)
+        score += rng.standard_normal() * values
+        columns[f'num{j}'] = values
+
+    labels = np.array([f'c{i}' for i in range(cardinality)], dtype=object)
+    for j in range(n_categorical):
+        codes = rng.integers(0, cardinality, n_rows)
+        score += rng.standard_normal(cardinality)[codes]
+        columns[f'cat{j}'] = labels[codes]
+
+    quantiles = np.quantile(score, np.arange(1, n_classes) / n_classes)
+    y = np.searchsorted(quantiles, score)
+    noisy = rng.random(n_rows) < noise
+    y[noisy] = rng.integers(0, n_classes, noisy.sum())
+    return pd.DataFrame(columns), pd.Series(y, name='target')
+
+
+def load_titanic(discretize: bool = False):
+    """Titanic limpo (e discretizado para o ID3, se `discretize`) como (X, y)."""
+    from decision_tree_lib.preprocessing import TitanicPreprocessor
+    df = pd.read_csv(DATA_DIR / 'train.csv')
+    df = TitanicPreprocessor(discretize=discretize).fit_transform(df)
+    return df.drop(columns=['Survived']), df['Survived']
+
+
+def load_tennis():
+    """Conjunto JogarTênis como (X, y)."""
+    df = pd.read_csv(DATA_DIR / 'JogarTênis.csv')
+    return df.drop(columns=['play']), df['play']
@@ -0,0 +1,110 @@
+"""
+Benchmark do tempo de importação e de partida a frio da predição.
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/import_time.py --output importacao.json
+    python benchmarks/import_time.py --max-runtime 0.5
+
+Cada alvo roda em um interpretador novo (melhor de `--repeat`), que mede o
+próprio tempo desde antes do `import` e registra se o pandas foi carregado.
+Os alvos de partida a frio carregam um CART salvo e predizem uma linha, pelo
+`runtime` e pelo estimador de treino. Com `--max-runtime`, termina com
+código 1 se a partida a frio pelo `runtime` passar desse tempo (em segundos)
+ou carregar o pandas.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# (nome, código medido); `{model}` é o caminho de um CART salvo e `{row}` uma linha do JogarTênis
+TARGETS = [
+    ('numpy', "import numpy"),
+    ('pandas', "import pandas"),
+    ('decision_tree_lib', "import decision_tree_lib"),
+    ('runtime', "import decision_tree_lib.runtime"),
+    ('cart', "import decision_tree_lib.cart"),
+    ('serving', "import decision_tree_lib.serving"),
+    ('runtime-first-prediction',
+     "from decision_tree_lib import runtime; runtime.load({model!r}).predict({row!r})"),
+    ('estimator-first-prediction',
+     "import pandas as pd; from decision_tree_lib.cart import CART; "
+     "CART.load({model!r}, mmap=True).predict(pd.DataFrame([{row!r}]))"),
+]
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(elapsed, 'pandas' in sys.modules, len(sys.modules))
+"""
+
+
+def _save_model(path: str) -> dict:
+    """Treina e salva um CART no JogarTênis; devolve uma linha de exemplo."""
+    sys.path.insert(0, str(ROOT))
+    from benchmarks.datasets import load_tennis
+    from decision_tree_lib.cart import CART
+    X, y = load_tennis()
+    CART().fit(X, y).save(path)
+    return {column: (value.item() if hasattr(value, 'item') else value) for column, value in X.iloc[0].items()}
+
+
+def measure(code: str, repeat: int) -> dict:
+    """Melhor tempo de `code` em `repeat` interpretadores novos."""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(code=code)], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.split()
+        result = {'time': float(output[0]), 'pandas_loaded': output[1] == 'True', 'n_modules': int(output[2])}
+        if best is None or result['time'] < best['time']:
+            best = result
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="Interpretadores novos por alvo.")
+    parser.add_argument('--targets', nargs='+', choices=[name for name, _ in TARGETS],
+                        help="Alvos a medir (padrão: todos).")
+    parser.add_argument('--max-runtime', type=float, default=None,
+                        help="Tempo máximo (s) da primeira predição pelo runtime.")
+    parser.add_argument('--output', default=None, help="Arquivo JSON de saída.")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        model = str(Path(directory) / 'cart.dtl')
+        row = _save_model(model)
+        for name, code in TARGETS:
+            if args.targets and name not in args.targets:
+                continue
+            result = {'target': name, **measure(code.format(model=model, row=row), args.repeat)}
+            results.append(result)
+            flag = ''
+            if name == 'runtime-first-prediction' and args.max_runtime is not None and (
+                    result['time'] > args.max_runtime or result['pandas_loaded']):
+                flag = ' <- acima do limite' if not result['pandas_loaded'] else ' <- carregou o pandas'
+                failures += 1
+            print(f"{name:<28} {result['time'] * 1000:9.1f} ms  módulos {result['n_modules']:>5}  "
+                  f"pandas {'sim' if result['pandas_loaded'] else 'não'}{flag}", flush=True)
+
+    if args.output:
+        environment = {'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                       'python': platform.python_version(), 'platform': platform.platform()}
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({'environment': environment, 'results': results}, file, indent=2, ensure_ascii=False)
+        print(f"Resultados salvos em {args.output}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Benchmark de treino e predição do ID3, C4.5 e CART, com a
+DecisionTreeClassifier do scikit-learn como referência.
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/run.py --preset quick --output resultados.json
+    python benchmarks/run.py --rows 1000 100000 --learners cart sklearn
+    python benchmarks/compare.py antes.json depois.json
+
+Cada execução registra o tempo de parede de `fit` e `predict` (melhor de
+`--repeat`), o pico de memória alocada (tracemalloc, em uma execução à parte
+para não distorcer os tempos) e o tamanho da árvore.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.datasets import load_tennis, load_titanic, make_dataset
+from decision_tree_lib.c45 import C45
+from decision_tree_lib.cart import CART
+from decision_tree_lib.id3 import ID3
+
+# Formatos sintéticos: (nome, colunas contínuas, colunas categóricas, cardinalidade, classes)
+SHAPES = [
+    ('numeric', 8, 0, 0, 2),
+    ('categorical', 0, 8, 8, 2),
+    ('high-cardinality', 0, 4, 64, 2),
+    ('mixed-multiclass', 4, 4, 8, 5),
+]
+PRESETS = {
+    'quick': [1_000, 10_000, 100_000],
+    'full': [1_000, 10_000, 100_000, 1_000_000],
+}
+# O ID3 trata toda coluna como categórica; nas contínuas usa bins de quantis
+LEARNERS = {
+    'id3': lambda max_depth: ID3(max_depth=max_depth, max_bins=32),
+    'c45': lambda max_depth: C45(max_depth=max_depth),
+    'cart': lambda max_depth: CART(max_depth=max_depth),
+    'cart-hist': lambda max_depth: CART(max_depth=max_depth, max_bins=255),
+    'sklearn': lambda max_depth: _sklearn_tree(max_depth),
+}
+
+
+def _sklearn_tree(max_depth):
+    from sklearn.tree import DecisionTreeClassifier
+    return DecisionTreeClassifier(max_depth=max_depth, random_state=0)
+
+
+def _ordinal_encode(X: pd.DataFrame) -> pd.DataFrame:
+    """O scikit-learn só aceita números: categorias viram códigos (fora da medição)."""
+    return X.apply(lambda column: column if pd.api.types.is_numeric_dtype(column) else pd.Series(
+        pd.factorize(column)[0], index=column.index, name=column.name))
+
+
+def _tree_size(model) -> dict:
+    if hasattr(model, 'compiled_'):
+        tree = model.compiled_
+        return {'n_nodes': int(tree.n_nodes), 'n_leaves': int(np.sum(tree.feature < 0))}
+    return {'n_nodes': int(model.tree_.node_count), 'n_leaves': int(model.get_n_leaves())}
+
+
+def _measure(function, repeat: int, memory: bool):
+    """Melhor tempo de parede em `repeat` execuções e, opcionalmente, o pico de memória."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        function()
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return best, peak_mb, result
+
+
+def run_one(dataset: str, X: pd.DataFrame, y: pd.Series, learner: str, args) -> dict:
+    """Treina e prediz um algoritmo em um conjunto, devolvendo as medições."""
+    n_numeric = int(sum(pd.api.types.is_numeric_dtype(X[c]) for c in X.columns))
+    if learner == 'sklearn':
+        X = _ordinal_encode(X)
+    make = LEARNERS[learner]
+    model = make(args.max_depth)
+
+    fit_time, fit_peak, _ = _measure(lambda: make(args.max_depth).fit(X, y), args.repeat, args.memory)
+    model.fit(X, y)
+    predict_time, predict_peak, predictions = _measure(lambda: model.predict(X), args.repeat, args.memory)
+
+    return {
+        'dataset': dataset,
+        'learner': learner,
+        'n_rows': len(X),
+        'n_numeric': n_numeric,
+        'n_categorical': X.shape[1] - n_numeric,
+        'n_classes': int(y.nunique()),
+        'fit_time': fit_time,
+        'predict_time': predict_time,
+        'fit_peak_mb': fit_peak,
+        'predict_peak_mb': predict_peak,
+        **_tree_size(model),
+        'train_accuracy': float(np.mean(np.asarray(predictions) == y.to_numpy())),
+    }
+
+
+def _datasets(args):
+    """Gera (nome, X, y, algoritmos): as âncoras reais e os conjuntos sintéticos."""
+    if not args.no_anchors:
+        X, y = load_titanic()
+        X_id3, y_id3 = load_titanic(discretize=True)
+        yield 'titanic', X, y, [learner for learner in args.learners if learner != 'id3']
+        if 'id3' in args.learners:
+            yield 'titanic-discretized', X_id3, y_id3, ['id3']
+        X, y = load_tennis()
+        yield 'tennis', X, y, args.learners
+
+    for rows in args.rows:
+        for name, n_numeric, n_categorical, cardinality, n_classes in SHAPES:
+            if args.shapes and name not in args.shapes:
+                continue
+            X, y = make_dataset(rows, n_numeric, n_categorical, cardinality, n_classes, seed=args.seed)
+            yield f'{name}-{rows}', X, y, args.learners
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import sklearn
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--preset', choices=PRESETS, default='quick', help="Tamanhos de linhas pré-definidos.")
+    parser.add_argument('--rows', type=int, nargs='+', help="Tamanhos de linhas (substitui o preset).")
+    parser.add_argument('--shapes', nargs='+', choices=[shape[0] for shape in SHAPES],
+                        help="Formatos sintéticos a executar (padrão: todos).")
+    parser.add_argument('--learners', nargs='+', choices=LEARNERS, default=list(LEARNERS))
+    parser.add_argument('--max-depth', type=int, default=None, help="Profundidade máxima de todas as árvores.")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetições por medição de tempo.")
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="Não mede o pico de memória.")
+    parser.add_argument('--no-anchors', action='store_true', help="Não executa Titanic e JogarTênis.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark.json', help="Arquivo JSON de saída.")
+    args = parser.parse_args(argv)
+    args.rows = args.rows or PRESETS[args.preset]
+
+    results = []
+    for dataset, X, y, learners in _datasets(args):
+        for learner in learners:
+            result = run_one(dataset, X, y, learner, args)
+            results.append(result)
+            print(f"{dataset:<28} {learner:<10} fit {result['fit_time']:9.4f}s  "
+                  f"predict {result['predict_time']:9.4f}s  nós {result['n_nodes']}", flush=True)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump({'environment': _environment(), 'results': results}, file, indent=2, ensure_ascii=False)
+    print(f"Resultados salvos em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Implementação do zero dos algoritmos ID3, C4.5 e CART.
+
+Os estimadores e funções abaixo são importados só no primeiro acesso
+(`decision_tree_lib.CART` carrega `decision_tree_lib.cart`), então importar o
+pacote, ou apenas o `runtime` de predição, não carrega os módulos de treino.
+"""
+import importlib
+
+_EXPORTS = {
+    'ID3': '.id3',
+    'C45': '.c45',
+    'CART': '.cart',
+    'CARTRegressor': '.cart',
+    'HoeffdingTree': '.hoeffding',
+    'Bagging': '.ensemble',
+    'RandomForest': '.ensemble',
+    'cross_val_score': '.model_selection',
+    'GridSearchCV': '.model_selection',
+    'RandomizedSearchCV': '.model_selection',
+    'fit_sharded': '.distributed',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
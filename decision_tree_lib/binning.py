@@ -0,0 +1,56 @@
+import numpy as np
+
+def find_bin_edges(values: np.ndarray, max_bins: int) -> np.ndarray:
+    """
+    Calcula os limites dos bins de quantis de uma coluna contínua.
+
+    Args:
+        values: Array com os valores da coluna (NaN é ignorado).
+        max_bins: Número máximo de bins.
+
+    Returns:
+        Array crescente com os limites (valores reais). O bin `b` contém os
+        valores `edges[b-1] < x <= edges[b]`, de modo que "bin <= b" equivale
+        ao teste `x <= edges[b]` usado na árvore.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    distinct, counts = np.unique(values[~np.isnan(values)], return_counts=True)
+    return bin_edges_from_counts(distinct, counts, max_bins)
+
+
+def bin_edges_from_counts(distinct: np.ndarray, counts: np.ndarray, max_bins: int) -> np.ndarray:
+    """
+    Calcula os limites dos bins a partir dos valores distintos e de suas
+    contagens. Como depende só dessas contagens, resumos de várias partes dos
+    dados podem ser somados antes, dando exatamente os mesmos limites.
+
+    Se houver no máximo `max_bins` valores distintos, cada valor ganha o seu
+    próprio bin e os limites são os pontos médios entre valores consecutivos
+    (os mesmos candidatos da varredura exata). Caso contrário, os limites são
+    pontos médios escolhidos nos quantis da distribuição.
+    """
+    if len(distinct) <= max_bins:
+        return (distinct[:-1] + distinct[1:]) / 2
+
+    cumulative = np.cumsum(counts)
+    targets = cumulative[-1] * np.arange(1, max_bins) / max_bins
+    positions = np.unique(np.searchsorted(cumulative, targets, side='left'))
+    positions = positions[positions < len(distinct) - 1]
+    return (distinct[positions] + distinct[positions + 1]) / 2
+
+
+def bin_values(values: np.ndarray, edges: np.ndarray, missing_bin: int) -> np.ndarray:
+    """
+    Converte valores contínuos em códigos de bin uint8.
+    Valores ausentes (NaN) recebem o código `missing_bin`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes = np.searchsorted(edges, values, side='left').astype(np.uint8)
+    codes[np.isnan(values)] = missing_bin
+    return codes
+
+
+def bin_labels(edges: np.ndarray) -> np.ndarray:
+    """Rótulos legíveis dos intervalos, ex.: '(12.00, 18.00]'."""
+    bounds = np.concatenate(([-np.inf], edges, [np.inf]))
+    return np.array([f"({low:.2f}, {high:.2f}]" for low, high in zip(bounds[:-1], bounds[1:])], dtype=object)
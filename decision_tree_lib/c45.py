@@ -1,140 +1,320 @@
-import pandas as pd
+from __future__ import annotations
+from typing import TYPE_CHECKING
 import numpy as np
-from . import utils
+from . import incremental, pruning, utils
+from .core import FeaturePool, TrainingData, grow_tree, sample_features
+from .instrumentation import collect_stats
+from .tree import CompiledClassifierMixin, TreeBuilder
 
-class C45:
+if TYPE_CHECKING:
+    import pandas as pd
+
+class C45(CompiledClassifierMixin):
     """
     Melhorias sobre o ID3:
     1. Usa Razão de Ganho (Gain Ratio) como critério de divisão.
-    2. Lida nativamente com atributos contínuos.
+    2. Lida nativamente com atributos contínuos (em histogramas, com `max_bins`).
+    3. Lida nativamente com valores ausentes (NaN/None): cada divisão guarda
+       o ramo que os recebe, também na predição.
+
+    Pré-poda: `max_depth`, `min_samples_leaf`, `min_gain` e `max_leaf_nodes`;
+    pós-poda: `confidence` e `ccp_alpha` (ver `pruning`).
+    `instrument` registra estatísticas do treino em `fit_stats_` (ver `instrumentation`).
+    `incremental=True` habilita `update(X_new, y_new)` (ver `incremental`).
     """
-    def __init__(self):
-        self.tree_ = None
+    def __init__(self, max_depth=None, min_samples_leaf=1, min_gain=None, max_leaf_nodes=None, max_bins=None,
+                 n_jobs=None, max_features=None, random_state=None, confidence=None, ccp_alpha=0.0, instrument=None,
+                 incremental=False):
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.min_gain = min_gain
+        self.max_leaf_nodes = max_leaf_nodes
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.max_features = max_features
+        self.random_state = random_state
+        self.confidence = confidence
+        self.ccp_alpha = ccp_alpha
+        self.instrument = instrument
+        self.incremental = incremental
+        self.compiled_ = None
+        self.bin_edges_ = None
+        self.fit_stats_ = None
 
     def fit(self, X: pd.DataFrame, y: pd.Series):
         """
         Constrói a árvore de decisão a partir do conjunto de treinamento (X, y).
         """
-        data = X.copy()
-        data[y.name] = y
-        self.tree_ = self._build_tree(data, X.columns.tolist(), y.name)
+        data = TrainingData(X, y, max_bins=self.max_bins)
+        if self.incremental:
+            return incremental.fit(self, data)
+        return self._fit_data(data)
+
+    def _fit_data(self, data: TrainingData, histogram: np.ndarray = None):
+        """
+        Treina a partir de dados já codificados (usado também pelos ensembles).
+        `histogram` é o histograma da raiz, quando já conhecido (`update`).
+        """
+        self._data = data
+        self._rng = np.random.default_rng(self.random_state)
+        self._builder = TreeBuilder(self._data)
+        n_samples = self._data.n_samples
+        if histogram is None and self.max_bins is not None:
+            histogram = self._data.histogram(0, n_samples)
+        root = {'start': 0, 'end': n_samples, 'depth': 0, 'features': list(range(len(data.feature_names))),
+                'histogram': histogram, 'parent': None, 'side': None}
+        with FeaturePool(self.n_jobs) as self._pool, collect_stats(self, '_evaluate_feature') as self.fit_stats_:
+            grow_tree(self._expand, root, self._evaluate_node, self.max_leaf_nodes)
+            tree = self._builder.build()
+        self.compiled_ = self._prune(tree)
+        self.bin_edges_ = self._data.bin_edges
+        del self._data, self._builder, self._pool, self._rng
+        return self
 
-    def _find_best_split(self, data: pd.DataFrame, feature_names: list, target_name: str):
+    def _find_best_split(self, start: int, end: int, feature_names: list, histogram: np.ndarray = None,
+                         parent_entropy: float = None):
         """
         Encontra o melhor atributo e/ou limiar para dividir os dados.
-        Itera sobre todos os atributos e calcula a Razão de Ganho para cada um.
+        Calcula a Razão de Ganho de cada atributo (em paralelo, nos nós grandes,
+        se `n_jobs` > 1) e escolhe o primeiro de maior razão, na ordem dos atributos.
+        A entropia do nó (`parent_entropy`) é calculada uma única vez e
+        compartilhada por todos os atributos.
+
+        Returns:
+            Uma tupla (atributo, limiar, ausentes, razao_de_ganho), com atributo
+            None se nenhum tiver divisão válida; `ausentes` é o destino dos
+            valores ausentes (ver `_evaluate_feature`).
         """
+        histogram_splits = None
+        if histogram is not None:
+            # O número de ausentes de cada atributo (último bin) entra no Split Info
+            histogram_splits = (*utils.best_histogram_splits(histogram, 'entropy', self.min_samples_leaf,
+                                                              parent_entropy, missing='known'),
+                                histogram[:, -1].sum(axis=1))
+
+        # No modo histograma, os atributos contínuos não leem as linhas do nó
+        labels = self._data.labels(start, end) if histogram is None else None
+        feature_names = sample_features(feature_names, self.max_features, self._rng)
+        candidates = self._pool.map(
+            lambda feature: self._evaluate_feature(feature, start, end, labels, parent_entropy, histogram_splits),
+            feature_names, end - start)
+
         best_feature = None
         max_gain_ratio = -1
         best_threshold = None # Apenas para atributos contínuos
+        best_missing = None
+        for feature, candidate in zip(feature_names, candidates):
+            if candidate is None:
+                continue
+            gain_ratio, threshold, missing = candidate
+            if gain_ratio > max_gain_ratio:
+                max_gain_ratio = gain_ratio
+                best_feature = feature
+                best_threshold = threshold # None para atributos categóricos
+                best_missing = missing
+
+        return best_feature, best_threshold, best_missing, max_gain_ratio
+
+    def _evaluate_feature(self, feature: int, start: int, end: int, labels: np.ndarray, parent_entropy: float,
+                          histogram_splits: tuple):
+        """
+        Avalia um atributo no nó [start, end).
 
-        for feature in feature_names:
-            # VERIFICA SE O ATRIBUTO É CONTÍNUO OU CATEGÓRICO
-            if pd.api.types.is_numeric_dtype(data[feature]):
-                # Lógica para atributos contínuos
-                threshold, info_gain = utils.find_best_continuous_split(data, feature, target_name)
-                
-                if threshold is None:
-                    continue
-
-                # C4.5 ainda usa Razão de Ganho, então precisamos calcular o Split Info para a divisão binária
-                subset_le = data[data[feature] <= threshold]
-                subset_gt = data[data[feature] > threshold]
-                p_le = len(subset_le) / len(data)
-                p_gt = len(subset_gt) / len(data)
-                
-                # Evita log(0)
-                if p_le == 0 or p_gt == 0:
-                    split_info = 0
-                else:
-                    split_info = - (p_le * np.log2(p_le) + p_gt * np.log2(p_gt))
-                
-                if split_info == 0:
-                    gain_ratio = 0
-                else:
-                    gain_ratio = info_gain / split_info
-
-                if gain_ratio > max_gain_ratio:
-                    max_gain_ratio = gain_ratio
-                    best_feature = feature
-                    best_threshold = threshold
+        Valores ausentes são tratados como no C4.5: o ganho é calculado só
+        sobre os exemplos com o valor conhecido e multiplicado pela fração
+        deles, e o Split Info conta os ausentes como um ramo à parte. Como os
+        nós são intervalos de índices (um exemplo não pode ser dividido entre
+        ramos com pesos fracionários), os ausentes seguem inteiros para o
+        ramo de maior peso, que é o que receberia a maior fração deles.
+
+        Returns:
+            Uma tupla (razao_de_ganho, limiar, ausentes), ou None se o atributo
+            não tiver divisão válida. O limiar é None para atributos
+            categóricos; `ausentes` indica se os valores ausentes vão para a
+            esquerda (contínuos) ou o código do ramo que os recebe
+            (categóricos, None se o nó não tiver ausentes).
+        """
+        data = self._data
+        n_samples = end - start
+
+        # VERIFICA SE O ATRIBUTO É CONTÍNUO OU CATEGÓRICO
+        if data.is_categorical[feature]:
+            # Lógica para atributos categóricos
+            result = self._categorical_gain_ratio(feature, start, end, parent_entropy)
+            return None if result is None else (result[0], None, result[1])
+
+        # Lógica para atributos contínuos
+        if histogram_splits is not None:
+            # Modo histograma: limiar e ganho vêm dos bins do nó
+            best_bins, histogram_gains, histogram_n_left, _, histogram_n_missing = histogram_splits
+            position = data.binned_position[feature]
+            if best_bins[position] < 0:
+                return None
+            threshold = data.bin_edges[feature][best_bins[position]]
+            info_gain = histogram_gains[position]
+            n_left = histogram_n_left[position]
+            n_missing = histogram_n_missing[position]
+        else:
+            values = data.values(feature, start, end)
+            n_missing = 0
+            if data.has_missing[feature]:
+                known = ~np.isnan(values)
+                n_missing = n_samples - np.count_nonzero(known)
+            if n_missing:
+                values, known_labels = values[known], labels[known]
+                threshold, info_gain = utils.best_threshold_sweep(values, known_labels, 'entropy', data.n_classes,
+                                                                  self.min_samples_leaf)
+                info_gain *= len(values) / n_samples
             else:
-                # Lógica para atributos categóricos
-                gain_ratio = utils.calculate_gain_ratio(data, feature, target_name)
-                if gain_ratio > max_gain_ratio:
-                    max_gain_ratio = gain_ratio
-                    best_feature = feature
-                    best_threshold = None # Reseta para garantir que não usemos um limiar antigo
+                threshold, info_gain = utils.best_threshold_sweep(values, labels, 'entropy', data.n_classes,
+                                                                  self.min_samples_leaf, parent_entropy)
+            if threshold is None:
+                return None
+            n_left = np.count_nonzero(values <= threshold)
 
-        return best_feature, best_threshold
+        # C4.5 ainda usa Razão de Ganho, então precisamos calcular o Split Info
+        # da divisão binária (mais o "ramo" dos ausentes)
+        n_right = n_samples - n_missing - n_left
+        split_info = utils.entropy_from_counts(np.array([n_left, n_right, n_missing], dtype=np.float64))
+        missing_left = bool(n_missing) and n_left > n_right
+        if split_info == 0:
+            return 0, threshold, missing_left
+        return info_gain / split_info, threshold, missing_left
 
-    def _build_tree(self, data: pd.DataFrame, feature_names: list, target_name: str):
+    def _categorical_gain_ratio(self, feature: int, start: int, end: int, parent_entropy: float = None) -> tuple:
         """
-        Função recursiva que constrói a árvore de decisão.
+        Razão de Ganho da divisão multi-ramos de um atributo categórico, com
+        os ausentes tratados como em `_evaluate_feature`.
+
+        Returns:
+            Uma tupla (razao_de_ganho, codigo_dos_ausentes), ou None se algum
+            ramo ficar com menos de `min_samples_leaf` exemplos.
         """
-        # --- CASOS BASE ---
-        if len(data[target_name].unique()) == 1:
-            return data[target_name].unique()[0]
-
-        if len(feature_names) == 0 or len(data) < 2: # Adicionado len(data) < 2
-            return data[target_name].mode()[0]
-
-        # --- PASSO RECURSIVO ---
-        best_feature, best_threshold = self._find_best_split(data, feature_names, target_name)
-
-        if best_feature is None:
-            return data[target_name].mode()[0]
-        
-        # Se o split for contínuo, a chave da árvore será diferente
-        if best_threshold is not None:
-            tree_key = f"{best_feature} <= {best_threshold:.2f}"
-            tree = {tree_key: {}}
-            
-            # Divisão binária
-            left_subset = data[data[best_feature] <= best_threshold]
-            right_subset = data[data[best_feature] > best_threshold]
-            
-            tree[tree_key]['True'] = self._build_tree(left_subset, feature_names, target_name)
-            tree[tree_key]['False'] = self._build_tree(right_subset, feature_names, target_name)
+        codes, counts = self._data.category_counts(feature, start, end)
+        branch_sizes = counts.sum(axis=1)
+        if len(codes) == 0 or branch_sizes.min() < self.min_samples_leaf:
+            return None
+        n_missing = end - start - branch_sizes.sum()
+        if n_missing:
+            information_gain = branch_sizes.sum() / (end - start) * utils.partition_gain(counts, 'entropy')
+            split_info = utils.entropy_from_counts(np.append(branch_sizes, n_missing))
+            missing_code = codes[np.argmax(branch_sizes)]
         else:
-            # Lógica original do ID3 para atributos categóricos
-            tree = {best_feature: {}}
-            remaining_features = [f for f in feature_names if f != best_feature]
-            
-            for value in data[best_feature].unique():
-                subset = data[data[best_feature] == value]
-                tree[best_feature][value] = self._build_tree(subset, remaining_features, target_name)
-                
-        return tree
-    
-    
-    # capacidade de predição
-    def predict(self, X: pd.DataFrame) -> list:
-        rows = X.to_dict(orient='records')
-        return [self._predict_single(row, self.tree_) for row in rows]
-
-    def _predict_single(self, row: dict, tree: dict):
-        if not isinstance(tree, dict):
-            return tree
-
-        question = next(iter(tree))
-        
-        # Verifica se é uma pergunta de split contínuo
-        if "<=" in question:
-            feature, threshold = question.split(' <= ')
-            threshold = float(threshold)
-            
-            if row[feature] <= threshold:
-                branch = 'True'
+            information_gain = utils.partition_gain(counts, 'entropy', parent_entropy)
+            split_info = utils.entropy_from_counts(branch_sizes)
+            missing_code = None
+        if split_info == 0:
+            return 0, missing_code
+        return information_gain / split_info, missing_code
+
+    def _evaluate_node(self, entry: dict) -> float:
+        """
+        Verifica os critérios de parada do nó e busca a sua melhor divisão,
+        guardada em entry['split'] (None quando o nó deve ser uma folha).
+
+        Returns:
+            A Razão de Ganho da divisão (-inf sem divisão), que é a
+            prioridade do nó no crescimento melhor-primeiro.
+        """
+        start, end, features = entry['start'], entry['end'], entry['features']
+        counts = entry['counts'] = self._data.class_counts(start, end)
+        entry['split'] = None
+
+        # --- CASOS BASE ---
+        if np.count_nonzero(counts) == 1:
+            return -np.inf
+
+        if len(features) == 0 or end - start < 2: # Adicionado len(data) < 2
+            return -np.inf
+
+        if ((self.max_depth is not None and entry['depth'] >= self.max_depth) or
+                end - start < 2 * self.min_samples_leaf):
+            return -np.inf
+
+        best_feature, best_threshold, missing, gain_ratio = self._find_best_split(
+            start, end, features, entry['histogram'], utils.entropy_from_counts(counts))
+        if best_feature is None or (self.min_gain is not None and gain_ratio < self.min_gain):
+            return -np.inf
+        entry['split'] = (best_feature, best_threshold, missing)
+        return gain_ratio
+
+    def _expand(self, entry: dict, max_children: int = None) -> list:
+        """
+        Cria o nó da entrada na árvore: uma folha ou um teste cujo intervalo é
+        particionado entre os filhos. Chamado por `grow_tree` uma vez por nó.
+
+        Args:
+            entry: O nó pendente (intervalo, profundidade, atributos, pai).
+            max_children: Número máximo de filhos que o orçamento de folhas
+                permite (None sem limite); acima dele, o nó vira folha.
+
+        Returns:
+            As entradas dos filhos, ainda não avaliadas.
+        """
+        if 'split' not in entry:
+            self._evaluate_node(entry)
+        data, builder = self._data, self._builder
+        start, end, counts = entry['start'], entry['end'], entry['counts']
+        majority = np.argmax(counts)
+        split = entry['split']
+
+        if split is not None and split[1] is not None and (max_children is None or max_children >= 2):
+            # Se o split for contínuo, o nó é um teste binário
+            best_feature, best_threshold, missing_left = split
+            node = builder.add_threshold_split(best_feature, best_threshold, majority, counts, missing_left)
+
+            # Divisão binária: apenas reordena o intervalo do nó
+            mid = data.partition_split(best_feature, start, end, best_threshold, missing_left)
+            children = [(0, start, mid), (1, mid, end)]
+            features = entry['features']
+        elif split is not None and split[1] is None:
+            # Lógica original do ID3 para atributos categóricos.
+            # Categorias sem ramo usam a classe majoritária do nó como fallback.
+            best_feature, _, missing_code = split
+            children = data.partition_by_category(best_feature, start, end, missing_code)
+            if max_children is not None and len(children) > max_children:
+                children = None
             else:
-                branch = 'False'
-            
-            return self._predict_single(row, tree[question][branch])
-        else: # É um split categórico
-            attribute = question
-            value = row[attribute]
-            if value not in tree[attribute]:
-                return list(tree[attribute].values())[0][0] # Fallback mais complexo
-            
-            next_node = tree[attribute][value]
-            return self._predict_single(row, next_node)
\ No newline at end of file
+                node = builder.add_category_split(best_feature, [code for code, _, _ in children], majority, counts,
+                                                  missing_code)
+                features = [f for f in entry['features'] if f != best_feature]
+        else:
+            children = None
+
+        if children is None:
+            node = builder.add_leaf(majority, counts)
+        if entry['parent'] is not None:
+            builder.attach(entry['parent'], entry['side'], node)
+        if children is None:
+            return []
+
+        histograms = self._children_histograms(entry['histogram'], [(a, b) for _, a, b in children])
+        return [{'start': child_start, 'end': child_end, 'depth': entry['depth'] + 1, 'features': features,
+                 'histogram': child_histogram, 'parent': node, 'side': side}
+                for (side, child_start, child_end), child_histogram in zip(children, histograms)]
+
+    def _children_histograms(self, histogram: np.ndarray, ranges: list) -> list:
+        """Histogramas dos filhos (ou None fora do modo histograma)."""
+        if histogram is None:
+            return [None] * len(ranges)
+        return self._data.children_histograms(histogram, ranges)
+
+    def _prune(self, tree):
+        if self.confidence is not None:
+            tree = pruning.pessimistic_prune(tree, self.confidence)
+        return pruning.cost_complexity_prune(tree, self.ccp_alpha, 'entropy')
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """Prediz as classes de X em lote, pela árvore compilada."""
+        return self.compiled_.predict(X)
+
+    def cost_complexity_pruning_path(self) -> dict:
+        """
+        Caminho da poda por custo-complexidade da árvore treinada, calculado
+        a partir das contagens guardadas nos nós (sem reler os dados).
+
+        Returns:
+            Dicionário com `ccp_alphas` e `impurities` (entropia); qualquer
+            alpha do caminho pode ser usado como `ccp_alpha` em um novo treino.
+        """
+        return pruning.cost_complexity_path(self.compiled_, 'entropy')
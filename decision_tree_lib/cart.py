@@ -1,138 +1,533 @@
-import pandas as pd
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import numpy as np
 from itertools import combinations
-from . import utils
-import re
+from . import incremental, pruning, utils
+from .core import FeaturePool, TrainingData, grow_tree, sample_features
+from .instrumentation import collect_stats
+from .tree import CompiledClassifierMixin, CompiledTreeMixin, TreeBuilder
 
-class CART:
+if TYPE_CHECKING:
+    import pandas as pd
+
+class CART(CompiledClassifierMixin):
     """
     Uma implementação do zero do algoritmo CART para classificação.
     
     Características:
     1. Usa o Índice Gini como critério de pureza.
     2. Realiza divisões estritamente binárias.
+    3. Lida nativamente com valores ausentes (NaN/None): cada divisão aprende
+       o lado que os recebe (e as categorias desconhecidas).
+
+    `categorical_split` escolhe a busca nas categorias (ver `_category_split_mode`);
+    `ccp_alpha` > 0 aplica a poda por custo-complexidade (ver `pruning`).
+    `instrument` registra estatísticas do treino em `fit_stats_` (ver `instrumentation`).
+    `incremental=True` habilita `update(X_new, y_new)` (ver `incremental`).
     """
-    def __init__(self, max_depth=None, min_samples_split=2):
+    def __init__(self, max_depth=None, min_samples_split=2, categorical_split='auto', max_exact_categories=10,
+                 max_bins=None, n_jobs=None, max_features=None, random_state=None, ccp_alpha=0.0, instrument=None,
+                 incremental=False):
+        if categorical_split not in ('auto', 'exact', 'breiman', 'greedy'):
+            raise ValueError(f"categorical_split inválido: {categorical_split!r}")
         self.max_depth = max_depth
         self.min_samples_split = min_samples_split
-        self.tree_ = None
+        self.categorical_split = categorical_split
+        self.max_exact_categories = max_exact_categories
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.max_features = max_features
+        self.random_state = random_state
+        self.ccp_alpha = ccp_alpha
+        self.instrument = instrument
+        self.incremental = incremental
+        self.compiled_ = None
+        self.bin_edges_ = None
+        self.fit_stats_ = None
 
     def fit(self, X: pd.DataFrame, y: pd.Series):
         """Constrói a árvore de decisão a partir do conjunto de treinamento."""
-        data = X.copy()
-        data[y.name] = y
-        self.tree_ = self._build_tree(data, y.name, depth=0)
+        data = TrainingData(X, y, max_bins=self.max_bins)
+        if self.incremental:
+            return incremental.fit(self, data)
+        return self._fit_data(data)
+
+    def _fit_data(self, data: TrainingData, histogram: np.ndarray = None):
+        """
+        Treina a partir de dados já codificados (usado também pelos ensembles).
+        `histogram` é o histograma da raiz, quando já conhecido (`update`).
+        """
+        self._data = data
+        self._rng = np.random.default_rng(self.random_state)
+        self._builder = TreeBuilder(self._data)
+        n_samples = self._data.n_samples
+        if histogram is None and self.max_bins is not None:
+            histogram = self._data.histogram(0, n_samples)
+        root = {'start': 0, 'end': n_samples, 'depth': 0, 'histogram': histogram, 'parent': None, 'side': None}
+        with FeaturePool(self.n_jobs) as self._pool, collect_stats(self, '_evaluate_feature') as self.fit_stats_:
+            grow_tree(self._expand, root)
+            tree = self._builder.build()
+        self.bin_edges_ = self._data.bin_edges
+        self.compiled_ = pruning.cost_complexity_prune(tree, self.ccp_alpha, 'gini')
+        del self._data, self._builder, self._pool, self._rng
+        return self
         
       # --- MÉTODO PÚBLICO DE PREDIÇÃO (ESTAVA FALTANDO) ---
-    def predict(self, X: pd.DataFrame) -> list:
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
         """
-        Faz previsões para um conjunto de dados X.
+        Faz previsões para um conjunto de dados X, em lote, pela árvore compilada.
         """
-        rows = X.to_dict(orient='records')
-        return [self._predict_single(row, self.tree_) for row in rows]    
+        return self.compiled_.predict(X)
 
-    def _calculate_gini_gain(self, data, split_subsets, target_name):
-        """Calcula o Ganho Gini para uma dada divisão binária."""
-        parent_gini = utils.calculate_gini_index(data[target_name])
-        
-        left_subset, right_subset = split_subsets
-        
-        if len(left_subset) == 0 or len(right_subset) == 0:
-            return 0
-            
-        gini_left = utils.calculate_gini_index(left_subset[target_name])
-        gini_right = utils.calculate_gini_index(right_subset[target_name])
-        
-        weight_left = len(left_subset) / len(data)
-        weight_right = len(right_subset) / len(data)
-        
-        weighted_gini_children = (weight_left * gini_left) + (weight_right * gini_right)
-        
-        return parent_gini - weighted_gini_children
-
-    def _find_best_split(self, data: pd.DataFrame, feature_names: list, target_name: str):
-        """Encontra a melhor divisão binária possível para os dados."""
-        best_feature, max_gini_gain, best_split_value = None, -1, None
-
-        for feature in feature_names:
-            unique_values = data[feature].unique()
-            
-            if pd.api.types.is_numeric_dtype(data[feature]):
-                # Lógica para atributos contínuos
-                threshold, gini_gain = utils.find_best_continuous_split_gini(data, feature, target_name)
-                if gini_gain > max_gini_gain:
-                    max_gini_gain, best_feature, best_split_value = gini_gain, feature, threshold
-            else:
-                # Lógica para atributos categóricos: testar todas as partições binárias
-                if len(unique_values) < 2: continue
-                
-                # Gera todas as combinações de subconjuntos
-                for i in range(1, len(unique_values) // 2 + 1):
-                    for subset in combinations(unique_values, i):
-                        left_values = set(subset)
-                        
-                        left_subset = data[data[feature].isin(left_values)]
-                        right_subset = data[~data[feature].isin(left_values)]
-                        
-                        gini_gain = self._calculate_gini_gain(data, (left_subset, right_subset), target_name)
-                        
-                        if gini_gain > max_gini_gain:
-                            max_gini_gain, best_feature, best_split_value = gini_gain, feature, left_values
-                            
-        return best_feature, best_split_value
-
-    def _build_tree(self, data: pd.DataFrame, target_name: str, depth: int):
-        """Função recursiva que constrói a árvore."""
-        feature_names = [col for col in data.columns if col != target_name]
-        
-        # --- CASOS BASE ---
-        if (len(data[target_name].unique()) == 1 or 
-            len(data) < self.min_samples_split or
-            (self.max_depth is not None and depth >= self.max_depth)):
-            return data[target_name].mode()[0]
+    def cost_complexity_pruning_path(self) -> dict:
+        """
+        Caminho da poda por custo-complexidade da árvore treinada, calculado
+        a partir das contagens guardadas nos nós (sem reler os dados).
 
-        best_feature, best_split_value = self._find_best_split(data, feature_names, target_name)
+        Returns:
+            Dicionário com `ccp_alphas` e `impurities` (Gini); qualquer
+            alpha do caminho pode ser usado como `ccp_alpha` em um novo treino.
+        """
+        return pruning.cost_complexity_path(self.compiled_, 'gini')
+
+    def _find_best_split(self, start: int, end: int, histogram: np.ndarray = None, parent_gini: float = None):
+        """
+        Encontra a melhor divisão binária possível para os dados. Os atributos
+        são avaliados em paralelo nos nós grandes se `n_jobs` > 1; o vencedor é
+        o primeiro de maior ganho, na ordem dos atributos. O Gini do nó
+        (`parent_gini`) é calculado uma única vez e compartilhado por todos.
+
+        Returns:
+            Uma tupla (atributo, valor_da_divisao, ausentes_a_esquerda,
+            ganho_gini), com atributo None se nenhum tiver divisão válida.
+        """
+        histogram_splits = None
+        if histogram is not None:
+            histogram_splits = utils.best_histogram_splits(histogram, 'gini', parent_impurity=parent_gini,
+                                                           missing='learn')
+
+        # No modo histograma, os atributos contínuos não leem as linhas do nó
+        labels = self._data.labels(start, end) if histogram is None else None
+        features = sample_features(list(range(len(self._data.feature_names))), self.max_features, self._rng)
+        candidates = self._pool.map(
+            lambda feature: self._evaluate_feature(feature, start, end, labels, parent_gini, histogram_splits),
+            features, end - start)
+
+        best_feature, max_gini_gain, best_split_value, best_missing_left = None, -1, None, False
+        for feature, (gini_gain, split_value, missing_left) in zip(features, candidates):
+            if gini_gain > max_gini_gain:
+                max_gini_gain, best_feature, best_split_value = gini_gain, feature, split_value
+                best_missing_left = missing_left
+
+        return best_feature, best_split_value, best_missing_left, max_gini_gain
+
+    def _evaluate_feature(self, feature: int, start: int, end: int, labels: np.ndarray, parent_gini: float,
+                          histogram_splits: tuple):
+        """
+        Avalia um atributo no nó [start, end).
+
+        Os valores ausentes têm direção aprendida: nos atributos contínuos,
+        cada limiar é avaliado com os ausentes de cada lado; nos categóricos,
+        os ausentes entram na busca da partição como mais uma categoria.
+
+        Returns:
+            Uma tupla (ganho_gini, valor_da_divisao, ausentes_a_esquerda): o
+            valor é o limiar, para atributos contínuos, ou o conjunto de
+            códigos do lado esquerdo, para os categóricos. Sem divisão válida,
+            o ganho é -1.
+        """
+        data = self._data
+        if not data.is_categorical[feature] and histogram_splits is not None:
+            # Modo histograma: limiar e ganho vêm dos bins do nó
+            best_bins, histogram_gains, _, histogram_missing_left = histogram_splits
+            position = data.binned_position[feature]
+            if best_bins[position] < 0:
+                return -1, None, False
+            return (histogram_gains[position], data.bin_edges[feature][best_bins[position]],
+                    bool(histogram_missing_left[position]))
+
+        if not data.is_categorical[feature]:
+            # Lógica para atributos contínuos
+            values = data.values(feature, start, end)
+            if data.has_missing[feature] and np.isnan(values).any():
+                threshold, gini_gain, missing_left = utils.best_threshold_missing(
+                    values, labels, 'gini', data.n_classes, parent_impurity=parent_gini)
+                return gini_gain, threshold, missing_left
+            threshold, gini_gain = utils.best_threshold_sweep(values, labels, 'gini', data.n_classes,
+                                                              parent_impurity=parent_gini)
+            return gini_gain, threshold, False
+
+        # Lógica para atributos categóricos: melhor partição binária das categorias
+        codes, counts = data.category_counts(feature, start, end)
+        missing_counts = data.missing_counts(feature, start, end) if data.has_missing[feature] else None
+        if missing_counts is not None and missing_counts.any():
+            # Os ausentes viram uma categoria a mais (a última linha), que a busca põe de um dos lados
+            counts = np.vstack([counts, missing_counts])
+        if len(counts) < 2:
+            return -1, None, False
+        gini_gain, left_positions = self._best_category_subset(counts, parent_gini)
+        missing_left = len(counts) > len(codes) and len(codes) in left_positions
+        left_positions = [position for position in left_positions if position < len(codes)]
+        return gini_gain, set(codes[left_positions]), missing_left
+
+    def _category_split_mode(self, n_categories: int) -> str:
+        """
+        Escolhe a estratégia de divisão categórica para um nó:
+        - 'exact': testa todos os subconjuntos (exponencial no número de
+          categorias), apenas até `max_exact_categories` categorias no nó;
+        - 'breiman': ordena as categorias pela proporção da classe positiva e
+          testa só as k-1 divisões ordenadas (ótimo para alvos binários);
+        - 'greedy': heurística para alvos multiclasse que move, uma a uma, a
+          categoria que mais aumenta o ganho para o lado esquerdo (O(k²) divisões);
+        - 'auto' (padrão): 'breiman' para alvos binários; para multiclasse,
+          'exact' até o limite de categorias e 'greedy' acima dele.
+        No modo 'exact', nós com mais categorias que o limite usam 'auto'.
+        """
+        mode = self.categorical_split
+        if mode == 'exact' and n_categories <= self.max_exact_categories:
+            return 'exact'
+        if mode in ('auto', 'exact'):
+            if self._data.n_classes == 2:
+                return 'breiman'
+            return 'exact' if n_categories <= self.max_exact_categories else 'greedy'
+        return mode
+
+    def _best_category_subset(self, counts: np.ndarray, parent_gini: float = None) -> tuple:
+        """
+        Encontra a melhor partição binária das categorias presentes no nó.
+
+        Args:
+            counts: Matriz (categorias, classes) de contagens do nó.
+            parent_gini: Gini do nó, se já calculado.
+
+        Returns:
+            Uma tupla (ganho_gini, posicoes), em que `posicoes` indica as
+            linhas de `counts` que vão para o lado esquerdo.
+        """
+        mode = self._category_split_mode(len(counts))
+        if mode == 'breiman':
+            return self._breiman_subset(counts, parent_gini)
+        if mode == 'greedy':
+            return self._greedy_subset(counts, parent_gini)
+
+        # Enumeração exata: todas as combinações de até metade das categorias,
+        # avaliadas de uma só vez a partir da matriz (subconjuntos, classes)
+        n_categories = len(counts)
+        subsets = [subset for i in range(1, n_categories // 2 + 1)
+                   for subset in combinations(range(n_categories), i)]
+        membership = np.zeros((len(subsets), n_categories))
+        for row, subset in enumerate(subsets):
+            membership[row, list(subset)] = 1
+        gains = utils.split_gains(counts.sum(axis=0), membership @ counts, 'gini', parent_gini)
+        # Primeiro máximo na ordem de enumeração, com tolerância a ruído de ponto flutuante
+        best = np.flatnonzero(gains >= gains.max() - 1e-12)[0]
+        return gains[best], list(subsets[best])
+
+    def _prefix_gains(self, ordered_counts: np.ndarray, parent_gini: float = None) -> np.ndarray:
+        """Ganho Gini de cada divisão "primeiras i categorias à esquerda" (i = 1..k-1)."""
+        left_counts = np.cumsum(ordered_counts, axis=0)[:-1]
+        return utils.split_gains(ordered_counts.sum(axis=0), left_counts, 'gini', parent_gini)
+
+    def _breiman_subset(self, counts: np.ndarray, parent_gini: float = None) -> tuple:
+        """
+        Atalho de Breiman para alvos binários: ordenando as categorias pela
+        proporção da classe positiva, a melhor partição Gini é um prefixo dessa
+        ordem, então bastam k-1 avaliações em vez de 2^(k-1).
+        """
+        positive_rate = counts[:, -1] / counts.sum(axis=1)
+        order = np.argsort(positive_rate, kind='stable')
+        gains = self._prefix_gains(counts[order], parent_gini)
+        best = np.flatnonzero(gains >= gains.max() - 1e-12)[0]
+        return gains[best], list(order[:best + 1])
+
+    def _greedy_subset(self, counts: np.ndarray, parent_gini: float = None) -> tuple:
+        """
+        Heurística limitada para alvos multiclasse: parte do lado esquerdo
+        vazio e, a cada passo, move a categoria que gera o maior ganho,
+        guardando a melhor partição vista. Avalia no máximo O(k²) divisões.
+        """
+        parent_counts = counts.sum(axis=0)
+        in_left = np.zeros(len(counts), dtype=bool)
+        left_counts = np.zeros_like(parent_counts)
+        max_gini_gain, best_positions = -1, None
+
+        for _ in range(len(counts) - 1):
+            candidates = np.flatnonzero(~in_left)
+            candidate_left = left_counts + counts[candidates]
+            gains = utils.split_gains(parent_counts, candidate_left, 'gini', parent_gini)
+            best = np.argmax(gains)
+            in_left[candidates[best]] = True
+            left_counts = candidate_left[best]
+            if gains[best] > max_gini_gain + 1e-12:
+                max_gini_gain, best_positions = gains[best], list(np.flatnonzero(in_left))
+        return max_gini_gain, best_positions
+
+    def _evaluate_node(self, entry: dict) -> float:
+        """
+        Verifica os critérios de parada do nó e busca a sua melhor divisão,
+        guardada em entry['split'] (None quando o nó deve ser uma folha).
+
+        Returns:
+            O ganho Gini da divisão, ou -inf sem divisão.
+        """
+        start, end = entry['start'], entry['end']
+        counts = entry['counts'] = self._data.class_counts(start, end)
+        entry['split'] = None
+
+        # --- CASOS BASE ---
+        if (np.count_nonzero(counts) == 1 or
+            end - start < self.min_samples_split or
+            (self.max_depth is not None and entry['depth'] >= self.max_depth)):
+            return -np.inf
 
+        best_feature, best_split_value, missing_left, gini_gain = self._find_best_split(
+            start, end, entry['histogram'], utils.gini_from_counts(counts))
         if best_feature is None:
-            return data[target_name].mode()[0]
-        
-        # --- PASSO RECURSIVO ---
-        if pd.api.types.is_numeric_dtype(data[best_feature]):
-            tree_key = f"{best_feature} <= {best_split_value:.2f}"
-            left_subset = data[data[best_feature] <= best_split_value]
-            right_subset = data[data[best_feature] > best_split_value]
+            return -np.inf
+        entry['split'] = (best_feature, best_split_value, missing_left)
+        return gini_gain
+
+    def _expand(self, entry: dict, max_children: int = None) -> list:
+        """
+        Cria o nó da entrada na árvore (folha ou teste binário) e devolve as
+        entradas dos dois filhos. Chamado por `grow_tree` uma vez por nó.
+        """
+        if 'split' not in entry:
+            self._evaluate_node(entry)
+        data, builder = self._data, self._builder
+        start, end, counts = entry['start'], entry['end'], entry['counts']
+        majority = np.argmax(counts)
+        if entry['split'] is None or (max_children is not None and max_children < 2):
+            node = builder.add_leaf(majority, counts)
+            if entry['parent'] is not None:
+                builder.attach(entry['parent'], entry['side'], node)
+            return []
+
+        best_feature, best_split_value, missing_left = entry['split']
+        if not data.is_categorical[best_feature]:
+            node = builder.add_threshold_split(best_feature, best_split_value, majority, counts, missing_left)
         else: # Categórico
-            tree_key = f"{best_feature} in {best_split_value}"
-            left_subset = data[data[best_feature].isin(best_split_value)]
-            right_subset = data[~data[best_feature].isin(best_split_value)]
+            node = builder.add_subset_split(best_feature, best_split_value, majority, counts, missing_left)
+        if entry['parent'] is not None:
+            builder.attach(entry['parent'], entry['side'], node)
 
-        tree = {tree_key: {}}
-        tree[tree_key]['True'] = self._build_tree(left_subset, target_name, depth + 1)
-        tree[tree_key]['False'] = self._build_tree(right_subset, target_name, depth + 1)
+        mid = data.partition_split(best_feature, start, end, best_split_value, missing_left)
+        histograms = [None, None]
+        if entry['histogram'] is not None:
+            histograms = data.children_histograms(entry['histogram'], [(start, mid), (mid, end)])
+        return [{'start': child_start, 'end': child_end, 'depth': entry['depth'] + 1, 'histogram': child_histogram,
+                 'parent': node, 'side': side}
+                for side, (child_start, child_end, child_histogram) in
+                enumerate([(start, mid, histograms[0]), (mid, end, histograms[1])])]
 
-        return tree
-    
-    # capacidade de predição
-    def _predict_single(self, row: dict, tree: dict):
-        # Caso base: se não for um dicionário, é uma folha (predição).
-        if not isinstance(tree, dict):
-            return tree
-
-        # Pega a pergunta do nó atual. Ex: "Sex <= 0.50"
-        question = next(iter(tree))
-
-        # Teste para split contínuo
-        if "<=" in question:
-            feature, threshold = question.split(' <= ')
-            threshold = float(threshold)
-            branch = 'True' if row[feature] <= threshold else 'False'
-        
-        # Teste para split categórico
-        elif "in" in question:
-            match = re.match(r"(\w+)\s+in\s+({.*})", question)
-            feature = match.group(1)
-            value_set = eval(match.group(2)) 
-            branch = 'True' if row[feature] in value_set else 'False'
-        
-        
-        # Navega para o próximo nó (sub-árvore) usando o galho correto ('True' ou 'False')
-        return self._predict_single(row, tree[question][branch])
\ No newline at end of file
+
+class CARTRegressor(CompiledTreeMixin):
+    """
+    Árvore de regressão CART: divisões binárias (as mesmas da classe CART)
+    sobre um alvo numérico.
+
+    Critérios (`criterion`): 'mse' (as folhas preveem a média) e 'mae' (a
+    mediana; bem mais lento). As categorias são ordenadas pela média (ou
+    mediana) do alvo e só os k-1 prefixos dessa ordem são testados. Com
+    `max_bins` (apenas 'mse'), cada nó acumula histogramas de somas por bin.
+    A predição de cada nó fica em `classes` da árvore compilada (indexada por `value`).
+    """
+    def __init__(self, max_depth=None, min_samples_split=2, criterion='mse', max_bins=None, n_jobs=None,
+                 max_features=None, random_state=None, instrument=None):
+        if criterion not in ('mse', 'mae'):
+            raise ValueError(f"criterion inválido: {criterion!r}")
+        if criterion == 'mae' and max_bins is not None:
+            raise ValueError("max_bins só é suportado com criterion='mse'")
+        self.max_depth = max_depth
+        self.min_samples_split = min_samples_split
+        self.criterion = criterion
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.max_features = max_features
+        self.random_state = random_state
+        self.instrument = instrument
+        self.compiled_ = None
+        self.bin_edges_ = None
+        self.fit_stats_ = None
+
+    def fit(self, X: pd.DataFrame, y: pd.Series):
+        """Constrói a árvore de regressão a partir do conjunto de treinamento."""
+        return self._fit_data(TrainingData(X, y, max_bins=self.max_bins, regression=True))
+
+    def _fit_data(self, data: TrainingData):
+        """Treina a partir de dados já codificados (com `regression=True`)."""
+        self._data = data
+        self._rng = np.random.default_rng(self.random_state)
+        self._builder = TreeBuilder(self._data)
+        self._predictions = []
+        n_samples = self._data.n_samples
+        histogram = self._data.histogram(0, n_samples) if self.max_bins is not None else None
+        root = {'start': 0, 'end': n_samples, 'depth': 0, 'histogram': histogram, 'parent': None, 'side': None}
+        with FeaturePool(self.n_jobs) as self._pool, collect_stats(self, '_evaluate_feature') as self.fit_stats_:
+            grow_tree(self._expand, root)
+            self.compiled_ = self._builder.build(np.asarray(self._predictions, dtype=np.float64))
+        self.bin_edges_ = self._data.bin_edges
+        del self._data, self._builder, self._pool, self._rng, self._predictions
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """Prediz o alvo de todas as linhas de X em lote, pela árvore compilada."""
+        return self.compiled_.predict(X)
+
+    def _category_split_mode(self, n_categories: int) -> str:
+        """As categorias são sempre ordenadas pelo alvo e cortadas em prefixos (atalho de Breiman)."""
+        return 'breiman'
+
+    def _find_best_split(self, start: int, end: int, histogram: np.ndarray = None):
+        """
+        Encontra a melhor divisão binária do nó, avaliando os atributos como
+        o CART de classificação (em paralelo nos nós grandes se `n_jobs` > 1).
+
+        Returns:
+            Uma tupla (atributo, valor_da_divisao, ausentes_a_esquerda,
+            ganho), com atributo None se nenhum tiver divisão válida.
+        """
+        histogram_splits = None
+        if histogram is not None:
+            histogram_splits = utils.best_histogram_regression_splits(histogram)
+
+        targets = self._data.labels(start, end)
+        features = sample_features(list(range(len(self._data.feature_names))), self.max_features, self._rng)
+        candidates = self._pool.map(
+            lambda feature: self._evaluate_feature(feature, start, end, targets, histogram_splits),
+            features, end - start)
+
+        best_feature, max_gain, best_split_value, best_missing_left = None, -1, None, False
+        for feature, (gain, split_value, missing_left) in zip(features, candidates):
+            if gain > max_gain:
+                max_gain, best_feature, best_split_value, best_missing_left = gain, feature, split_value, missing_left
+        return best_feature, best_split_value, best_missing_left, max_gain
+
+    def _evaluate_feature(self, feature: int, start: int, end: int, targets: np.ndarray, histogram_splits: tuple):
+        """
+        Avalia um atributo no nó [start, end).
+
+        Returns:
+            Uma tupla (ganho, valor_da_divisao, ausentes_a_esquerda), como em
+            `CART._evaluate_feature`. Sem divisão válida, o ganho é -1.
+        """
+        data = self._data
+        if not data.is_categorical[feature] and histogram_splits is not None:
+            best_bins, histogram_gains, histogram_missing_left = histogram_splits
+            position = data.binned_position[feature]
+            if best_bins[position] < 0:
+                return -1, None, False
+            return (histogram_gains[position], data.bin_edges[feature][best_bins[position]],
+                    bool(histogram_missing_left[position]))
+
+        if not data.is_categorical[feature]:
+            threshold, gain, missing_left = utils.best_threshold_regression(
+                data.values(feature, start, end), targets, self.criterion)
+            return gain, threshold, missing_left
+
+        # Categórico: os ausentes entram como uma categoria a mais (a última)
+        codes, sums = data.category_sums(feature, start, end)
+        missing = data.missing_mask(feature, start, end) if data.has_missing[feature] else None
+        if missing is not None and missing.any():
+            sums = np.vstack([sums, utils.target_sums(targets[missing])])
+        if len(sums) < 2:
+            return -1, None, False
+        gain, left_positions = self._best_category_prefix(feature, start, end, codes, sums, targets)
+        missing_left = len(sums) > len(codes) and len(codes) in left_positions
+        left_positions = [position for position in left_positions if position < len(codes)]
+        return gain, set(codes[left_positions]), missing_left
+
+    def _best_category_prefix(self, feature: int, start: int, end: int, codes: np.ndarray, sums: np.ndarray,
+                              targets: np.ndarray) -> tuple:
+        """
+        Melhor partição "primeiras i categorias à esquerda" na ordem da média
+        do alvo ('mse', a partir das somas) ou da mediana ('mae', em uma
+        varredura das linhas do nó ordenadas por categoria).
+
+        Returns:
+            Uma tupla (ganho, posicoes), com as linhas de `sums` do lado esquerdo.
+        """
+        if self.criterion == 'mse':
+            order = np.argsort(sums[:, 1] / sums[:, 0], kind='stable')
+            gains = utils.variance_reductions(sums.sum(axis=0), np.cumsum(sums[order], axis=0)[:-1])
+        else:
+            # Grupo (posição em `sums`) de cada linha; os ausentes formam o último
+            values = self._data.values(feature, start, end).astype(np.intp)
+            lookup = np.full(len(self._data.categories[feature]) + 1, len(codes), dtype=np.intp)
+            lookup[codes + 1] = np.arange(len(codes))
+            groups = lookup[values + 1]
+            sizes = np.bincount(groups, minlength=len(sums))
+            by_group = targets[np.argsort(groups, kind='stable')]
+            medians = np.array([np.median(segment) for segment in np.split(by_group, np.cumsum(sizes)[:-1])])
+            order = np.argsort(medians, kind='stable')
+            rank = np.empty(len(order), dtype=np.intp)
+            rank[order] = np.arange(len(order))
+            # Linhas na ordem das medianas: cada prefixo de categorias é um prefixo das linhas, e os
+            # erros dos dois lados saem de `prefix_absolute_errors` nas duas direções, como nos limiares
+            ordered = targets[np.argsort(rank[groups], kind='stable')]
+            last = np.cumsum(sizes[order])[:-1] - 1
+            left = utils.prefix_absolute_errors(ordered)
+            right = utils.prefix_absolute_errors(ordered[::-1])
+            gains = (left[-1] - left[last] - right[len(ordered) - last - 2]) / len(targets)
+        best = np.flatnonzero(gains >= gains.max() - 1e-12)[0]
+        return gains[best], list(order[:best + 1])
+
+    def _evaluate_node(self, entry: dict) -> float:
+        """
+        Verifica os critérios de parada do nó e busca a sua melhor divisão,
+        guardada em entry['split'] (None quando o nó deve ser uma folha).
+
+        Returns:
+            A redução do erro da divisão, ou -inf sem divisão.
+        """
+        start, end = entry['start'], entry['end']
+        entry['counts'] = self._data.target_sums(start, end)
+        targets = self._data.labels(start, end)
+        entry['prediction'] = np.median(targets) if self.criterion == 'mae' else targets.mean()
+        entry['split'] = None
+
+        # --- CASOS BASE ---
+        if (end - start < self.min_samples_split or targets.min() == targets.max() or
+                (self.max_depth is not None and entry['depth'] >= self.max_depth)):
+            return -np.inf
+
+        best_feature, best_split_value, missing_left, gain = self._find_best_split(start, end, entry['histogram'])
+        if best_feature is None:
+            return -np.inf
+        entry['split'] = (best_feature, best_split_value, missing_left)
+        return gain
+
+    def _expand(self, entry: dict, max_children: int = None) -> list:
+        """
+        Cria o nó da entrada na árvore (folha ou teste binário) e devolve as
+        entradas dos dois filhos. Chamado por `grow_tree` uma vez por nó.
+        """
+        if 'split' not in entry:
+            self._evaluate_node(entry)
+        data, builder = self._data, self._builder
+        start, end, sums = entry['start'], entry['end'], entry['counts']
+        # A predição do nó é guardada em `classes` da árvore compilada e indexada por `value`
+        value = len(self._predictions)
+        self._predictions.append(entry['prediction'])
+        if entry['split'] is None or (max_children is not None and max_children < 2):
+            node = builder.add_leaf(value, sums)
+            if entry['parent'] is not None:
+                builder.attach(entry['parent'], entry['side'], node)
+            return []
+
+        best_feature, best_split_value, missing_left = entry['split']
+        if not data.is_categorical[best_feature]:
+            node = builder.add_threshold_split(best_feature, best_split_value, value, sums, missing_left)
+        else: # Categórico
+            node = builder.add_subset_split(best_feature, best_split_value, value, sums, missing_left)
+        if entry['parent'] is not None:
+            builder.attach(entry['parent'], entry['side'], node)
+
+        mid = data.partition_split(best_feature, start, end, best_split_value, missing_left)
+        histograms = [None, None]
+        if entry['histogram'] is not None:
+            histograms = data.children_histograms(entry['histogram'], [(start, mid), (mid, end)])
+        return [{'start': child_start, 'end': child_end, 'depth': entry['depth'] + 1, 'histogram': child_histogram,
+                 'parent': node, 'side': side}
+                for side, (child_start, child_end, child_histogram) in
+                enumerate([(start, mid, histograms[0]), (mid, end, histograms[1])])]
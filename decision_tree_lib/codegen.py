@@ -0,0 +1,286 @@
+import numpy as np
+from .tree import CompiledTree
+
+# Profundidade máxima de aninhamento em uma função gerada; abaixo dela, a
+# sub-árvore vira uma função auxiliar (o Python limita a indentação a 100 níveis)
+MAX_NESTING = 50
+
+_HEADER = '''"""
+Função de predição gerada por decision_tree_lib a partir de uma árvore treinada.
+Módulo autônomo: não depende de decision_tree_lib.
+
+    {functions}
+"""
+'''
+
+
+def _literal(value) -> str:
+    """Representação em código Python de um valor (rótulo, categoria ou limiar)."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return f"float('{value}')"
+    return repr(value)
+
+
+class _SourceWriter:
+    """Gera o código de uma árvore compilada, sem recursão (árvores profundas são suportadas)."""
+    def __init__(self, tree: CompiledTree):
+        self.tree = tree
+
+    def _code_bounds(self, feature: int) -> list:
+        """Limite superior de cada código de um atributo numérico discretizado (None no último)."""
+        edges = self.tree.bin_edges[feature]
+        return [float(edge) for edge in edges] + [None]
+
+    def _branches(self, node: int) -> list:
+        """Ramos (código, filho) de uma divisão multi-ramos, na ordem de criação dos filhos."""
+        tree = self.tree
+        offset = tree.cat_offset[node] + 1
+        table = tree.cat_table[offset:offset + len(tree.categories[tree.feature[node]])]
+        return sorted(((int(code), int(child)) for code, child in enumerate(table) if child >= 0),
+                      key=lambda branch: branch[1])
+
+    def _missing_child(self, node: int) -> int:
+        """Filho que recebe valores ausentes e categorias desconhecidas (-1 se ficam no nó)."""
+        return int(self.tree.cat_table[self.tree.cat_offset[node]])
+
+    def _without_branch(self, node: int) -> list:
+        """Códigos conhecidos sem ramo em uma divisão multi-ramos (param no nó)."""
+        tree = self.tree
+        offset = tree.cat_offset[node] + 1
+        table = tree.cat_table[offset:offset + len(tree.categories[tree.feature[node]])]
+        return [int(code) for code in np.flatnonzero(table < 0)]
+
+    # --- UMA LINHA POR VEZ (if/else aninhados) ---
+    def row_function(self, name: str) -> str:
+        """Funções `name(row)` para uma linha: `row` é um dicionário {atributo: valor}."""
+        functions, pending = [], [(name, 0)]
+        while pending:
+            function_name, root = pending.pop()
+            lines = [f'def {function_name}(row):']
+            tasks = [('node', root, 1)]
+            while tasks:
+                kind, item, depth = tasks.pop()
+                if kind == 'line':
+                    lines.append('    ' * depth + item)
+                elif depth > MAX_NESTING:
+                    helper = f'_{name}_node_{item}'
+                    lines.append('    ' * depth + f'return {helper}(row)')
+                    pending.append((helper, item))
+                else:
+                    tasks.extend((kind, item, depth + indent) for kind, item, indent in reversed(self._row_node(item)))
+            functions.append('\n'.join(lines))
+        return '\n\n\n'.join(functions)
+
+    def _row_node(self, node: int) -> list:
+        """
+        Conteúdo de um nó como itens ('line', texto, indentação relativa) ou
+        ('node', filho, indentação relativa). Como todo ramo termina em
+        `return`, o lado direito vem depois do `if`, sem `else`.
+        """
+        tree = self.tree
+        feature = tree.feature[node]
+        if feature < 0:
+            return [('line', f'return {_literal(tree.classes[tree.value[node]])}', 0)]
+
+        fallback = ('line', f'return {_literal(tree.classes[tree.value[node]])}', 1)
+        items = [('line', f'x = row.get({_literal(tree.feature_names[feature])})', 0)]
+        if tree.cat_offset[node] < 0:
+            # Teste contínuo: NaN e valores ausentes seguem o lado aprendido no treino, como na CompiledTree
+            threshold = _literal(float(tree.threshold[node]))
+            if tree.missing_left[node]:
+                condition = f'x is None or x != x or x <= {threshold}'
+            else:
+                condition = f'x is not None and x <= {threshold}'
+            return items + [('line', f'if {condition}:', 0), ('node', tree.left[node], 1),
+                            ('node', tree.right[node], 0)]
+
+        offset = tree.cat_offset[node] + 1
+        table = tree.cat_table[offset:offset + len(tree.categories[feature])]
+        if tree.left[node] >= 0:
+            # Subconjunto do CART: ausentes e categorias desconhecidas vão para o lado do código -1
+            if self._missing_child(node) == tree.left[node]:
+                right_values = [_literal(tree.categories[feature][code])
+                                for code in np.flatnonzero(table != tree.left[node])]
+                condition = f"x not in {{{', '.join(right_values)}}}" if right_values else 'True'
+            else:
+                left_values = [_literal(tree.categories[feature][code])
+                               for code in np.flatnonzero(table == tree.left[node])]
+                condition = f"x in {{{', '.join(left_values)}}}"
+            return items + [('line', f'if {condition}:', 0), ('node', tree.left[node], 1),
+                            ('node', tree.right[node], 0)]
+
+        branches = self._branches(node)
+        missing_child = self._missing_child(node)
+        if tree.bin_edges[feature] is not None:
+            # Atributo numérico discretizado (ID3 com max_bins): o código é o bin do valor
+            if missing_child < 0:
+                items += [('line', 'if x is None or x != x:', 0), fallback]
+            else:
+                items.append(('line', "x = float('nan') if x is None else x", 0))
+            destination = dict(branches)
+            for code, bound in enumerate(self._code_bounds(feature)):
+                # NaN falha em todas as comparações e chegaria ao último bin; o ramo dos ausentes o testa antes
+                prefix = 'x != x or ' if code in destination and destination[code] == missing_child else ''
+                condition = 'else:' if bound is None else \
+                    f'{"if" if code == 0 else "elif"} {prefix}x <= {_literal(bound)}:'
+                items.append(('line', condition, 0))
+                items.append(('node', destination[code], 1) if code in destination else fallback)
+            return items
+
+        for code, child in branches:
+            if child != missing_child:
+                items += [('line', f'if x == {_literal(tree.categories[feature][code])}:', 0), ('node', child, 1)]
+        if missing_child < 0:
+            return items + [(fallback[0], fallback[1], 0)]
+        # O ramo dos ausentes recebe tudo o que não é uma categoria conhecida de outro ramo
+        absent = self._without_branch(node)
+        if absent:
+            absent_values = ', '.join(_literal(tree.categories[feature][code]) for code in absent)
+            items += [('line', f'if x in {{{absent_values}}}:', 0), fallback]
+        return items + [('node', missing_child, 0)]
+
+    # --- EM LOTE (máscaras NumPy) ---
+    def _equalities(self, column: str, feature: int, codes) -> str:
+        """Disjunção de igualdades da coluna com os valores dos códigos ('' sem códigos)."""
+        tree = self.tree
+        is_binned = tree.bin_edges[feature] is not None
+        return ' | '.join(f'({column} == {int(code) if is_binned else _literal(tree.categories[feature][code])})'
+                          for code in codes)
+
+    def batch_function(self, name: str) -> tuple:
+        """
+        Função `name(X)` vetorizada: X é um DataFrame ou um dicionário de
+        colunas. Cada nó filtra as linhas do pai por uma máscara (np.where nas
+        folhas); as máscaras vivas são só as do caminho atual.
+
+        Returns:
+            Uma tupla (codigo, constantes), com as constantes de módulo usadas.
+        """
+        tree = self.tree
+        used = sorted({int(feature) for feature in tree.feature if feature >= 0}) or [0]
+        constants, lines = [], [f'def {name}(X):']
+        for feature in used:
+            column = _literal(tree.feature_names[feature])
+            if not tree.is_categorical[feature]:
+                lines.append(f'    c{feature} = np.asarray(X[{column}], dtype=np.float64)')
+            elif tree.bin_edges[feature] is not None:
+                edges = ', '.join(_literal(float(edge)) for edge in tree.bin_edges[feature])
+                constants.append(f'_{name}_EDGES_{feature} = np.array([{edges}])')
+                lines.append(f'    c{feature} = np.asarray(X[{column}], dtype=np.float64)')
+                lines.append(f'    c{feature} = np.where(np.isnan(c{feature}), -1, '
+                             f'np.searchsorted(_{name}_EDGES_{feature}, c{feature}, side="left"))')
+            else:
+                lines.append(f'    c{feature} = np.asarray(X[{column}], dtype=object)')
+        lines.append(f'    out = np.zeros(len(c{used[0]}), dtype=np.intp)')
+        lines.append(f'    m0 = np.ones(len(c{used[0]}), dtype=bool)')
+
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            feature = tree.feature[node]
+            mask = f'm{node}'
+            if feature < 0:
+                lines.append(f'    out = np.where({mask}, {int(tree.value[node])}, out)')
+                lines.append(f'    del {mask}')
+                continue
+
+            column = f'c{feature}'
+            offset = tree.cat_offset[node]
+            if offset < 0 or tree.left[node] >= 0:
+                if offset < 0:
+                    condition = f'{column} <= {_literal(float(tree.threshold[node]))}'
+                    if tree.missing_left[node]:
+                        condition = f'({condition}) | np.isnan({column})'
+                else:
+                    table = tree.cat_table[offset + 1:offset + 1 + len(tree.categories[feature])]
+                    # Comparações de igualdade (e não np.isin), que aceitam colunas com tipos mistos
+                    if self._missing_child(node) == tree.left[node]:
+                        condition = self._equalities(column, feature, np.flatnonzero(table != tree.left[node]))
+                        condition = f'~({condition})' if condition else f'np.ones(len({column}), dtype=bool)'
+                    else:
+                        condition = self._equalities(column, feature, np.flatnonzero(table == tree.left[node]))
+                left, right = tree.left[node], tree.right[node]
+                lines.append(f'    goes_left = {condition}')
+                lines.append(f'    m{left} = {mask} & goes_left')
+                lines.append(f'    m{right} = {mask} & ~goes_left')
+                children = [left, right]
+            else:
+                branches = self._branches(node)
+                is_binned = tree.bin_edges[feature] is not None
+                values = [str(code) if is_binned else _literal(tree.categories[feature][code])
+                          for code, _ in branches]
+                missing_child = self._missing_child(node)
+                lines.append(f'    rest = {mask}.copy()')
+                for (code, child), value in zip(branches, values):
+                    if child != missing_child:
+                        lines.append(f'    m{child} = {mask} & ({column} == {value})')
+                        lines.append(f'    rest &= ~m{child}')
+                if missing_child >= 0:
+                    # O ramo dos ausentes recebe tudo o que não é uma categoria conhecida de outro ramo
+                    absent = self._equalities(column, feature, self._without_branch(node))
+                    lines.append(f'    m{missing_child} = rest & ~({absent})' if absent else
+                                 f'    m{missing_child} = rest.copy()')
+                    lines.append(f'    rest &= ~m{missing_child}')
+                # Categorias sem ramo ficam com o fallback do nó
+                lines.append(f'    out = np.where(rest, {int(tree.value[node])}, out)')
+                children = [child for _, child in branches]
+            lines.append(f'    del {mask}')
+            stack.extend(reversed(children))
+
+        lines.append('    return np.asarray(CLASSES)[out]')
+        return '\n'.join(lines), constants
+
+
+def generate_source(tree: CompiledTree, vectorized: bool = False) -> str:
+    """
+    Gera o código-fonte de um módulo Python autônomo com a árvore.
+
+    O módulo define `predict_one(row)`, que percorre a árvore em if/else
+    aninhados para uma linha (um dicionário {atributo: valor}), e, com
+    `vectorized`, `predict_batch(X)`, que prediz um DataFrame ou um
+    dicionário de colunas com máscaras NumPy. O comportamento é o mesmo da
+    CompiledTree: valores ausentes seguem o lado aprendido no treino (a
+    direita, se o nó não viu ausentes) e categorias desconhecidas seguem os
+    ausentes (multi-ramos sem ausentes no treino: param no nó).
+    """
+    writer = _SourceWriter(tree)
+    functions = ['predict_one(row)'] + (['predict_batch(X)'] if vectorized else [])
+    parts = [_HEADER.format(functions='\n    '.join(functions)).rstrip('\n')]
+    if vectorized:
+        parts.append('import numpy as np')
+    classes = ', '.join(_literal(value) for value in tree.classes)
+    features = ', '.join(_literal(name) for name in tree.feature_names)
+    constants = [f'FEATURES = [{features}]', f'CLASSES = [{classes}]']
+    code = [writer.row_function('predict_one')]
+    if vectorized:
+        batch_code, batch_constants = writer.batch_function('predict_batch')
+        constants += batch_constants
+        code.append(batch_code)
+    parts.append('\n'.join(constants))
+    parts += code
+    return '\n\n\n'.join(parts) + '\n'
+
+
+def export_function(tree: CompiledTree, path: str = None, vectorized: bool = False):
+    """
+    Compila a árvore em uma função Python nativa, no próprio processo.
+
+    Args:
+        tree: Árvore compilada de um ID3, C45 ou CART treinado.
+        path: Se informado, grava também o módulo autônomo gerado nesse arquivo.
+        vectorized: Se True, devolve `predict_batch(X)` em vez de `predict_one(row)`.
+
+    Returns:
+        A função gerada; o código-fonte do módulo fica em `função.source`.
+    """
+    source = generate_source(tree, vectorized)
+    if path is not None:
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(source)
+    namespace = {'__name__': 'decision_tree_lib_generated'}
+    exec(compile(source, path or '<decision_tree_lib.codegen>', 'exec'), namespace)
+    function = namespace['predict_batch' if vectorized else 'predict_one']
+    function.source = source
+    return function
@@ -0,0 +1,538 @@
+from __future__ import annotations
+import copy
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING
+import numpy as np
+from . import binning, utils
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class TrainingData:
+    """
+    Núcleo de treinamento compartilhado por ID3, C4.5 e CART.
+
+    Converte X e y UMA única vez em arrays NumPy contíguos:
+    - atributos contínuos viram colunas float64;
+    - atributos categóricos viram códigos inteiros (guardados na mesma matriz);
+    - os rótulos viram códigos 0..k-1 (classes ordenadas, como em `mode()`),
+      ou ficam como float64 nos dados de regressão (`regression=True`).
+    Valores ausentes ficam como NaN nas colunas contínuas e como o código -1
+    nas categóricas.
+
+    Cada nó da árvore é descrito apenas por um intervalo [start, end) de um
+    único vetor de permutação `samples`, reordenado no lugar a cada divisão
+    (como o Splitter do scikit-learn). Nenhum DataFrame é criado por nó.
+    """
+    _ARRAY_FIELDS = ('X', 'y', 'binned')
+
+    def __init__(self, X: pd.DataFrame, y: pd.Series, categorical: str = 'auto', max_bins: int = None,
+                 regression: bool = False):
+        """
+        Args:
+            X: DataFrame com os atributos.
+            y: Series com os rótulos da classe (ou o alvo numérico, na regressão).
+            categorical: 'auto' trata como categóricas apenas as colunas não
+                numéricas (C4.5 e CART); 'all' trata todas como categóricas (ID3).
+            max_bins: Se informado, ativa o modo histograma: cada coluna
+                contínua é discretizada uma única vez em bins de quantis
+                (códigos uint8 em `binned`). Com categorical='all', as colunas
+                numéricas com mais de `max_bins` valores viram categorias de
+                intervalo, com os mesmos bins.
+            regression: Se True, y é um alvo numérico: não há classes, e os
+                histogramas guardam (n, soma de y, soma de y²) por bin.
+        """
+        import pandas as pd
+        n_samples, n_features = X.shape
+        self.feature_names = X.columns.tolist()
+        self.target_name = y.name
+        self.X = np.empty((n_samples, n_features), dtype=np.float64, order='F')
+        self.is_categorical = np.zeros(n_features, dtype=bool)
+        self.categories = [None] * n_features
+        self.max_bins = max_bins
+        self.bin_edges = [None] * n_features
+        if max_bins is not None and not 2 <= max_bins <= 255:
+            raise ValueError("max_bins deve estar entre 2 e 255")
+
+        for j, column in enumerate(self.feature_names):
+            series = X[column]
+            numeric = pd.api.types.is_numeric_dtype(series)
+            if (categorical == 'all' and numeric and max_bins is not None
+                    and series.nunique() > max_bins):
+                # Intervalos de quantis viram as categorias do atributo
+                values = series.to_numpy(dtype=np.float64)
+                self.bin_edges[j] = binning.find_bin_edges(values, max_bins)
+                codes = np.searchsorted(self.bin_edges[j], values, side='left')
+                self.X[:, j] = np.where(np.isnan(values), -1, codes)
+                self.is_categorical[j] = True
+                self.categories[j] = binning.bin_labels(self.bin_edges[j])
+            elif categorical == 'all' or not numeric:
+                codes, uniques = pd.factorize(series)
+                self.X[:, j] = codes
+                self.is_categorical[j] = True
+                self.categories[j] = np.asarray(uniques, dtype=object)
+            else:
+                self.X[:, j] = series.to_numpy(dtype=np.float64)
+                if max_bins is not None:
+                    self.bin_edges[j] = binning.find_bin_edges(self.X[:, j], max_bins)
+
+        # Colunas com valores ausentes (NaN, ou código -1 nas categóricas); nas
+        # demais, a busca de divisão dispensa todo o tratamento de ausentes
+        self.has_missing = np.array([np.any(self.X[:, j] < 0) if self.is_categorical[j]
+                                     else np.any(np.isnan(self.X[:, j])) for j in range(n_features)], dtype=bool)
+
+        # Matriz de códigos de bin (modo histograma) das colunas contínuas
+        self.binned_features = np.flatnonzero([edges is not None and not cat for edges, cat
+                                               in zip(self.bin_edges, self.is_categorical)])
+        self.binned_position = {int(j): position for position, j in enumerate(self.binned_features)}
+        self.binned = np.empty((n_samples, len(self.binned_features)), dtype=np.uint8, order='F')
+        for position, j in enumerate(self.binned_features):
+            self.binned[:, position] = binning.bin_values(self.X[:, j], self.bin_edges[j], self.missing_bin)
+
+        self.regression = regression
+        if regression:
+            self.y = np.ascontiguousarray(y.to_numpy(dtype=np.float64))
+            if np.isnan(self.y).any():
+                raise ValueError("O alvo da regressão contém valores ausentes")
+            self.classes, self.n_classes = None, None
+        else:
+            self.classes, y_codes = np.unique(y.to_numpy(), return_inverse=True)
+            self.y = np.ascontiguousarray(y_codes.ravel(), dtype=np.intp)
+            self.n_classes = len(self.classes)
+        self.samples = np.arange(n_samples, dtype=np.intp)
+
+    def with_samples(self, samples: np.ndarray) -> 'TrainingData':
+        """
+        Visão dos mesmos arrays codificados com outro vetor de amostras (por
+        exemplo, uma amostra bootstrap com índices repetidos). Nada é copiado
+        além do próprio vetor de índices.
+        """
+        view = copy.copy(self)
+        view.samples = np.array(samples, dtype=np.intp)
+        return view
+
+    def append(self, X: pd.DataFrame, y: pd.Series) -> 'TrainingData':
+        """
+        Novos dados com as linhas de (X, y) acrescentadas ao fim, codificadas
+        com o esquema destes: categorias novas entram no fim do vocabulário
+        (a ordem que `pd.factorize` daria nos dados concatenados) e classes
+        novas recodificam os rótulos. Os limites dos bins não mudam.
+        """
+        import pandas as pd
+        combined = copy.copy(self)
+        n_new = len(X)
+        X_new = np.empty((n_new, len(self.feature_names)), dtype=np.float64)
+        combined.categories = list(self.categories)
+        for j, column in enumerate(self.feature_names):
+            series = X[column]
+            if self.is_categorical[j] and self.bin_edges[j] is not None:
+                values = series.to_numpy(dtype=np.float64)
+                codes = np.searchsorted(self.bin_edges[j], values, side='left')
+                X_new[:, j] = np.where(np.isnan(values), -1, codes)
+            elif self.is_categorical[j]:
+                codes = pd.Index(combined.categories[j]).get_indexer(series)
+                unseen = (codes < 0) & series.notna().to_numpy()
+                if unseen.any():
+                    extra = np.asarray(pd.unique(series[unseen]), dtype=object)
+                    combined.categories[j] = np.concatenate([combined.categories[j], extra])
+                    codes = pd.Index(combined.categories[j]).get_indexer(series)
+                X_new[:, j] = codes
+            else:
+                X_new[:, j] = series.to_numpy(dtype=np.float64)
+        combined.X = np.asfortranarray(np.concatenate([self.X, X_new]))
+        combined.has_missing = self.has_missing | np.array(
+            [np.any(X_new[:, j] < 0) if self.is_categorical[j] else np.any(np.isnan(X_new[:, j]))
+             for j in range(len(self.feature_names))], dtype=bool)
+
+        binned_new = np.empty((n_new, len(self.binned_features)), dtype=np.uint8)
+        for position, j in enumerate(self.binned_features):
+            binned_new[:, position] = binning.bin_values(X_new[:, j], self.bin_edges[j], self.missing_bin)
+        combined.binned = np.asfortranarray(np.concatenate([self.binned, binned_new]))
+
+        if self.regression:
+            combined.y = np.concatenate([self.y, y.to_numpy(dtype=np.float64)])
+        else:
+            combined.classes = np.unique(np.concatenate([self.classes, y.to_numpy()]))
+            combined.n_classes = len(combined.classes)
+            old_codes = np.searchsorted(combined.classes, self.classes)[self.y]
+            combined.y = np.concatenate([old_codes, np.searchsorted(combined.classes, y.to_numpy())]).astype(np.intp)
+        combined.samples = np.arange(len(combined.y), dtype=np.intp)
+        return combined
+
+    def split_arrays(self) -> tuple:
+        """
+        Separa os arrays grandes (X, y e códigos de bin) dos metadados, para
+        compartilhá-los entre processos sem serializá-los.
+
+        Returns:
+            Uma tupla (arrays, metadados), ambos dicionários.
+        """
+        arrays = {name: getattr(self, name) for name in self._ARRAY_FIELDS}
+        metadata = {name: value for name, value in vars(self).items()
+                    if name not in self._ARRAY_FIELDS and name != 'samples'}
+        return arrays, metadata
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, metadata: dict) -> 'TrainingData':
+        """Reconstrói o TrainingData a partir do resultado de `split_arrays`."""
+        data = cls.__new__(cls)
+        vars(data).update(metadata)
+        vars(data).update(arrays)
+        data.samples = np.arange(len(data.y), dtype=np.intp)
+        return data
+
+    @property
+    def n_samples(self) -> int:
+        return len(self.samples)
+
+    @property
+    def missing_bin(self) -> int:
+        """Código de bin reservado para valores ausentes (o último)."""
+        return self.max_bins
+
+    def histogram(self, start: int, end: int) -> np.ndarray:
+        """
+        Histogramas de contagens por (bin, classe) de todas as colunas
+        discretizadas, para as amostras do nó [start, end), em uma única
+        chamada a `np.bincount`.
+
+        Returns:
+            Array (len(binned_features), max_bins + 1, n_classes); na
+            regressão, (len(binned_features), max_bins + 1, 3), com as somas
+            (n, soma de y, soma de y²) de cada bin.
+        """
+        rows = self.samples[start:end]
+        n_binned = len(self.binned_features)
+        n_bins = self.max_bins + 1
+        offsets = np.arange(n_binned, dtype=np.intp) * n_bins
+        if self.regression:
+            index = (self.binned[rows].astype(np.intp) + offsets).ravel()
+            targets = np.broadcast_to(self.y[rows][:, None], (len(rows), n_binned)).ravel()
+            sums = [np.bincount(index, weights=weights, minlength=n_binned * n_bins)
+                    for weights in (None, targets, targets**2)]
+            return np.stack(sums, axis=-1).reshape(n_binned, n_bins, 3)
+        index = (self.binned[rows].astype(np.intp) + offsets) * self.n_classes + self.y[rows][:, None]
+        counts = np.bincount(index.ravel(), minlength=n_binned * n_bins * self.n_classes)
+        return counts.reshape(n_binned, n_bins, self.n_classes)
+
+    def children_histograms(self, parent_histogram: np.ndarray, ranges: list) -> list:
+        """
+        Histogramas dos filhos de um nó. Todos são calculados diretamente,
+        exceto o do maior filho, obtido subtraindo os demais do histograma do
+        pai (truque da subtração do LightGBM).
+
+        Args:
+            parent_histogram: Histograma do nó pai.
+            ranges: Lista de intervalos (start, end) dos filhos.
+        """
+        largest = max(range(len(ranges)), key=lambda i: ranges[i][1] - ranges[i][0])
+        histograms = [None] * len(ranges)
+        remainder = parent_histogram.copy()
+        for i, (start, end) in enumerate(ranges):
+            if i != largest:
+                histograms[i] = self.histogram(start, end)
+                remainder -= histograms[i]
+        histograms[largest] = remainder
+        return histograms
+
+    def values(self, feature: int, start: int, end: int) -> np.ndarray:
+        """Valores do atributo para as amostras do nó [start, end)."""
+        return self.X[self.samples[start:end], feature]
+
+    def labels(self, start: int, end: int) -> np.ndarray:
+        """Rótulos (codificados) das amostras do nó [start, end)."""
+        return self.y[self.samples[start:end]]
+
+    def class_counts(self, start: int, end: int) -> np.ndarray:
+        """Contagem de cada classe no nó [start, end)."""
+        return np.bincount(self.labels(start, end), minlength=self.n_classes)
+
+    def target_sums(self, start: int, end: int) -> np.ndarray:
+        """Somas (n, soma de y, soma de y²) do alvo de regressão no nó [start, end)."""
+        return utils.target_sums(self.labels(start, end))
+
+    def category_sums(self, feature: int, start: int, end: int) -> tuple:
+        """
+        Como `category_counts`, para o alvo de regressão: somas (n, soma de
+        y, soma de y²) por categoria, sem os exemplos com valor ausente.
+        """
+        import pandas as pd
+        codes = self.values(feature, start, end).astype(np.intp)
+        targets = self.labels(start, end)
+        if self.has_missing[feature]:
+            known = codes >= 0
+            codes, targets = codes[known], targets[known]
+        present = pd.unique(codes)
+        n_codes = len(self.categories[feature])
+        sums = np.stack([np.bincount(codes, weights=weights, minlength=n_codes)
+                         for weights in (None, targets, targets**2)], axis=-1)
+        return present, sums[present]
+
+    def category_counts(self, feature: int, start: int, end: int) -> tuple:
+        """
+        Contagens por (categoria, classe) de um atributo categórico no nó.
+        Os exemplos com valor ausente (código -1) ficam de fora.
+
+        Returns:
+            Uma tupla (codigos, contagens), em que `codigos` são as categorias
+            presentes no nó, na ordem em que aparecem, e `contagens` é a
+            matriz (len(codigos), n_classes) correspondente.
+        """
+        import pandas as pd
+        codes = self.values(feature, start, end).astype(np.intp)
+        labels = self.labels(start, end)
+        if self.has_missing[feature]:
+            known = codes >= 0
+            codes, labels = codes[known], labels[known]
+        present = pd.unique(codes)
+        n_codes = len(self.categories[feature])
+        counts = np.bincount(codes * self.n_classes + labels, minlength=n_codes * self.n_classes)
+        counts = counts.reshape(n_codes, self.n_classes)
+        return present, counts[present]
+
+    def missing_mask(self, feature: int, start: int, end: int) -> np.ndarray:
+        """Máscara dos exemplos do nó [start, end) com o atributo ausente."""
+        values = self.values(feature, start, end)
+        return values < 0 if self.is_categorical[feature] else np.isnan(values)
+
+    def missing_counts(self, feature: int, start: int, end: int) -> np.ndarray:
+        """Contagem de cada classe entre os exemplos do nó [start, end) com o atributo ausente."""
+        return utils.label_counts(self.labels(start, end)[self.missing_mask(feature, start, end)], self.n_classes)
+
+    def majority_class(self, start: int, end: int):
+        """Classe mais frequente no nó (a menor, em caso de empate, como `mode()[0]`)."""
+        return self.classes[np.argmax(self.class_counts(start, end))]
+
+    def category_value(self, feature: int, code: int):
+        """Valor original de uma categoria a partir do seu código."""
+        return self.categories[feature][code]
+
+    def partition(self, start: int, end: int, goes_left: np.ndarray) -> int:
+        """
+        Reordena samples[start:end] no lugar (de forma estável): amostras com
+        `goes_left` verdadeiro primeiro, as demais depois.
+
+        Returns:
+            O índice `mid` tal que os filhos são [start, mid) e [mid, end).
+        """
+        segment = self.samples[start:end]
+        self.samples[start:end] = np.concatenate((segment[goes_left], segment[~goes_left]))
+        return start + int(np.count_nonzero(goes_left))
+
+    def partition_split(self, feature: int, start: int, end: int, split_value, missing_left: bool = False) -> int:
+        """
+        Aplica um teste binário ao nó [start, end) e o particiona (ver
+        `partition`): `x <= split_value` nos atributos contínuos ou
+        `x in split_value` (conjunto de códigos) nos categóricos; os valores
+        ausentes vão para a esquerda se `missing_left`.
+
+        Returns:
+            O índice `mid` que separa os dois filhos.
+        """
+        values = self.values(feature, start, end)
+        if self.is_categorical[feature]:
+            goes_left = np.isin(values, list(split_value))
+        else:
+            goes_left = values <= split_value
+        if missing_left:
+            goes_left |= self.missing_mask(feature, start, end)
+        return self.partition(start, end, goes_left)
+
+    def partition_by_category(self, feature: int, start: int, end: int, missing_code: int = None) -> list:
+        """
+        Reordena samples[start:end] agrupando as amostras por categoria
+        (divisão com múltiplos ramos do ID3/C4.5).
+
+        Args:
+            missing_code: Ramo que recebe os exemplos com valor ausente.
+
+        Returns:
+            Lista de tuplas (codigo, start, end), uma por categoria presente
+            no nó, na ordem em que as categorias aparecem nele.
+        """
+        import pandas as pd
+        codes = self.values(feature, start, end).astype(np.intp)
+        if missing_code is not None:
+            codes[codes < 0] = missing_code
+        order = np.argsort(codes, kind='stable')
+        self.samples[start:end] = self.samples[start:end][order]
+        sorted_codes = codes[order]
+        unique_codes, first, counts = np.unique(sorted_codes, return_index=True, return_counts=True)
+        ranges = {code: (start + f, start + f + c) for code, f, c in zip(unique_codes, first, counts)}
+        return [(code, *ranges[code]) for code in pd.unique(codes)]
+
+
+def sample_features(features: list, max_features, rng: np.random.Generator) -> list:
+    """
+    Sorteia os atributos candidatos de um nó (subamostragem por divisão, como
+    nas florestas aleatórias), preservando a ordem original.
+
+    Args:
+        features: Atributos disponíveis no nó.
+        max_features: None (todos), 'sqrt', 'log2', um inteiro ou uma fração.
+        rng: Gerador de números aleatórios do ajuste.
+    """
+    n_features = len(features)
+    if max_features is None or n_features == 0:
+        return features
+    if max_features == 'sqrt':
+        n_selected = int(np.sqrt(n_features))
+    elif max_features == 'log2':
+        n_selected = int(np.log2(n_features))
+    elif isinstance(max_features, float):
+        n_selected = int(max_features * n_features)
+    else:
+        n_selected = int(max_features)
+    n_selected = min(max(n_selected, 1), n_features)
+    if n_selected == n_features:
+        return features
+    chosen = np.sort(rng.choice(n_features, size=n_selected, replace=False))
+    return [features[i] for i in chosen]
+
+
+def grow_tree(expand, root, priority=None, max_leaf_nodes: int = None):
+    """
+    Laço de crescimento iterativo compartilhado pelos algoritmos (sem recursão,
+    então a profundidade da árvore não esbarra no limite de recursão do Python).
+
+    Sem `max_leaf_nodes`, os nós pendentes ficam em uma pilha e são expandidos
+    em profundidade, na mesma ordem da antiga construção recursiva. Com
+    `max_leaf_nodes`, o crescimento é melhor-primeiro: uma fila de prioridade
+    expande sempre o nó pendente de maior `priority(nó)` (o ganho da sua melhor
+    divisão), até que o orçamento de folhas se esgote.
+
+    Args:
+        expand: Função (nó, max_filhos) que cria o nó na árvore e devolve os
+            filhos pendentes; max_filhos é None sem orçamento de folhas.
+        root: O nó pendente da raiz.
+        priority: Função que avalia um nó pendente e devolve o seu ganho.
+        max_leaf_nodes: Número máximo de folhas (None sem limite).
+    """
+    if max_leaf_nodes is None:
+        stack = [root]
+        while stack:
+            # Filhos empilhados em ordem inversa: o primeiro é expandido antes (pré-ordem)
+            stack.extend(reversed(expand(stack.pop(), None)))
+        return
+
+    # Cada nó pendente é uma folha até ser expandido
+    n_leaves = 1
+    counter = 0
+    heap = [(-priority(root), counter, root)]
+    while heap:
+        _, _, entry = heapq.heappop(heap)
+        children = expand(entry, max_leaf_nodes - n_leaves + 1)
+        n_leaves += max(len(children) - 1, 0)
+        for child in children:
+            counter += 1
+            heapq.heappush(heap, (-priority(child), counter, child))
+
+
+class FeaturePool:
+    """
+    Pool persistente de threads para avaliar os atributos candidatos de um nó
+    em paralelo. É criado uma única vez por `fit` e compartilha os arrays de
+    TrainingData sem cópias (o NumPy libera o GIL nas operações pesadas).
+
+    Nós grandes são distribuídos entre as threads; nós pequenos, perto das
+    folhas, são avaliados na própria thread, onde o custo de agendamento
+    dominaria. Os resultados voltam sempre na ordem dos atributos, então a
+    árvore não depende de `n_jobs`.
+    """
+    def __init__(self, n_jobs: int = None, min_samples_parallel: int = 5000):
+        """
+        Args:
+            n_jobs: Número de threads. None ou 1 avaliam em série; -1 usa
+                todos os núcleos.
+            min_samples_parallel: Nós com menos amostras são avaliados em série.
+        """
+        if n_jobs is not None and n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        self.n_jobs = n_jobs or 1
+        self.min_samples_parallel = min_samples_parallel
+        self._executor = ThreadPoolExecutor(self.n_jobs) if self.n_jobs > 1 else None
+
+    def map(self, function, features: list, n_samples: int) -> list:
+        """
+        Aplica `function` a cada atributo e devolve os resultados na ordem de
+        `features`.
+
+        Args:
+            function: Função que avalia um atributo.
+            features: Atributos candidatos do nó.
+            n_samples: Tamanho do nó (decide se vale a pena paralelizar).
+        """
+        if self._executor is None or n_samples < self.min_samples_parallel or len(features) < 2:
+            return [function(feature) for feature in features]
+
+        # Um bloco contíguo de atributos por thread
+        chunks = np.array_split(np.asarray(features), min(self.n_jobs, len(features)))
+        futures = [self._executor.submit(lambda chunk: [function(f) for f in chunk], chunk.tolist())
+                   for chunk in chunks]
+        return [result for future in futures for result in future.result()]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+# Dados de treino do processo trabalhador, anexados à memória compartilhada
+_worker_data = None
+_worker_segments = []
+
+
+def _attach_shared_data(specs: dict, metadata: dict):
+    """
+    Inicializador dos processos trabalhadores: mapeia os arrays codificados
+    diretamente da memória compartilhada (sem cópia nem desserialização).
+    """
+    global _worker_data
+    arrays = {}
+    for name, (segment_name, shape, dtype, order) in specs.items():
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _worker_segments.append(segment)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=segment.buf, order=order)
+    _worker_data = TrainingData.from_arrays(arrays, metadata)
+
+
+def worker_data() -> TrainingData:
+    """TrainingData compartilhado com o processo trabalhador atual por `map_shared`."""
+    return _worker_data
+
+
+def map_shared(function, data: TrainingData, n_jobs: int, *iterables) -> list:
+    """
+    Aplica `function` aos itens de `iterables` em um pool de processos. Os
+    arrays codificados de `data` são copiados uma única vez para blocos de
+    memória compartilhada, que os trabalhadores mapeiam (ver `worker_data`);
+    só os metadados pequenos e os próprios itens são serializados.
+    """
+    arrays, metadata = data.split_arrays()
+    segments, specs = [], {}
+    try:
+        for name, array in arrays.items():
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            segments.append(segment)
+            order = 'F' if array.flags.f_contiguous and not array.flags.c_contiguous else 'C'
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf, order=order)
+            shared[...] = array
+            specs[name] = (segment.name, array.shape, array.dtype.str, order)
+
+        with ProcessPoolExecutor(n_jobs, initializer=_attach_shared_data,
+                                 initargs=(specs, metadata)) as executor:
+            return list(executor.map(function, *iterables))
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
@@ -0,0 +1,316 @@
+"""
+Treino com paralelismo de dados: cada processo trabalhador guarda uma parte
+das linhas (por exemplo, um pedaço de um CSV) e o processo principal nunca
+vê as linhas, só somas.
+
+1. Cada trabalhador lê a sua parte e devolve um resumo: os valores
+   distintos (com contagens) das colunas numéricas, o vocabulário das
+   categóricas e as classes.
+2. O coordenador junta os resumos no esquema global (bins de quantis via
+   `binning.bin_edges_from_counts`, vocabulários na ordem de aparição e
+   classes), que cada trabalhador usa para codificar a sua parte.
+3. Em cada nó, os trabalhadores calculam histogramas e contagens por classe
+   das suas linhas, o coordenador os soma e escolhe a divisão como no treino
+   em um processo só, e a divisão é enviada de volta para que cada
+   trabalhador particione as suas linhas.
+
+Os histogramas somados são iguais aos de um processo só e as partes são
+tratadas na ordem em que foram dadas, então a árvore é exatamente a mesma do
+modo histograma (`max_bins`) de C45 ou CART sobre os dados concatenados.
+"""
+from __future__ import annotations
+import multiprocessing
+import threading
+from typing import TYPE_CHECKING
+import numpy as np
+from . import binning
+from .c45 import C45
+from .cart import CART
+from .core import TrainingData
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _read_shard(shard, target: str) -> tuple:
+    """Lê uma parte (caminho de CSV ou DataFrame) e separa os atributos do alvo."""
+    import pandas as pd
+    frame = pd.read_csv(shard) if isinstance(shard, str) else shard
+    return frame.drop(columns=target), frame[target]
+
+
+def _summarize(X: pd.DataFrame, y: pd.Series) -> dict:
+    """Resumo de uma parte: o suficiente para montar o esquema global sem as linhas."""
+    import pandas as pd
+    columns = []
+    for column in X.columns:
+        series = X[column]
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy(dtype=np.float64)
+            missing = np.isnan(values)
+            distinct, counts = np.unique(values[~missing], return_counts=True)
+            columns.append({'numeric': True, 'distinct': distinct, 'counts': counts, 'missing': bool(missing.any())})
+        else:
+            codes, uniques = pd.factorize(series)
+            columns.append({'numeric': False, 'categories': np.asarray(uniques, dtype=object),
+                            'missing': bool((codes < 0).any())})
+    return {'feature_names': X.columns.tolist(), 'target_name': y.name, 'n_samples': len(X),
+            'columns': columns, 'classes': np.unique(y.to_numpy())}
+
+
+def _merge_summaries(summaries: list, max_bins: int) -> dict:
+    """
+    Junta os resumos das partes (na ordem das partes) nos metadados de um
+    TrainingData, os mesmos que a codificação dos dados concatenados daria.
+    """
+    import pandas as pd
+    feature_names = summaries[0]['feature_names']
+    if any(summary['feature_names'] != feature_names for summary in summaries):
+        raise ValueError("As partes não têm as mesmas colunas")
+    n_features = len(feature_names)
+    is_categorical = np.zeros(n_features, dtype=bool)
+    categories, bin_edges = [None] * n_features, [None] * n_features
+    has_missing = np.zeros(n_features, dtype=bool)
+    for j in range(n_features):
+        columns = [summary['columns'][j] for summary in summaries]
+        has_missing[j] = any(column['missing'] for column in columns)
+        numeric = {column['numeric'] for column in columns}
+        if len(numeric) > 1:
+            raise ValueError(f"A coluna {feature_names[j]!r} é numérica em algumas partes e não em outras")
+        if not numeric.pop():
+            # Ordem de primeira aparição nos dados concatenados, como `pd.factorize`
+            is_categorical[j] = True
+            categories[j] = np.asarray(pd.unique(np.concatenate([column['categories'] for column in columns])),
+                                       dtype=object)
+            continue
+        distinct, inverse = np.unique(np.concatenate([column['distinct'] for column in columns]),
+                                      return_inverse=True)
+        counts = np.bincount(inverse.ravel(), weights=np.concatenate([column['counts'] for column in columns]))
+        bin_edges[j] = binning.bin_edges_from_counts(distinct, counts.astype(np.int64), max_bins)
+
+    binned_features = np.flatnonzero([edges is not None for edges in bin_edges])
+    classes = np.unique(np.concatenate([summary['classes'] for summary in summaries]))
+    return {
+        'feature_names': feature_names, 'target_name': summaries[0]['target_name'],
+        'is_categorical': is_categorical, 'categories': categories, 'max_bins': max_bins,
+        'bin_edges': bin_edges, 'has_missing': has_missing, 'binned_features': binned_features,
+        'binned_position': {int(j): position for position, j in enumerate(binned_features)},
+        'regression': False, 'classes': classes, 'n_classes': len(classes),
+    }
+
+
+def _encode_shard(X: pd.DataFrame, y: pd.Series, metadata: dict) -> TrainingData:
+    """Codifica uma parte com o esquema global (vocabulários, bins e classes)."""
+    import pandas as pd
+    n_samples, n_features = len(X), len(metadata['feature_names'])
+    X_encoded = np.empty((n_samples, n_features), dtype=np.float64, order='F')
+    for j, column in enumerate(metadata['feature_names']):
+        if metadata['is_categorical'][j]:
+            X_encoded[:, j] = pd.Index(metadata['categories'][j]).get_indexer(X[column])
+        else:
+            X_encoded[:, j] = X[column].to_numpy(dtype=np.float64)
+    binned_features = metadata['binned_features']
+    binned = np.empty((n_samples, len(binned_features)), dtype=np.uint8, order='F')
+    for position, j in enumerate(binned_features):
+        binned[:, position] = binning.bin_values(X_encoded[:, j], metadata['bin_edges'][j], metadata['max_bins'])
+    y_codes = pd.Index(metadata['classes']).get_indexer(y)
+    arrays = {'X': X_encoded, 'y': np.ascontiguousarray(y_codes, dtype=np.intp), 'binned': binned}
+    return TrainingData.from_arrays(arrays, metadata)
+
+
+def _serve_shard(connection, shard, target: str):
+    """
+    Laço de um processo trabalhador: lê a sua parte, envia o resumo e
+    responde aos pedidos do coordenador, que são nomes de métodos do
+    TrainingData local (histogram, class_counts, partition_split...).
+    """
+    try:
+        X, y = _read_shard(shard, target)
+        connection.send(('ok', _summarize(X, y)))
+    except Exception as error:
+        connection.send(('error', error))
+        return
+    data = None
+    while True:
+        name, args = connection.recv()
+        if name == 'close':
+            break
+        try:
+            if name == 'encode':
+                data = _encode_shard(X, y, *args)
+                del X, y
+                result = data.n_samples
+            else:
+                result = getattr(data, name)(*args)
+            connection.send(('ok', result))
+        except Exception as error:
+            connection.send(('error', error))
+    connection.close()
+
+
+class ShardedData(TrainingData):
+    """
+    TrainingData do coordenador no treino com paralelismo de dados: as
+    linhas ficam nos processos trabalhadores, um por parte, e cada método
+    usado pelo crescimento em modo histograma é pedido a todos eles e
+    combinado aqui. Não há `X`, `y` nem `samples`, então os métodos que leem
+    as linhas (`values`, `labels`, `with_samples`) não se aplicam; os treinos
+    que os usariam são recusados por `fit_sharded`.
+
+    Os nós continuam descritos por intervalos [start, end) globais, os mesmos
+    de um processo só (as partições são estáveis e as partes vêm na ordem
+    dada); cada intervalo é associado aos intervalos locais de cada parte.
+    """
+    def __init__(self, shards: list, target: str, max_bins: int):
+        """
+        Args:
+            shards: Partes das linhas, em ordem: caminhos de arquivos CSV ou
+                DataFrames, todos com as mesmas colunas.
+            target: Nome da coluna do alvo (classe) em cada parte.
+            max_bins: Número de bins do modo histograma.
+        """
+        if max_bins is None or not 2 <= max_bins <= 255:
+            raise ValueError("max_bins deve estar entre 2 e 255")
+        context = multiprocessing.get_context()
+        self._connections, self._processes = [], []
+        self._lock = threading.Lock()
+        for shard in shards:
+            parent_end, child_end = context.Pipe()
+            process = context.Process(target=_serve_shard, args=(child_end, shard, target), daemon=True)
+            process.start()
+            child_end.close()
+            self._connections.append(parent_end)
+            self._processes.append(process)
+        try:
+            summaries = self._receive()
+            vars(self).update(_merge_summaries(summaries, max_bins))
+            shard_sizes = self._call('encode', [(self._metadata(),)] * len(shards))
+        except BaseException:
+            self.close()
+            raise
+        self._n_samples = sum(shard_sizes)
+        self._ranges = {(0, self._n_samples): [(0, size) for size in shard_sizes]}
+
+    def _metadata(self) -> dict:
+        return {name: value for name, value in vars(self).items() if not name.startswith('_')}
+
+    def _receive(self) -> list:
+        results = []
+        for connection in self._connections:
+            status, result = connection.recv()
+            if status == 'error':
+                raise result
+            results.append(result)
+        return results
+
+    def _call(self, name: str, shard_args: list) -> list:
+        """Envia o mesmo pedido a todas as partes (cada uma com os seus argumentos) e devolve as respostas."""
+        with self._lock:
+            for connection, args in zip(self._connections, shard_args):
+                connection.send((name, args))
+            return self._receive()
+
+    def _node_call(self, name: str, start: int, end: int, *args, feature: int = None) -> list:
+        """
+        Pedido sobre o nó [start, end), traduzido para o intervalo local de
+        cada parte; `feature`, se dado, vem antes do intervalo, como nos
+        métodos do TrainingData.
+        """
+        prefix = () if feature is None else (feature,)
+        return self._call(name, [(*prefix, local_start, local_end, *args) for local_start, local_end
+                                 in self._ranges[(start, end)]])
+
+    def close(self):
+        """Encerra os processos trabalhadores."""
+        for connection in self._connections:
+            try:
+                connection.send(('close', ()))
+            except OSError:
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections, self._processes = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def n_samples(self) -> int:
+        return self._n_samples
+
+    def histogram(self, start: int, end: int) -> np.ndarray:
+        return sum(self._node_call('histogram', start, end))
+
+    def class_counts(self, start: int, end: int) -> np.ndarray:
+        return sum(self._node_call('class_counts', start, end))
+
+    def missing_counts(self, feature: int, start: int, end: int) -> np.ndarray:
+        return sum(self._node_call('missing_counts', start, end, feature=feature))
+
+    def category_counts(self, feature: int, start: int, end: int) -> tuple:
+        import pandas as pd
+        results = self._node_call('category_counts', start, end, feature=feature)
+        # Ordem de aparição no nó: a das partes, uma após a outra
+        present = pd.unique(np.concatenate([codes for codes, _ in results]))
+        counts = np.zeros((len(self.categories[feature]), self.n_classes), dtype=np.int64)
+        for codes, shard_counts in results:
+            counts[codes] += shard_counts
+        return present, counts[present]
+
+    def partition_split(self, feature: int, start: int, end: int, split_value, missing_left: bool = False) -> int:
+        local_ranges = self._ranges[(start, end)]
+        mids = self._node_call('partition_split', start, end, split_value, missing_left, feature=feature)
+        mid = start + sum(local_mid - local_start for local_mid, (local_start, _) in zip(mids, local_ranges))
+        self._ranges[(start, mid)] = [(local_start, local_mid) for local_mid, (local_start, _)
+                                      in zip(mids, local_ranges)]
+        self._ranges[(mid, end)] = [(local_mid, local_end) for local_mid, (_, local_end)
+                                    in zip(mids, local_ranges)]
+        return mid
+
+    def partition_by_category(self, feature: int, start: int, end: int, missing_code: int = None) -> list:
+        import pandas as pd
+        local_ranges = self._ranges[(start, end)]
+        results = self._node_call('partition_by_category', start, end, missing_code, feature=feature)
+        shard_children = [{code: (child_start, child_end) for code, child_start, child_end in children}
+                          for children in results]
+        order = pd.unique(np.concatenate([[code for code, _, _ in children] for children in results]))
+        # Como em um processo só, o intervalo do nó fica ordenado por código
+        children, position = {}, start
+        for code in sorted(order):
+            child_ranges = [ranges.get(code, (local_start, local_start))
+                            for ranges, (local_start, _) in zip(shard_children, local_ranges)]
+            size = sum(child_end - child_start for child_start, child_end in child_ranges)
+            children[code] = (position, position + size)
+            self._ranges[children[code]] = child_ranges
+            position += size
+        return [(code, *children[code]) for code in order]
+
+
+def fit_sharded(estimator, shards: list, target: str):
+    """
+    Treina um C45 ou CART em modo histograma com as linhas divididas entre
+    processos trabalhadores, um por parte (ver `ShardedData`). A árvore é a
+    mesma de `estimator.fit` nos dados concatenados.
+
+    Args:
+        estimator: Instância (não treinada) de C45 ou CART, com `max_bins`.
+        shards: Caminhos de arquivos CSV ou DataFrames, na ordem das linhas.
+        target: Nome da coluna do alvo em cada parte.
+
+    Returns:
+        O próprio estimador, treinado.
+    """
+    if not isinstance(estimator, (C45, CART)):
+        raise TypeError("estimator deve ser uma instância de C45 ou CART")
+    if estimator.max_bins is None:
+        raise ValueError("O treino em partes usa o modo histograma: defina max_bins")
+    if getattr(estimator, 'instrument', None):
+        raise ValueError("A instrumentação não é suportada no treino em partes")
+    if estimator.incremental:
+        raise ValueError("O treino em partes não guarda as linhas: incremental=True não é suportado")
+    with ShardedData(shards, target, estimator.max_bins) as data:
+        return estimator._fit_data(data)
@@ -0,0 +1,205 @@
+from __future__ import annotations
+import copy
+import os
+from typing import TYPE_CHECKING
+import numpy as np
+from . import serialization
+from .core import TrainingData, map_shared, worker_data
+from .cart import CART
+from .c45 import C45
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _fit_estimator(estimator, samples: np.ndarray, data: TrainingData = None):
+    """Treina uma cópia do estimador base na amostra de índices dada."""
+    data = worker_data() if data is None else data
+    return estimator._fit_data(data.with_samples(samples))
+
+
+class Bagging:
+    """
+    Bagging de árvores de decisão (CART ou C4.5).
+
+    Cada árvore é treinada em uma amostra bootstrap descrita apenas por um
+    vetor de índices sobre os dados codificados uma única vez; nenhum
+    DataFrame é copiado. Com `n_jobs` > 1, as árvores são treinadas em um
+    pool de processos que lê os arrays de treino de memória compartilhada.
+    A predição codifica X uma vez e combina os votos de todas as árvores
+    compiladas em lote.
+
+    `save(path)` grava todas as árvores em um único arquivo binário; com
+    `load(path, mmap=True)`, processos que servem o mesmo ensemble mapeiam uma
+    única cópia dele na memória.
+    """
+    def __init__(self, base_estimator=None, n_estimators=10, max_samples=1.0, bootstrap=True,
+                 oob_score=False, n_jobs=None, random_state=None):
+        """
+        Args:
+            base_estimator: Instância (não treinada) de CART ou C45. Padrão: CART().
+            n_estimators: Número de árvores.
+            max_samples: Tamanho de cada amostra, como fração de n (float) ou
+                número de linhas (int).
+            bootstrap: Se True, amostra com reposição; senão, sem reposição.
+            oob_score: Se True, calcula a acurácia fora da amostra (`oob_score_`).
+            n_jobs: Número de processos de treino (-1 para todos os núcleos).
+            random_state: Semente para as amostras e os sorteios de atributos.
+        """
+        self.base_estimator = base_estimator
+        self.n_estimators = n_estimators
+        self.max_samples = max_samples
+        self.bootstrap = bootstrap
+        self.oob_score = oob_score
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.estimators_ = None
+        self.classes_ = None
+
+    def _make_estimator(self, seed: int):
+        estimator = copy.deepcopy(self.base_estimator if self.base_estimator is not None else CART())
+        if not isinstance(estimator, (CART, C45)):
+            raise TypeError("base_estimator deve ser uma instância de CART ou C45")
+        estimator.random_state = seed
+        estimator.n_jobs = None # O paralelismo fica no nível das árvores
+        return estimator
+
+    def _draw_samples(self, seed: int, n_samples: int) -> np.ndarray:
+        """Índices da amostra de uma árvore, reproduzíveis a partir da semente."""
+        rng = np.random.default_rng(seed)
+        if isinstance(self.max_samples, float):
+            n_draw = max(1, int(round(self.max_samples * n_samples)))
+        else:
+            n_draw = int(self.max_samples)
+        if self.bootstrap:
+            return rng.integers(0, n_samples, n_draw)
+        return np.sort(rng.choice(n_samples, size=n_draw, replace=False))
+
+    def fit(self, X: pd.DataFrame, y: pd.Series):
+        """Treina as árvores do ensemble."""
+        base = self.base_estimator if self.base_estimator is not None else CART()
+        data = TrainingData(X, y, max_bins=base.max_bins)
+        n_samples = data.n_samples
+        rng = np.random.default_rng(self.random_state)
+        seeds = rng.integers(0, np.iinfo(np.int32).max, self.n_estimators)
+        estimators = [self._make_estimator(int(seed)) for seed in seeds]
+        samples = [self._draw_samples(int(seed), n_samples) for seed in seeds]
+
+        n_jobs = self.n_jobs
+        if n_jobs is not None and n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        if n_jobs is None or n_jobs <= 1:
+            self.estimators_ = [_fit_estimator(estimator, sample, data)
+                                for estimator, sample in zip(estimators, samples)]
+        else:
+            self.estimators_ = self._fit_parallel(data, estimators, samples, n_jobs)
+
+        self.classes_ = data.classes
+        self.feature_names_ = data.feature_names
+        if self.oob_score:
+            self._compute_oob_score(data, samples)
+        return self
+
+    def _fit_parallel(self, data: TrainingData, estimators: list, samples: list, n_jobs: int) -> list:
+        """Treina as árvores em um pool de processos sobre a memória compartilhada (ver `core.map_shared`)."""
+        return map_shared(_fit_estimator, data, n_jobs, estimators, samples)
+
+    def _votes(self, X_encoded: np.ndarray) -> np.ndarray:
+        """Matriz (linhas, classes) com os votos das árvores para cada linha."""
+        votes = np.zeros((len(X_encoded), len(self.classes_)), dtype=np.float64)
+        rows = np.arange(len(X_encoded))
+        for estimator in self.estimators_:
+            tree = estimator.compiled_
+            votes[rows, tree.value[tree.apply(X_encoded)]] += 1
+        return votes
+
+    def _compute_oob_score(self, data: TrainingData, samples: list):
+        """Acurácia fora da amostra: cada linha é votada só pelas árvores que não a viram."""
+        votes = np.zeros((data.n_samples, len(self.classes_)), dtype=np.float64)
+        for estimator, sample in zip(self.estimators_, samples):
+            out_of_bag = np.ones(data.n_samples, dtype=bool)
+            out_of_bag[sample] = False
+            rows = np.flatnonzero(out_of_bag)
+            tree = estimator.compiled_
+            votes[rows, tree.value[tree.apply(data.X[rows])]] += 1
+
+        has_votes = votes.sum(axis=1) > 0
+        self.oob_decision_function_ = np.divide(votes, votes.sum(axis=1, keepdims=True),
+                                                out=np.full_like(votes, np.nan), where=has_votes[:, None])
+        self.oob_score_ = np.mean(np.argmax(votes[has_votes], axis=1) == data.y[has_votes])
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """Prediz por voto majoritário das árvores (empates: a menor classe)."""
+        X_encoded = self.estimators_[0].compiled_.encode(X)
+        return self.classes_[np.argmax(self._votes(X_encoded), axis=1)]
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Média das distribuições de classe das árvores (colunas na ordem de
+        `classes_`), cada uma lida das contagens do nó em que a linha termina.
+        """
+        X_encoded = self.estimators_[0].compiled_.encode(X)
+        proba = np.zeros((len(X_encoded), len(self.classes_)), dtype=np.float64)
+        for estimator in self.estimators_:
+            tree = estimator.compiled_
+            proba += tree.probabilities()[tree.apply(X_encoded)]
+        return proba / len(self.estimators_)
+
+    def save(self, path: str):
+        """Grava as árvores do ensemble em `path`, no formato binário de `serialization`."""
+        if self.estimators_ is None:
+            raise ValueError("O modelo ainda não foi treinado.")
+        base = self.base_estimator if self.base_estimator is not None else CART()
+        metadata = {
+            'estimator': type(self).__name__,
+            'params': serialization.estimator_params(self),
+            'base_estimator': {'estimator': type(base).__name__, 'params': serialization.estimator_params(base)},
+        }
+        if hasattr(self, 'oob_score_'):
+            metadata['oob_score_'] = float(self.oob_score_)
+        serialization.write_trees(path, [estimator.compiled_ for estimator in self.estimators_], metadata)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False):
+        """
+        Carrega um ensemble gravado por `save`.
+
+        Args:
+            path: Caminho do arquivo.
+            mmap: Se True, os arrays das árvores são mapeados do arquivo em vez
+                de lidos (ver `serialization.read_trees`).
+        """
+        header, trees = serialization.read_trees(path, mmap)
+        if header.get('estimator') != cls.__name__:
+            raise ValueError(f"O arquivo contém um {header.get('estimator')}, não um {cls.__name__}.")
+        base_class = {'CART': CART, 'C45': C45}[header['base_estimator']['estimator']]
+        base_params = header['base_estimator']['params']
+        params = {name: value for name, value in header['params'].items() if name != 'base_estimator'}
+        model = cls(base_estimator=base_class(**base_params), **params)
+        model.estimators_ = []
+        for tree in trees:
+            estimator = base_class(**base_params)
+            estimator.compiled_ = tree
+            estimator.bin_edges_ = tree.bin_edges
+            model.estimators_.append(estimator)
+        model.classes_ = trees[0].classes
+        model.feature_names_ = trees[0].feature_names
+        if 'oob_score_' in header:
+            model.oob_score_ = header['oob_score_']
+        return model
+
+
+class RandomForest(Bagging):
+    """
+    Floresta aleatória: bagging com sorteio de atributos a cada divisão
+    (`max_features`, 'sqrt' por padrão) sobre CART ou C4.5.
+    """
+    def __init__(self, base_estimator=None, n_estimators=100, max_features='sqrt', max_samples=1.0,
+                 bootstrap=True, oob_score=False, n_jobs=None, random_state=None):
+        super().__init__(base_estimator, n_estimators, max_samples, bootstrap, oob_score, n_jobs, random_state)
+        self.max_features = max_features
+
+    def _make_estimator(self, seed: int):
+        estimator = super()._make_estimator(seed)
+        estimator.max_features = self.max_features
+        return estimator
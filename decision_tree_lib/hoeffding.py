@@ -0,0 +1,326 @@
+from __future__ import annotations
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+import numpy as np
+from . import binning
+from . import utils
+from .tree import CompiledTree, TreeBuilder
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class HoeffdingTree:
+    """
+    Árvore de Hoeffding (VFDT) para treinamento em fluxo / fora da memória.
+
+    Os dados nunca são guardados: cada folha mantém apenas estatísticas
+    suficientes (contagens por classe e, por atributo, contagens por
+    (bin ou categoria, classe)). Uma folha é dividida quando o limite de
+    Hoeffding garante, com confiança 1 - delta, que o melhor atributo supera
+    o segundo. Assim, a memória depende do tamanho da árvore, não dos dados.
+
+    - Atributos contínuos: histogramas com bins de quantis aprendidos no
+      primeiro lote; a divisão é binária (`x <= limiar`).
+    - Atributos categóricos: divisão multi-ramos, como no ID3; categorias
+      novas ganham um ramo (uma folha nova) quando aparecem.
+    - Critério: 'entropy' (Ganho de Informação) ou 'gini', de `utils`.
+    """
+    def __init__(self, criterion='entropy', grace_period=200, delta=1e-7, tie_threshold=0.05,
+                 n_bins=32, max_depth=None):
+        """
+        Args:
+            criterion: 'entropy' ou 'gini'.
+            grace_period: Número de exemplos que uma folha recebe entre duas
+                tentativas de divisão (também é o tamanho dos minilotes).
+            delta: 1 - confiança do limite de Hoeffding.
+            tie_threshold: Abaixo deste limite, empates são desfeitos dividindo.
+            n_bins: Número máximo de bins dos atributos contínuos.
+            max_depth: Profundidade máxima da árvore (None = ilimitada).
+        """
+        if criterion not in ('entropy', 'gini'):
+            raise ValueError(f"criterion inválido: {criterion!r}")
+        if not 2 <= n_bins <= 255:
+            raise ValueError("n_bins deve estar entre 2 e 255")
+        self.criterion = criterion
+        self.grace_period = grace_period
+        self.delta = delta
+        self.tie_threshold = tie_threshold
+        self.n_bins = n_bins
+        self.max_depth = max_depth
+        self._reset()
+
+    def _reset(self):
+        self.feature_names_ = None
+        self.classes_ = []
+        self.n_samples_seen_ = 0
+        self._compiled = None
+
+    # --- API PÚBLICA ---
+    def fit(self, chunks, target: str = None):
+        """
+        Treina a árvore do zero consumindo um fluxo de lotes.
+
+        Args:
+            chunks: Iterável de DataFrames (ex.: `pd.read_csv(..., chunksize=...)`)
+                contendo a coluna `target`, ou de tuplas (X, y). Um único
+                DataFrame também é aceito.
+            target: Nome da coluna alvo, quando os lotes são DataFrames.
+        """
+        import pandas as pd
+        self._reset()
+        if isinstance(chunks, pd.DataFrame):
+            chunks = [chunks]
+        for chunk in chunks:
+            if isinstance(chunk, tuple):
+                X, y = chunk
+            else:
+                X, y = chunk.drop(columns=[target]), chunk[target]
+            self.partial_fit(X, y)
+        return self
+
+    def partial_fit(self, X: pd.DataFrame, y: pd.Series):
+        """Continua o treinamento com um novo lote, sem rever os anteriores."""
+        if self.feature_names_ is None:
+            self._init_schema(X)
+        encoded = self._encode(X)
+        labels = self._encode_labels(y)
+        for start in range(0, len(labels), self.grace_period):
+            stop = start + self.grace_period
+            self._learn_batch(encoded[start:stop], labels[start:stop])
+        self.n_samples_seen_ += len(labels)
+        self._compiled = None
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """Prediz em lote pela forma compilada da árvore atual."""
+        return self.compiled_.predict(X)
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        """Probabilidades por classe (colunas na ordem de `classes_`), das contagens de cada nó."""
+        return self.compiled_.predict_proba(X)
+
+    @property
+    def compiled_(self) -> CompiledTree:
+        """Árvore compilada, regerada apenas quando a árvore cresce."""
+        if self._compiled is None:
+            self._compiled = self._compile()
+        return self._compiled
+
+    @property
+    def tree_(self):
+        """Representação em dicionários aninhados, para exibição."""
+        return self.compiled_.to_dict()
+
+    @property
+    def n_leaves(self) -> int:
+        return sum(1 for feature in self._feature if feature < 0)
+
+    # --- CODIFICAÇÃO ---
+    def _init_schema(self, X: pd.DataFrame):
+        """Define o esquema a partir do primeiro lote: tipos, bins e nó raiz."""
+        import pandas as pd
+        self.feature_names_ = X.columns.tolist()
+        self._is_categorical = np.array([not pd.api.types.is_numeric_dtype(X[c]) for c in self.feature_names_])
+        self._vocabularies = [[] if cat else None for cat in self._is_categorical]
+        self._bin_edges = [None if cat else binning.find_bin_edges(X[c].to_numpy(dtype=np.float64), self.n_bins)
+                           for c, cat in zip(self.feature_names_, self._is_categorical)]
+        # Estrutura da árvore em listas paralelas (um índice por nó)
+        self._feature = []
+        self._split_bin = []
+        self._left = []
+        self._right = []
+        self._branches = []
+        self._depth = []
+        self._class_counts = []
+        self._leaf_stats = []
+        self._seen_since_eval = []
+        self._add_leaf(depth=0, class_counts=np.zeros(len(self.classes_)))
+
+    def _n_slots(self, feature: int) -> int:
+        """Número de linhas das estatísticas de um atributo (bins ou categorias)."""
+        if self._is_categorical[feature]:
+            return len(self._vocabularies[feature])
+        return self.n_bins + 1 # O último bin é dos valores ausentes
+
+    def _encode(self, X: pd.DataFrame) -> np.ndarray:
+        """Códigos de bin/categoria de cada coluna; o vocabulário cresce com o fluxo."""
+        encoded = np.empty((len(X), len(self.feature_names_)), dtype=np.intp)
+        for j, column in enumerate(self.feature_names_):
+            if self._is_categorical[j]:
+                encoded[:, j] = self._grow_vocabulary(self._vocabularies[j], X[column])
+            else:
+                encoded[:, j] = binning.bin_values(X[column].to_numpy(dtype=np.float64),
+                                                   self._bin_edges[j], self.n_bins)
+        return encoded
+
+    @staticmethod
+    def _grow_vocabulary(vocabulary: list, values: pd.Series) -> np.ndarray:
+        import pandas as pd
+        codes = pd.Index(vocabulary, dtype=object).get_indexer(values)
+        unseen = pd.unique(values[(codes < 0) & values.notna().to_numpy()])
+        if len(unseen):
+            vocabulary.extend(unseen)
+            codes = pd.Index(vocabulary, dtype=object).get_indexer(values)
+        return codes
+
+    def _encode_labels(self, y: pd.Series) -> np.ndarray:
+        n_classes = len(self.classes_)
+        codes = self._grow_vocabulary(self.classes_, y)
+        if len(self.classes_) > n_classes:
+            self._grow_classes(len(self.classes_) - n_classes)
+        return codes
+
+    def _grow_classes(self, n_new: int):
+        """Acrescenta colunas de contagem para classes vistas pela primeira vez."""
+        self._class_counts = [np.pad(c, (0, n_new)) for c in self._class_counts]
+        self._leaf_stats = [None if stats is None else [np.pad(s, ((0, 0), (0, n_new))) for s in stats]
+                            for stats in self._leaf_stats]
+
+    # --- CRESCIMENTO ---
+    def _add_leaf(self, depth: int, class_counts: np.ndarray) -> int:
+        self._feature.append(-1)
+        self._split_bin.append(-1)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._branches.append(None)
+        self._depth.append(depth)
+        self._class_counts.append(np.asarray(class_counts, dtype=np.float64).copy())
+        n_classes = len(self.classes_)
+        self._leaf_stats.append([np.zeros((self._n_slots(f), n_classes))
+                                 for f in range(len(self.feature_names_))])
+        self._seen_since_eval.append(0)
+        return len(self._feature) - 1
+
+    def _route(self, encoded: np.ndarray) -> np.ndarray:
+        """Leva cada exemplo do minilote até a sua folha."""
+        node_of = np.zeros(len(encoded), dtype=np.intp)
+        frontier = [(0, np.arange(len(encoded)))]
+        while frontier:
+            node, rows = frontier.pop()
+            feature = self._feature[node]
+            if feature < 0:
+                node_of[rows] = node
+                continue
+            codes = encoded[rows, feature]
+            if self._branches[node] is None:
+                goes_left = codes <= self._split_bin[node]
+                frontier.append((self._left[node], rows[goes_left]))
+                frontier.append((self._right[node], rows[~goes_left]))
+                continue
+            for code in np.unique(codes):
+                if code < 0:
+                    node_of[rows[codes == code]] = node # Valor ausente: o exemplo para no nó
+                    continue
+                if code not in self._branches[node]:
+                    # Categoria nova: ganha um ramo com uma folha vazia
+                    self._branches[node][code] = self._add_leaf(self._depth[node] + 1, np.zeros(len(self.classes_)))
+                frontier.append((self._branches[node][code], rows[codes == code]))
+        return node_of
+
+    def _learn_batch(self, encoded: np.ndarray, labels: np.ndarray):
+        n_classes = len(self.classes_)
+        node_of = self._route(encoded)
+        for node in np.unique(node_of):
+            rows = node_of == node
+            node_labels = labels[rows]
+            self._class_counts[node] += np.bincount(node_labels, minlength=n_classes)
+            if self._feature[node] >= 0:
+                continue
+            stats = self._leaf_stats[node]
+            for feature in range(len(self.feature_names_)):
+                n_slots = self._n_slots(feature)
+                if stats[feature].shape[0] < n_slots:
+                    stats[feature] = np.pad(stats[feature], ((0, n_slots - stats[feature].shape[0]), (0, 0)))
+                codes = encoded[rows, feature]
+                known = codes >= 0
+                stats[feature] += np.bincount(codes[known] * n_classes + node_labels[known],
+                                              minlength=n_slots * n_classes).reshape(n_slots, n_classes)
+            self._seen_since_eval[node] += len(node_labels)
+            if self._seen_since_eval[node] >= self.grace_period:
+                self._attempt_split(node)
+
+    def _hoeffding_bound(self, n_samples: float) -> float:
+        """epsilon = sqrt(R² ln(1/delta) / 2n), com R o alcance do critério."""
+        n_classes = max(len(self.classes_), 2)
+        value_range = np.log2(n_classes) if self.criterion == 'entropy' else 1.0
+        return np.sqrt(value_range ** 2 * np.log(1 / self.delta) / (2 * n_samples))
+
+    def _attempt_split(self, node: int):
+        self._seen_since_eval[node] = 0
+        counts = self._class_counts[node]
+        if np.count_nonzero(counts) < 2:
+            return
+        if self.max_depth is not None and self._depth[node] >= self.max_depth:
+            return
+
+        impurity = utils.entropy_from_counts if self.criterion == 'entropy' else utils.gini_from_counts
+        stats = self._leaf_stats[node]
+        gains = np.full(len(self.feature_names_), -1.0)
+        split_bins = np.full(len(self.feature_names_), -1)
+        for feature, feature_stats in enumerate(stats):
+            if self._is_categorical[feature]:
+                branch_sizes = feature_stats.sum(axis=1)
+                total = branch_sizes.sum()
+                if np.count_nonzero(branch_sizes) < 2:
+                    continue
+                gains[feature] = impurity(feature_stats.sum(axis=0)) - np.sum(
+                    branch_sizes / total * impurity(feature_stats))
+            else:
+                best_bins, best_gains, _, _ = utils.best_histogram_splits(feature_stats[None], self.criterion)
+                gains[feature], split_bins[feature] = best_gains[0], best_bins[0]
+
+        order = np.argsort(-gains, kind='stable')
+        best = order[0]
+        second_gain = max(gains[order[1]], 0.0) if len(order) > 1 else 0.0
+        if gains[best] <= 0:
+            return
+        epsilon = self._hoeffding_bound(counts.sum())
+        if gains[best] - second_gain > epsilon or epsilon < self.tie_threshold:
+            self._split(node, best, split_bins[best])
+
+    def _split(self, node: int, feature: int, split_bin: int):
+        """Transforma a folha em nó interno; os filhos herdam as contagens da divisão."""
+        feature_stats = self._leaf_stats[node][feature]
+        depth = self._depth[node] + 1
+        self._feature[node] = feature
+        self._leaf_stats[node] = None
+        if self._is_categorical[feature]:
+            self._branches[node] = {code: self._add_leaf(depth, feature_stats[code])
+                                    for code in np.flatnonzero(feature_stats.sum(axis=1) > 0)}
+        else:
+            self._split_bin[node] = split_bin
+            left_counts = feature_stats[:split_bin + 1].sum(axis=0)
+            self._left[node] = self._add_leaf(depth, left_counts)
+            self._right[node] = self._add_leaf(depth, feature_stats.sum(axis=0) - left_counts)
+
+    # --- FORMA COMPILADA ---
+    def _compile(self) -> CompiledTree:
+        """Compila a árvore; os nós são criados na ordem de chegada e o `TreeBuilder` os renumera em pré-ordem."""
+        categories = [np.asarray(v, dtype=object) if v is not None else None for v in self._vocabularies]
+        schema = SimpleNamespace(feature_names=self.feature_names_, is_categorical=self._is_categorical,
+                                 categories=categories, classes=np.asarray(self.classes_), bin_edges=None)
+        builder = TreeBuilder(schema)
+        for node, (feature, counts) in enumerate(zip(self._feature, self._class_counts)):
+            value = np.argmax(counts) if len(counts) else 0
+            if feature < 0:
+                builder.add_leaf(value, counts)
+            elif self._branches[node] is None:
+                edges = self._bin_edges[feature]
+                # Divisão após o último bin: todos os valores presentes vão para a esquerda
+                split_bin = self._split_bin[node]
+                builder.add_threshold_split(feature, edges[split_bin] if split_bin < len(edges) else np.inf,
+                                            value, counts)
+            else:
+                builder.add_category_split(feature, list(self._branches[node]), value, counts)
+        # Os filhos são sempre criados depois do pai, então os índices do builder são os mesmos
+        for node, feature in enumerate(self._feature):
+            if feature < 0:
+                continue
+            if self._branches[node] is None:
+                builder.attach(node, 0, self._left[node])
+                builder.attach(node, 1, self._right[node])
+            else:
+                for code, child in self._branches[node].items():
+                    builder.attach(node, code, child)
+        return builder.build()
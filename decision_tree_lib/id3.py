@@ -1,69 +1,171 @@
 # decision_tree_lib/id3.py (VERSÃO FINAL)
+from __future__ import annotations
 
-import pandas as pd
-from . import utils
-from collections import Counter
+from typing import TYPE_CHECKING
+import numpy as np
+from . import incremental, pruning, utils
+from .core import FeaturePool, TrainingData, grow_tree
+from .instrumentation import collect_stats
+from .tree import CompiledClassifierMixin, TreeBuilder
 
-class ID3:
-    def __init__(self):
-        self.tree_ = None
+if TYPE_CHECKING:
+    import pandas as pd
+
+class ID3(CompiledClassifierMixin):
+    """
+    Uma implementação do zero do algoritmo ID3 (Ganho de Informação, um ramo por categoria).
+
+    Com `max_bins`, as colunas numéricas são discretizadas em bins de quantis
+    (`bin_edges_`), dispensando `preprocessing.discretize_for_id3`.
+    Pré-poda: `max_depth`, `min_samples_leaf`, `min_gain` e `max_leaf_nodes`;
+    pós-poda: `confidence` e `ccp_alpha` (ver `pruning`).
+    `instrument` registra estatísticas do treino em `fit_stats_` (ver `instrumentation`).
+    `incremental=True` habilita `update(X_new, y_new)` (ver `incremental`).
+    """
+    def __init__(self, max_depth=None, min_samples_leaf=1, min_gain=None, max_leaf_nodes=None, max_bins=None,
+                 n_jobs=None, confidence=None, ccp_alpha=0.0, instrument=None, incremental=False):
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.min_gain = min_gain
+        self.max_leaf_nodes = max_leaf_nodes
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.confidence = confidence
+        self.ccp_alpha = ccp_alpha
+        self.instrument = instrument
+        self.incremental = incremental
+        self.compiled_ = None
+        self.bin_edges_ = None
+        self.fit_stats_ = None
 
     def fit(self, X: pd.DataFrame, y: pd.Series):
-        data = X.copy()
-        data[y.name] = y
-        self.tree_ = self._build_tree(data, data, X.columns.tolist(), y.name)
-
-    def _build_tree(self, data: pd.DataFrame, original_data: pd.DataFrame, feature_names: list, target_name: str):
-        if len(data[target_name].unique()) == 1:
-            return data[target_name].unique()[0]
-        if len(feature_names) == 0 or len(data) == 0:
-            return original_data[target_name].mode()[0]
-        
-        gains = [utils.calculate_information_gain(data, feature, target_name) for feature in feature_names]
-        best_feature = feature_names[gains.index(max(gains))]
-        
-        tree = {best_feature: {}}
-        remaining_features = [f for f in feature_names if f != best_feature]
-        
-        for value in data[best_feature].unique():
-            subset = data[data[best_feature] == value]
-            subtree = self._build_tree(subset, data, remaining_features, target_name)
-            tree[best_feature][value] = subtree
-            
-        return tree
-
-    def predict(self, X: pd.DataFrame) -> list:
-        rows = X.to_dict(orient='records')
-        return [self._predict_single(row, self.tree_) for row in rows]
-
-    def _get_all_leaves(self, tree_node):
-        """Coleta todos os valores de folhas (predições) em uma sub-árvore."""
-        if not isinstance(tree_node, dict):
-            return [tree_node]
-        
-        leaves = []
-        for branch in tree_node.values():
-            leaves.extend(self._get_all_leaves(branch))
-        return leaves
-
-    def _get_majority_leaf(self, tree_node):
-        """Retorna a folha mais comum (moda) de uma sub-árvore."""
-        leaves = self._get_all_leaves(tree_node)
-        if not leaves:
-            return 0 # Fallback final, caso a árvore esteja vazia
-        return Counter(leaves).most_common(1)[0][0]
-
-    def _predict_single(self, row: dict, tree: dict):
-        """Classifica uma única instância com o novo fallback."""
-        if not isinstance(tree, dict):
-            return tree
-
-        attribute = next(iter(tree))
-        value = row.get(attribute) # Usar .get() para evitar KeyError se a coluna não existir
-
-        if value is None or value not in tree[attribute]:
-            # Se o valor não for encontrado, retorna a classe majoritária da sub-árvore atual
-            return self._get_majority_leaf(tree[attribute])
-
-        next_node = tree[attribute][value]
-        return self._predict_single(row, next_node)
\ No newline at end of file
+        # Todos os atributos são tratados como categóricos no ID3
+        data = TrainingData(X, y, categorical='all', max_bins=self.max_bins)
+        if self.incremental:
+            return incremental.fit(self, data)
+        return self._fit_data(data)
+
+    def _fit_data(self, data: TrainingData):
+        """Treina a partir de dados já codificados."""
+        self._data = data
+        self.bin_edges_ = self._data.bin_edges
+        self._builder = TreeBuilder(self._data)
+        n_samples = self._data.n_samples
+        root = {'start': 0, 'end': n_samples, 'depth': 0, 'features': list(range(len(data.feature_names))),
+                'parent_counts': self._data.class_counts(0, n_samples), 'parent': None, 'side': None}
+        with FeaturePool(self.n_jobs) as self._pool, collect_stats(self, '_information_gain') as self.fit_stats_:
+            grow_tree(self._expand, root, self._evaluate_node, self.max_leaf_nodes)
+            tree = self._builder.build()
+        self.compiled_ = self._prune(tree)
+        del self._data, self._builder, self._pool
+        return self
+
+    def _information_gain(self, feature: int, start: int, end: int, parent_entropy: float) -> float:
+        """
+        Ganho de informação da divisão multi-ramos do nó [start, end) pelo
+        atributo (-inf se algum ramo tiver menos de `min_samples_leaf` exemplos).
+        Com valores ausentes, o ganho é o dos exemplos conhecidos ponderado
+        pela fração deles no nó, como no C4.5.
+        """
+        _, counts = self._data.category_counts(feature, start, end)
+        branch_sizes = counts.sum(axis=1)
+        if len(branch_sizes) == 0 or branch_sizes.min() < self.min_samples_leaf:
+            return -np.inf
+        n_known = branch_sizes.sum()
+        if n_known < end - start:
+            return n_known / (end - start) * utils.partition_gain(counts, 'entropy')
+        return utils.partition_gain(counts, 'entropy', parent_entropy)
+
+    def _evaluate_node(self, entry: dict) -> float:
+        """
+        Verifica os critérios de parada do nó e escolhe o atributo de maior
+        ganho, guardado em entry['split'] (None quando o nó deve ser uma folha).
+
+        Returns:
+            O ganho de informação da divisão (-inf sem divisão), que é a
+            prioridade do nó no crescimento melhor-primeiro.
+        """
+        start, end, feature_names = entry['start'], entry['end'], entry['features']
+        counts = entry['counts'] = self._data.class_counts(start, end)
+        entry['split'] = None
+        entry['leaf_value'] = np.argmax(counts)
+        if np.count_nonzero(counts) == 1:
+            return -np.inf
+        if len(feature_names) == 0 or end == start:
+            # Atributos esgotados: a folha recebe a classe majoritária do pai
+            entry['leaf_value'] = np.argmax(entry['parent_counts'])
+            return -np.inf
+        if ((self.max_depth is not None and entry['depth'] >= self.max_depth) or
+                end - start < 2 * self.min_samples_leaf):
+            return -np.inf
+
+        parent_entropy = utils.entropy_from_counts(counts)
+        gains = self._pool.map(lambda feature: self._information_gain(feature, start, end, parent_entropy),
+                               feature_names, end - start)
+        max_gain = max(gains)
+        if max_gain == -np.inf or (self.min_gain is not None and max_gain < self.min_gain):
+            return -np.inf
+        entry['split'] = feature_names[gains.index(max_gain)]
+        return max_gain
+
+    def _expand(self, entry: dict, max_children: int = None) -> list:
+        """
+        Cria o nó da entrada na árvore (folha ou divisão multi-ramos) e devolve
+        as entradas dos filhos. Chamado por `grow_tree` uma vez por nó.
+
+        Args:
+            entry: O nó pendente (intervalo, profundidade, atributos, pai).
+            max_children: Número máximo de ramos que o orçamento de folhas
+                permite (None sem limite); acima dele, o nó vira folha.
+        """
+        if 'split' not in entry:
+            self._evaluate_node(entry)
+        data, builder = self._data, self._builder
+        start, end, counts = entry['start'], entry['end'], entry['counts']
+        best_feature = entry['split']
+
+        children = None
+        if best_feature is not None:
+            # Os exemplos com valor ausente seguem o ramo mais populoso
+            missing_code = None
+            if data.has_missing[best_feature]:
+                codes, category_counts = data.category_counts(best_feature, start, end)
+                if category_counts.sum() < end - start:
+                    missing_code = codes[np.argmax(category_counts.sum(axis=1))]
+            children = data.partition_by_category(best_feature, start, end, missing_code)
+            if max_children is not None and len(children) > max_children:
+                children = None
+
+        if children is None:
+            node = builder.add_leaf(entry['leaf_value'], counts)
+        else:
+            node = builder.add_category_split(best_feature, [code for code, _, _ in children], np.argmax(counts),
+                                              counts, missing_code)
+        if entry['parent'] is not None:
+            builder.attach(entry['parent'], entry['side'], node)
+        if children is None:
+            return []
+
+        remaining_features = [f for f in entry['features'] if f != best_feature]
+        return [{'start': child_start, 'end': child_end, 'depth': entry['depth'] + 1,
+                 'features': remaining_features, 'parent_counts': counts, 'parent': node, 'side': code}
+                for code, child_start, child_end in children]
+
+    def _prune(self, tree):
+        if self.confidence is not None:
+            tree = pruning.pessimistic_prune(tree, self.confidence)
+        return pruning.cost_complexity_prune(tree, self.ccp_alpha, 'entropy')
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.compiled_.predict(X)
+
+    def cost_complexity_pruning_path(self) -> dict:
+        """
+        Caminho da poda por custo-complexidade da árvore treinada, calculado
+        a partir das contagens guardadas nos nós (sem reler os dados).
+
+        Returns:
+            Dicionário com `ccp_alphas` e `impurities` (entropia); qualquer
+            alpha do caminho pode ser usado como `ccp_alpha` em um novo treino.
+        """
+        return pruning.cost_complexity_path(self.compiled_, 'entropy')
@@ -0,0 +1,182 @@
+"""
+Retreino incremental das árvores de classificação (`update` de ID3, C45 e CART).
+
+Com `incremental=True`, o `fit` guarda os dados codificados e, para cada nó
+da árvore crescida (antes da poda), as suas estatísticas suficientes: as
+contagens por classe, a divisão escolhida com o seu ganho e, no modo
+histograma, o histograma (bin, classe) de cada atributo contínuo.
+
+`update(X_new, y_new)` acrescenta as linhas novas aos dados e cresce a árvore
+de novo, mas percorrendo a antiga: um nó que não recebeu nenhuma linha nova
+tem exatamente os mesmos dados de antes e é refeito a partir do registro, sem
+avaliar atributo algum; um nó que recebeu linhas novas é reavaliado, com o
+histograma guardado somado ao das linhas novas (só elas são lidas); se a
+divisão dele continua a mesma, os filhos seguem o mesmo caminho, e se mudou,
+a sub-árvore é crescida do zero. O resultado é a árvore que um `fit` nas
+linhas antigas e novas daria com a mesma codificação (os bins e a ordem das
+categorias do primeiro treino; categorias novas entram no fim). O sorteio de
+atributos de `max_features` não é repetido nos nós reaproveitados, então
+com ele a árvore pode diferir de um novo `fit`.
+
+O quanto da árvore foi reaproveitado fica em `update_stats_`.
+"""
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+import numpy as np
+from .core import TrainingData
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Chaves que o `_evaluate_node` dos algoritmos preenche em cada entrada
+_RESULT_KEYS = ('counts', 'split', 'leaf_value')
+# Entradas que a avaliação lê além das linhas do nó (o ID3 usa as contagens do pai nas folhas esgotadas)
+_INPUT_KEYS = ('parent_counts',)
+
+
+def _uses_histograms(learner, entry: dict) -> bool:
+    return 'histogram' in entry and learner.max_bins is not None
+
+
+@contextmanager
+def _track(learner, previous: list, n_old: int):
+    """
+    Envolve, apenas na instância em treino, `_evaluate_node` e `_expand` (como
+    a instrumentação) para reaproveitar os registros `previous` da árvore
+    anterior e registrar os nós da nova.
+
+    Args:
+        learner: ID3, C45 ou CART.
+        previous: Registros dos nós da árvore anterior (vazio no primeiro treino).
+        n_old: Número de linhas da árvore anterior; as linhas novas são as de
+            índice >= n_old.
+
+    Yields:
+        (registros dos nós da nova árvore, contadores de reaproveitamento).
+    """
+    records = []
+    counters = {'reused': 0, 'reevaluated': 0, 'changed': 0, 'grown': 0}
+    evaluate, expand = learner._evaluate_node, learner._expand
+
+    def evaluate_node(entry: dict) -> float:
+        old = entry['previous'] if 'previous' in entry else (0 if previous else None)
+        entry['previous'] = old
+        if old is None:
+            counters['grown'] += 1
+            entry['gain'] = evaluate(entry)
+            return entry['gain']
+
+        record = previous[old]
+        rows = learner._data.samples[entry['start']:entry['end']]
+        new_rows = rows[rows >= n_old]
+        if len(new_rows) == 0 and all(np.array_equal(entry[key], record['inputs'][key])
+                                      for key in _INPUT_KEYS if key in entry):
+            # Mesmas linhas de antes: a avaliação guardada vale como está
+            counters['reused'] += 1
+            entry.update(record['results'])
+            if _uses_histograms(learner, entry):
+                entry['histogram'] = record['histogram']
+            entry['gain'] = record['gain']
+            return entry['gain']
+
+        if _uses_histograms(learner, entry) and entry['histogram'] is None:
+            entry['histogram'] = record['histogram'] + learner._data.with_samples(new_rows).histogram(0, len(new_rows))
+        entry['gain'] = evaluate(entry)
+        same = entry['split'] == record['results']['split']
+        counters['reevaluated' if same else 'changed'] += 1
+        if not same:
+            entry['previous'] = None
+        return entry['gain']
+
+    def expand_node(entry: dict, max_children: int = None) -> list:
+        if 'split' not in entry:
+            learner._evaluate_node(entry)
+        old = entry['previous']
+        histogram = entry.get('histogram')
+        if old is not None and histogram is not None:
+            # Os filhos que seguem a árvore anterior montam o histograma a partir dos registros
+            entry['histogram'] = None
+        children = expand(entry, max_children)
+
+        node = len(learner._builder.feature) - 1
+        records.append({'results': {key: entry[key] for key in _RESULT_KEYS if key in entry},
+                        'inputs': {key: entry[key] for key in _INPUT_KEYS if key in entry},
+                        'gain': entry['gain'], 'children': {},
+                        'histogram': None if histogram is None else histogram.astype(np.int32, copy=False)})
+        if entry['parent'] is not None:
+            records[entry['parent']]['children'][entry['side']] = node
+        for child in children:
+            child['previous'] = None if old is None else previous[old]['children'].get(child['side'])
+            if child['previous'] is None and _uses_histograms(learner, child) and child['histogram'] is None:
+                child['histogram'] = learner._data.histogram(child['start'], child['end'])
+        return children
+
+    learner._evaluate_node, learner._expand = evaluate_node, expand_node
+    try:
+        yield records, counters
+    finally:
+        vars(learner).pop('_evaluate_node', None)
+        vars(learner).pop('_expand', None)
+
+
+def _grow(learner, data: TrainingData, previous: list, n_old: int, root_histogram: np.ndarray = None) -> dict:
+    """Treina `learner` em `data` reaproveitando `previous` e guarda o novo estado incremental."""
+    with _track(learner, previous, n_old) as (records, counters):
+        if root_histogram is not None:
+            learner._fit_data(data, root_histogram)
+        else:
+            learner._fit_data(data)
+    learner._incremental = {'data': data.with_samples(np.arange(data.n_samples)), 'records': records}
+    return counters
+
+
+def fit(learner, data: TrainingData):
+    """`fit` de um algoritmo com `incremental=True`: treina e guarda o estado do `update`."""
+    _grow(learner, data, [], 0)
+    return learner
+
+
+def update(learner, X_new: pd.DataFrame, y_new: pd.Series):
+    """
+    Atualiza uma árvore treinada com `incremental=True` com as linhas novas,
+    reaproveitando as sub-árvores que elas não mudam (ver o módulo).
+
+    Returns:
+        O próprio `learner`, com a árvore atualizada e as estatísticas em
+        `update_stats_`: número de linhas antigas e novas, de nós da árvore
+        crescida refeitos do registro (`reused`), reavaliados com a mesma
+        divisão (`reevaluated`), com a divisão trocada (`changed`) e crescidos
+        do zero (`grown`), as frações `reused_fraction` (nós sem nenhuma
+        avaliação) e `kept_fraction` (nós com a divisão mantida) e o tempo.
+    """
+    state = getattr(learner, '_incremental', None)
+    if state is None:
+        raise ValueError("update requer um modelo treinado com incremental=True "
+                         "(modelos carregados de `save` não guardam o estado incremental)")
+    started = time.perf_counter()
+    old = state['data']
+    n_old = old.n_samples
+    data = old.append(X_new, y_new)
+
+    previous, root_histogram = state['records'], None
+    if old.n_classes != data.n_classes:
+        # Classes novas mudam as colunas de todas as contagens: cresce do zero
+        previous = []
+    elif previous and previous[0]['histogram'] is not None:
+        new_rows = np.arange(n_old, data.n_samples)
+        root_histogram = previous[0]['histogram'] + data.with_samples(new_rows).histogram(0, len(new_rows))
+    counters = _grow(learner, data, previous, n_old, root_histogram)
+
+    n_nodes = len(learner._incremental['records'])
+    learner.update_stats_ = {
+        'n_old_samples': n_old,
+        'n_new_samples': data.n_samples - n_old,
+        'n_nodes': n_nodes,
+        **counters,
+        'reused_fraction': counters['reused'] / n_nodes,
+        'kept_fraction': (counters['reused'] + counters['reevaluated']) / n_nodes,
+        'time': time.perf_counter() - started,
+    }
+    return learner
@@ -0,0 +1,246 @@
+"""
+Instrumentação do treino de ID3, C45, CART e CARTRegressor (`instrument`).
+
+O parâmetro `instrument` aceita True (um `FitStats` novo a cada `fit`), uma
+função de callback (chamada com o registro de cada nó concluído) ou um
+`FitStats` já configurado. O treino registra tempos por nó, candidatos
+avaliados e linhas lidas por atributo e tempo por função de critério, e o
+`FitStats` fica em `fit_stats_`. Desativado (padrão), não há custo algum.
+"""
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+import numpy as np
+
+
+class FitStats:
+    """
+    Coleta estatísticas de construção da árvore (ativada por `instrument`).
+
+    A instrumentação é feita envolvendo, apenas na instância em treino, os
+    métodos de criação do nó (`_expand`), de busca da divisão
+    (`_evaluate_node`) e de avaliação de cada atributo. Com a instrumentação
+    desativada nada é envolvido, então o caminho quente não muda.
+
+    Depois do `fit`, o objeto fica em `fit_stats_` e oferece:
+    - `nodes`: um registro por nó (profundidade, linhas, tempos, atributo);
+    - `summary()`: relatório agregado por atributo e por função de critério;
+    - `folded()` / `write_folded(path)`: pilhas no formato "folded" aceito por
+      ferramentas de flame graph (flamegraph.pl, speedscope, inferno).
+    """
+    def __init__(self, callback=None, track_memory=False):
+        """
+        Args:
+            callback: Função chamada com o registro (dict) de cada nó concluído.
+            track_memory: Se True, mede com tracemalloc os bytes alocados na
+                busca de divisão de cada nó e o pico do treino (mais lento).
+        """
+        self.callback = callback
+        self.track_memory = track_memory
+
+    # --- COLETA ---
+    def _begin_fit(self, learner):
+        self.learner = type(learner).__name__
+        self.nodes = []
+        self.features = defaultdict(lambda: {'evaluations': 0, 'candidates': 0, 'rows_scanned': 0, 'time': 0.0})
+        self.criteria = defaultdict(lambda: {'calls': 0, 'time': 0.0})
+        self.stacks = defaultdict(float)
+        self._frames = []
+        self._lock = threading.Lock()
+        self._started_tracing = self.track_memory and not tracemalloc.is_tracing()
+        self._peak_bytes = 0
+        if self._started_tracing:
+            tracemalloc.start()
+        self._push(f'{self.learner}.fit')
+
+    def _end_fit(self, learner):
+        self.total_time = self._pop()
+        self.n_samples = learner._data.n_samples
+        self.n_features = len(learner._data.feature_names)
+        self.peak_bytes = max(self._peak_bytes, tracemalloc.get_traced_memory()[1]) if self.track_memory else None
+        if self._started_tracing:
+            tracemalloc.stop()
+        # Os nós são numerados na ordem de criação; a árvore final está em pré-ordem
+        node_order = learner._builder.node_order
+        if node_order is not None:
+            for record in self.nodes:
+                record['node'] = int(node_order[record['node']])
+        self.nodes.sort(key=lambda record: record['node'])
+        # Apenas tipos simples ficam no objeto, para que o estimador treinado seja serializável
+        self.features = {name: dict(stats) for name, stats in self.features.items()}
+        self.criteria = {kind: dict(stats) for kind, stats in self.criteria.items()}
+        self.stacks = dict(self.stacks)
+        del self._frames, self._lock, self._peak_bytes
+
+    def _push(self, name: str):
+        self._frames.append([name, time.perf_counter(), 0.0])
+
+    def _pop(self) -> float:
+        """Fecha o quadro do topo, soma o seu tempo próprio à pilha e devolve o tempo total."""
+        path = ';'.join(frame[0] for frame in self._frames)
+        name, start, children_time = self._frames.pop()
+        elapsed = time.perf_counter() - start
+        self.stacks[path] += max(elapsed - children_time, 0.0)
+        if self._frames:
+            self._frames[-1][2] += elapsed
+        return elapsed
+
+    def _build_node(self, expand, learner, entry: dict, *args, **kwargs):
+        self._push('build_node')
+        children = expand(entry, *args, **kwargs)
+        elapsed = self._pop()
+        node = len(learner._builder.feature) - 1
+        feature = learner._builder.feature[node]
+        record = {
+            'node': node,
+            'depth': entry['depth'],
+            'n_rows': int(entry['end'] - entry['start']),
+            'time': elapsed,
+            'leaf': bool(feature < 0),
+            'feature': learner._data.feature_names[feature] if feature >= 0 else None,
+        }
+        # A busca de divisão deste nó (se houve) foi guardada na própria entrada
+        record.update(entry.get('search_stats', {}))
+        self.nodes.append(record)
+        if self.callback is not None:
+            self.callback(record)
+        return children
+
+    def _find_split(self, evaluate, learner, entry: dict, *args, **kwargs):
+        self._push('find_best_split')
+        if self.track_memory:
+            before, peak = tracemalloc.get_traced_memory()
+            # O pico é zerado a cada busca: o do treino até aqui é guardado antes
+            # (sem `reset_peak`, no Python 3.8, `search_bytes` conta o pico desde o início)
+            self._peak_bytes = max(self._peak_bytes, peak)
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+        result = evaluate(entry, *args, **kwargs)
+        search = {'search_time': self._pop()}
+        if self.track_memory:
+            search['search_bytes'] = tracemalloc.get_traced_memory()[1] - before
+        entry['search_stats'] = search
+        return result
+
+    def _evaluate(self, evaluate, learner, feature: int, start: int, end: int, *args):
+        kind, candidates, rows = _describe_evaluation(learner, feature, start, end, args)
+        began = time.perf_counter()
+        result = evaluate(feature, start, end, *args)
+        elapsed = time.perf_counter() - began
+        name = learner._data.feature_names[feature]
+        with self._lock:
+            stats = self.features[name]
+            stats['evaluations'] += 1
+            stats['candidates'] += candidates
+            stats['rows_scanned'] += rows
+            stats['time'] += elapsed
+            self.criteria[kind]['calls'] += 1
+            self.criteria[kind]['time'] += elapsed
+            # Os quadros do laço principal ficam parados enquanto os atributos são avaliados
+            path = ';'.join(frame[0] for frame in self._frames)
+            self.stacks[f'{path};{kind}:{name}'] += elapsed
+            self._frames[-1][2] += elapsed
+        return result
+
+    # --- RELATÓRIOS ---
+    def summary(self) -> dict:
+        """Relatório agregado do último treino."""
+        leaves = [record for record in self.nodes if record['leaf']]
+        return {
+            'learner': self.learner,
+            'n_samples': self.n_samples,
+            'n_features': self.n_features,
+            'total_time': self.total_time,
+            'n_nodes': len(self.nodes),
+            'n_leaves': len(leaves),
+            'max_depth': max((record['depth'] for record in self.nodes), default=0),
+            'rows_scanned': sum(stats['rows_scanned'] for stats in self.features.values()),
+            'candidates': sum(stats['candidates'] for stats in self.features.values()),
+            'peak_bytes': self.peak_bytes,
+            'criteria': {kind: dict(stats) for kind, stats in self.criteria.items()},
+            'features': {name: dict(stats) for name, stats in self.features.items()},
+        }
+
+    def folded(self) -> str:
+        """Pilhas no formato folded ("quadro;quadro;... microssegundos"), uma por linha."""
+        return '\n'.join(f'{path} {int(round(seconds * 1e6))}' for path, seconds in self.stacks.items()
+                         if seconds > 0)
+
+    def write_folded(self, path: str):
+        """Grava as pilhas em `path`, ex.: para `flamegraph.pl path > fit.svg`."""
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.folded() + '\n')
+
+
+def _describe_evaluation(learner, feature: int, start: int, end: int, args: tuple) -> tuple:
+    """
+    Classifica a avaliação de um atributo pela função de critério usada e
+    conta os candidatos testados e as linhas lidas.
+
+    Returns:
+        Uma tupla (tipo, candidatos, linhas_lidas).
+    """
+    data = learner._data
+    n_rows = int(end - start)
+    if data.is_categorical[feature]:
+        n_categories = len(np.unique(data.values(feature, start, end)))
+        if not hasattr(learner, '_category_split_mode'):
+            return 'entropy_multiway', 1, n_rows
+        mode = learner._category_split_mode(n_categories)
+        candidates = {'exact': 2 ** max(n_categories - 1, 0) - 1,
+                      'breiman': n_categories - 1,
+                      'greedy': n_categories * (n_categories - 1) // 2}[mode]
+        return f'category_subset_{mode}', max(int(candidates), 0), n_rows
+
+    histogram_splits = args[-1] if args else None
+    if histogram_splits is not None:
+        # No modo histograma, os candidatos são os bins ocupados e nenhuma linha é lida
+        codes = data.binned[data.samples[start:end], data.binned_position[feature]]
+        return 'histogram_lookup', max(len(np.unique(codes)) - 1, 0), 0
+    values = data.values(feature, start, end)
+    distinct = len(np.unique(values[~np.isnan(values)]))
+    return 'best_threshold_sweep', max(distinct - 1, 0), n_rows
+
+
+def _make_stats(instrument):
+    """Converte o parâmetro `instrument` dos algoritmos em um FitStats (ou None)."""
+    if instrument is None or instrument is False:
+        return None
+    if isinstance(instrument, FitStats):
+        return instrument
+    if callable(instrument):
+        return FitStats(callback=instrument)
+    return FitStats()
+
+
+@contextmanager
+def collect_stats(learner, evaluator: str):
+    """
+    Ativa a instrumentação do treino de `learner`, se pedida.
+
+    Args:
+        learner: ID3, C45 ou CART, já com `_data` e `_builder` definidos.
+        evaluator: Nome do método que avalia um atributo em um nó.
+
+    Yields:
+        O FitStats preenchido durante o bloco, ou None se desativado.
+    """
+    stats = _make_stats(getattr(learner, 'instrument', None))
+    if stats is None:
+        yield None
+        return
+
+    stats._begin_fit(learner)
+    wrapped = {'_expand': stats._build_node, '_evaluate_node': stats._find_split, evaluator: stats._evaluate}
+    for name, wrapper in wrapped.items():
+        original = getattr(learner, name)
+        setattr(learner, name, lambda *args, _wrapper=wrapper, _original=original, **kwargs:
+                _wrapper(_original, learner, *args, **kwargs))
+    try:
+        yield stats
+    finally:
+        for name in wrapped:
+            delattr(learner, name)
+        stats._end_fit(learner)
@@ -0,0 +1,280 @@
+from __future__ import annotations
+import copy
+import itertools
+import os
+from typing import TYPE_CHECKING
+import numpy as np
+from .c45 import C45
+from .cart import CART
+from .core import TrainingData, map_shared, worker_data
+from .id3 import ID3
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class KFold:
+    """
+    Divisão dos índices 0..n-1 em `n_splits` partes; cada parte é o conjunto
+    de teste de uma rodada e as demais formam o treino.
+    """
+    def __init__(self, n_splits: int = 5, shuffle: bool = False, random_state=None):
+        if n_splits < 2:
+            raise ValueError("n_splits deve ser pelo menos 2")
+        self.n_splits = n_splits
+        self.shuffle = shuffle
+        self.random_state = random_state
+
+    def _test_folds(self, n_samples: int, labels: np.ndarray) -> list:
+        order = np.arange(n_samples)
+        if self.shuffle:
+            np.random.default_rng(self.random_state).shuffle(order)
+        return np.array_split(order, self.n_splits)
+
+    def split(self, n_samples: int, labels: np.ndarray = None):
+        """
+        Gera os pares (treino, teste) de índices, ambos ordenados.
+
+        Args:
+            n_samples: Número de linhas.
+            labels: Códigos das classes (usados só pelo `StratifiedKFold`).
+        """
+        if n_samples < self.n_splits:
+            raise ValueError(f"n_splits={self.n_splits} é maior que o número de linhas ({n_samples})")
+        for test in self._test_folds(n_samples, labels):
+            in_test = np.zeros(n_samples, dtype=bool)
+            in_test[test] = True
+            yield np.flatnonzero(~in_test), np.flatnonzero(in_test)
+
+
+class StratifiedKFold(KFold):
+    """KFold que preserva em cada parte a proporção de cada classe."""
+    def _test_folds(self, n_samples: int, labels: np.ndarray) -> list:
+        rng = np.random.default_rng(self.random_state)
+        folds = [[] for _ in range(self.n_splits)]
+        position = 0
+        for label in np.unique(labels):
+            rows = np.flatnonzero(labels == label)
+            if self.shuffle:
+                rng.shuffle(rows)
+            # As linhas de cada classe são distribuídas em rodízio, continuando de onde a anterior parou
+            for i, row in enumerate(rows):
+                folds[(position + i) % self.n_splits].append(row)
+            position += len(rows)
+        return [np.array(fold, dtype=np.intp) for fold in folds]
+
+
+def _check_cv(cv) -> KFold:
+    return StratifiedKFold(cv) if isinstance(cv, int) else cv
+
+
+def _encode(estimator, X: pd.DataFrame, y: pd.Series) -> TrainingData:
+    """Codifica os dados como o `fit` do estimador codificaria."""
+    return TrainingData(X, y, categorical='all' if isinstance(estimator, ID3) else 'auto',
+                        max_bins=estimator.max_bins)
+
+
+def _with_params(estimator, params: dict):
+    estimator = copy.deepcopy(estimator)
+    for name, value in params.items():
+        if not hasattr(estimator, name):
+            raise ValueError(f"Parâmetro inválido para {type(estimator).__name__}: {name!r}")
+        setattr(estimator, name, value)
+    return estimator
+
+
+def _reuses_depth(estimator) -> bool:
+    """
+    Se uma árvore crescida pode ser cortada em profundidades menores no lugar
+    de novos treinos: vale sem poda (que depende da árvore inteira), sem
+    orçamento de folhas (crescimento melhor-primeiro) e sem sorteio de
+    atributos (a ordem dos sorteios mudaria com a profundidade).
+    """
+    return (getattr(estimator, 'ccp_alpha', 0.0) == 0.0 and getattr(estimator, 'confidence', None) is None
+            and getattr(estimator, 'max_leaf_nodes', None) is None
+            and getattr(estimator, 'max_features', None) is None)
+
+
+def _fit_and_score(estimator, depths: list, train: np.ndarray, test: np.ndarray,
+                   data: TrainingData = None) -> list:
+    """
+    Treina o estimador nas linhas `train` (com o maior `max_depth` de
+    `depths`) e devolve a acurácia em `test` da árvore cortada em cada
+    profundidade de `depths`. Os dados de teste já estão codificados.
+    """
+    data = worker_data() if data is None else data
+    tree = estimator._fit_data(data.with_samples(train)).compiled_
+    X_test, y_test = data.X[test], data.y[test]
+    scores = []
+    for depth in depths:
+        truncated = tree if depth is None or depth == estimator.max_depth else tree.truncate(depth)
+        scores.append(float(np.mean(truncated.value[truncated.apply(X_test)] == y_test)))
+    return scores
+
+
+def _evaluate_candidates(estimator, candidates: list, X: pd.DataFrame, y: pd.Series, cv, n_jobs) -> np.ndarray:
+    """
+    Acurácia de cada combinação de parâmetros em cada rodada da validação
+    cruzada.
+
+    Os dados são codificados uma única vez por forma de codificação (o
+    `max_bins` muda os bins) e cada rodada recebe só os índices de treino e
+    de teste. Combinações que diferem apenas em `max_depth` compartilham uma
+    árvore por rodada, crescida com a maior profundidade e cortada nas
+    demais. As tarefas (grupo, rodada) rodam em um pool de processos que lê
+    os arrays de memória compartilhada.
+
+    Returns:
+        Matriz (combinações, rodadas) de acurácias.
+    """
+    if not isinstance(estimator, (ID3, C45, CART)):
+        raise TypeError("estimator deve ser uma instância de ID3, C45 ou CART")
+    if n_jobs is not None and n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    cv = _check_cv(cv)
+    scores = np.empty((len(candidates), cv.n_splits))
+
+    # Agrupa as combinações por codificação e, quando possível, por tudo menos max_depth
+    encodings = {}
+    for index, params in enumerate(candidates):
+        candidate = _with_params(estimator, params)
+        groups = encodings.setdefault(candidate.max_bins, {})
+        if _reuses_depth(candidate):
+            key = repr(sorted((name, value) for name, value in params.items() if name != 'max_depth'))
+        else:
+            key = index
+        groups.setdefault(key, []).append((index, candidate))
+
+    for max_bins, groups in encodings.items():
+        data = _encode(_with_params(estimator, {'max_bins': max_bins}), X, y)
+        folds = list(cv.split(data.n_samples, data.y))
+        tasks, targets = [], []
+        for members in groups.values():
+            depths = [candidate.max_depth for _, candidate in members]
+            grown = copy.deepcopy(members[0][1])
+            grown.max_depth = None if None in depths else max(depths)
+            for fold, (train, test) in enumerate(folds):
+                tasks.append((grown, depths, train, test))
+                targets.append(([index for index, _ in members], fold))
+
+        if n_jobs is None or n_jobs <= 1:
+            results = [_fit_and_score(*task, data) for task in tasks]
+        else:
+            results = map_shared(_fit_and_score, data, n_jobs, *zip(*tasks))
+        for (indices, fold), fold_scores in zip(targets, results):
+            scores[indices, fold] = fold_scores
+    return scores
+
+
+def cross_val_score(estimator, X: pd.DataFrame, y: pd.Series, cv=5, n_jobs=None) -> np.ndarray:
+    """
+    Acurácia do estimador em cada rodada da validação cruzada.
+
+    Args:
+        estimator: Instância (não treinada) de ID3, C45 ou CART.
+        X: DataFrame com os atributos.
+        y: Series com os rótulos.
+        cv: Número de partes (StratifiedKFold) ou um objeto KFold/StratifiedKFold.
+        n_jobs: Número de processos (-1 para todos os núcleos).
+    """
+    return _evaluate_candidates(estimator, [{}], X, y, cv, n_jobs)[0]
+
+
+class _BaseSearch:
+    def __init__(self, estimator, cv=5, n_jobs=None, refit=True):
+        self.estimator = estimator
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.refit = refit
+
+    def fit(self, X: pd.DataFrame, y: pd.Series):
+        """Avalia todas as combinações por validação cruzada e, com `refit`, retreina a melhor em X inteiro."""
+        candidates = self._candidates()
+        scores = _evaluate_candidates(self.estimator, candidates, X, y, self.cv, self.n_jobs)
+        mean, std = scores.mean(axis=1), scores.std(axis=1)
+        # Empates: a primeira combinação (ordem estável, como no scikit-learn)
+        order = np.argsort(-mean, kind='stable')
+        rank = np.empty(len(candidates), dtype=np.intp)
+        rank[order] = np.arange(1, len(candidates) + 1)
+        self.cv_results_ = {'params': candidates, 'mean_test_score': mean, 'std_test_score': std,
+                            'rank_test_score': rank}
+        for fold in range(scores.shape[1]):
+            self.cv_results_[f'split{fold}_test_score'] = scores[:, fold]
+        self.best_index_ = int(order[0])
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = float(mean[self.best_index_])
+        if self.refit:
+            self.best_estimator_ = _with_params(self.estimator, self.best_params_).fit(X, y)
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.best_estimator_.predict(X)
+
+
+class GridSearchCV(_BaseSearch):
+    """
+    Busca exaustiva de parâmetros de ID3, C45 ou CART por validação cruzada.
+
+    Os dados são codificados uma única vez e as rodadas recebem apenas
+    índices; combinações que diferem só em `max_depth` reaproveitam uma
+    árvore por rodada (cortada em cada profundidade), e as rodadas rodam em
+    paralelo com `n_jobs`. Os resultados ficam em `cv_results_`,
+    `best_params_`, `best_score_` e `best_estimator_`.
+
+    Args:
+        estimator: Instância (não treinada) de ID3, C45 ou CART.
+        param_grid: Dicionário {parâmetro: lista de valores} ou lista desses
+            dicionários; cada combinação do produto é avaliada.
+        cv: Número de partes (StratifiedKFold) ou um objeto KFold/StratifiedKFold.
+        n_jobs: Número de processos (-1 para todos os núcleos).
+        refit: Se True, retreina a melhor combinação em todos os dados.
+    """
+    def __init__(self, estimator, param_grid, cv=5, n_jobs=None, refit=True):
+        super().__init__(estimator, cv, n_jobs, refit)
+        self.param_grid = param_grid
+
+    def _candidates(self) -> list:
+        grids = [self.param_grid] if isinstance(self.param_grid, dict) else self.param_grid
+        candidates = []
+        for grid in grids:
+            names = sorted(grid)
+            candidates += [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+        return candidates
+
+
+class RandomizedSearchCV(_BaseSearch):
+    """
+    Busca aleatória de parâmetros: `n_iter` combinações sorteadas, avaliadas
+    como na `GridSearchCV`.
+
+    Args:
+        estimator: Instância (não treinada) de ID3, C45 ou CART.
+        param_distributions: Dicionário {parâmetro: lista de valores ou
+            distribuição com `rvs(random_state=...)`, como as do scipy.stats}.
+        n_iter: Número de combinações sorteadas.
+        cv: Número de partes (StratifiedKFold) ou um objeto KFold/StratifiedKFold.
+        n_jobs: Número de processos (-1 para todos os núcleos).
+        random_state: Semente dos sorteios.
+        refit: Se True, retreina a melhor combinação em todos os dados.
+    """
+    def __init__(self, estimator, param_distributions: dict, n_iter=10, cv=5, n_jobs=None, random_state=None,
+                 refit=True):
+        super().__init__(estimator, cv, n_jobs, refit)
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.random_state = random_state
+
+    def _candidates(self) -> list:
+        rng = np.random.default_rng(self.random_state)
+        candidates = []
+        for _ in range(self.n_iter):
+            params = {}
+            for name in sorted(self.param_distributions):
+                distribution = self.param_distributions[name]
+                if hasattr(distribution, 'rvs'):
+                    value = distribution.rvs(random_state=rng)
+                else:
+                    value = distribution[rng.integers(len(distribution))]
+                params[name] = value.item() if isinstance(value, np.generic) else value
+            candidates.append(params)
+        return candidates
@@ -1,5 +1,113 @@
+import numpy as np
 import pandas as pd
 
+
+class TitanicPreprocessor:
+    """
+    Pré-processamento do Titanic com estado: aprende uma vez, no `fit`, os
+    valores de imputação e os limites dos bins e aplica sempre os mesmos
+    valores em `transform`. Assim, lotes de predição são tratados de forma
+    consistente com o treino, sem recalcular medianas, modas ou quantis.
+
+    O `transform` monta o DataFrame de saída em uma única passada vetorizada
+    sobre as colunas (sem `copy()` do frame inteiro nem `fillna(inplace=True)`
+    encadeado), e `transform_stream` aplica a mesma transformação a um fluxo
+    de lotes, ex.: `pd.read_csv(..., chunksize=...)`.
+    """
+    # Códigos fixos das colunas categóricas (iguais em todos os lotes)
+    SEX_CODES = ('male', 'female')
+    EMBARKED_CODES = ('S', 'C', 'Q')
+    DROPPED_COLUMNS = ('Name', 'Ticket', 'Cabin', 'PassengerId')
+    # Faixas etárias: Criança(0-12), Adolescente(12-18), Adulto(18-60), Idoso(60-100)
+    AGE_BINS = (0, 12, 18, 60, 100)
+    AGE_LABELS = ('Criança', 'Adolescente', 'Adulto', 'Idoso')
+    FARE_LABELS = ('Muito Baixo', 'Baixo', 'Médio', 'Alto')
+
+    def __init__(self, clean=True, discretize=False):
+        """
+        Args:
+            clean: Se True, imputa 'Age', 'Embarked' e 'Fare', codifica 'Sex' e
+                'Embarked' e remove as colunas não utilizadas.
+            discretize: Se True, discretiza 'Age' em faixas etárias e 'Fare' em
+                quartis (para o ID3).
+        """
+        self.clean = clean
+        self.discretize = discretize
+
+    def fit(self, df: pd.DataFrame):
+        """Aprende os valores de imputação e os limites dos quartis de 'Fare'."""
+        fare = df['Fare']
+        if self.clean:
+            self.median_age_ = df['Age'].median()
+            self.mode_embarked_ = df['Embarked'].mode()[0]
+            self.median_fare_ = fare.median()
+            fare = fare.fillna(self.median_fare_)
+        if self.discretize:
+            # Quartis (mesmo número de pessoas por faixa), pois 'Fare' é muito assimétrica
+            _, self.fare_edges_ = pd.qcut(fare, q=len(self.FARE_LABELS), retbins=True)
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aplica os valores aprendidos a um novo lote.
+
+        Args:
+            df: DataFrame do Titanic (bruto se `clean`, já limpo caso contrário).
+
+        Returns:
+            Novo DataFrame transformado; `df` não é modificado.
+        """
+        dropped = self.DROPPED_COLUMNS if self.clean else ()
+        columns = {name: df[name] for name in df.columns if name not in dropped}
+
+        if self.clean:
+            columns['Age'] = df['Age'].fillna(self.median_age_)
+            columns['Fare'] = df['Fare'].fillna(self.median_fare_)
+            columns['Sex'] = self._encode(df['Sex'], self.SEX_CODES)
+            columns['Embarked'] = self._encode(df['Embarked'].fillna(self.mode_embarked_), self.EMBARKED_CODES)
+
+        if self.discretize:
+            # Faixas fechadas à direita, como em pd.cut; fora das faixas -> NaN
+            columns['Age'] = self._bin(columns['Age'], np.asarray(self.AGE_BINS, dtype=np.float64),
+                                       self.AGE_LABELS)
+            # Quartis: as faixas extremas ficam abertas, para valores fora do intervalo do treino
+            fare_edges = np.concatenate(([-np.inf], self.fare_edges_[1:-1], [np.inf]))
+            columns['Fare'] = self._bin(columns['Fare'], fare_edges, self.FARE_LABELS)
+
+        return pd.DataFrame(columns, index=df.index)
+
+    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.fit(df).transform(df)
+
+    def transform_stream(self, chunks):
+        """
+        Transforma um fluxo de lotes, um por vez, sem carregar o arquivo todo.
+
+        Args:
+            chunks: Iterável de DataFrames, ex.: `pd.read_csv(..., chunksize=...)`.
+
+        Yields:
+            Cada lote transformado.
+        """
+        for chunk in chunks:
+            yield self.transform(chunk)
+
+    @staticmethod
+    def _encode(values: pd.Series, categories: tuple) -> np.ndarray:
+        codes = pd.Index(categories).get_indexer(values)
+        if (codes < 0).any():
+            unknown = pd.unique(values[codes < 0])
+            raise ValueError(f"Categorias desconhecidas em '{values.name}': {list(unknown)}")
+        return codes.astype(int)
+
+    @staticmethod
+    def _bin(values: pd.Series, edges: np.ndarray, labels: tuple) -> pd.Categorical:
+        values = values.to_numpy(dtype=np.float64)
+        codes = np.searchsorted(edges, values, side='left') - 1
+        codes[(codes < 0) | (codes >= len(labels)) | np.isnan(values)] = -1
+        return pd.Categorical.from_codes(codes, categories=list(labels), ordered=True)
+
+
 def clean_titanic_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Aplica a limpeza de dados específica para o Titanic.
@@ -7,35 +115,16 @@ def clean_titanic_data(df: pd.DataFrame) -> pd.DataFrame:
     - Converte 'Sex' e 'Embarked' para valores numéricos.
     - Remove colunas não utilizadas.
 
+    Os valores de imputação são calculados no próprio `df`; para tratar lotes
+    novos com os valores do treino, use `TitanicPreprocessor`.
+
     Args:
         df: DataFrame do Titanic.
 
     Returns:
         DataFrame limpo e pronto para os algoritmos.
     """
-    df_cleaned = df.copy()
-
-    # Preencher 'Age' com a mediana
-    median_age = df_cleaned['Age'].median()
-    df_cleaned['Age'].fillna(median_age, inplace=True)
-
-    # Preencher 'Embarked' com a moda (valor mais comum) 
-    mode_embarked = df_cleaned['Embarked'].mode()[0]
-    df_cleaned['Embarked'].fillna(mode_embarked, inplace=True)
-
-    # Preencher qualquer 'Fare' nulo com a mediana
-    median_fare = df_cleaned['Fare'].median()
-    df_cleaned['Fare'].fillna(median_fare, inplace=True)
-
-    # Converter colunas categóricas para numéricas
-    df_cleaned['Sex'] = df_cleaned['Sex'].map({'male': 0, 'female': 1}).astype(int)
-    df_cleaned['Embarked'] = df_cleaned['Embarked'].map({'S': 0, 'C': 1, 'Q': 2}).astype(int)
-
-    # Remover colunas que não usaremos conforme a descrição da atividade
-    # (Name, Ticket, Cabin, PassengerId)
-    df_cleaned = df_cleaned.drop(columns=['Name', 'Ticket', 'Cabin', 'PassengerId'])
-
-    return df_cleaned
+    return TitanicPreprocessor().fit_transform(df)
 
 
 def discretize_for_id3(df: pd.DataFrame) -> pd.DataFrame:
@@ -43,27 +132,16 @@ def discretize_for_id3(df: pd.DataFrame) -> pd.DataFrame:
     Discretiza colunas contínuas ('Age', 'Fare') para o uso no ID3.
     Isso converte números em categorias.
 
+    Os quartis de 'Fare' são calculados no próprio `df`; para reutilizá-los em
+    lotes novos, use `TitanicPreprocessor(clean=False, discretize=True)`.
+
+    Alternativa: `ID3(max_bins=...)` discretiza as colunas numéricas durante o
+    `fit` com bins de quantis aprendidos nos dados de treino.
+
     Args:
         df: DataFrame do Titanic já limpo.
 
     Returns:
         DataFrame com as colunas contínuas discretizadas.
     """
-    df_discretized = df.copy()
-
-    # Discretizar 'Age' em faixas etárias(Criança(0-12), Adolescente(12-18), Adulto(18-60), (Idoso(60-100))
-    df_discretized['Age'] = pd.cut(
-        df_discretized['Age'],
-        bins=[0, 12, 18, 60, 100],
-        labels=['Criança', 'Adolescente', 'Adulto', 'Idoso']
-    )
-
-    # Discretizar 'Fare' usando quantis (divisões com o mesmo número de pessoas)
-    # pois a distribuição de 'Fare' é muito assimétrica.
-    df_discretized['Fare'] = pd.qcut(
-        df_discretized['Fare'],
-        q=4,
-        labels=['Muito Baixo', 'Baixo', 'Médio', 'Alto']
-    )
-
-    return df_discretized
\ No newline at end of file
+    return TitanicPreprocessor(clean=False, discretize=True).fit_transform(df)
@@ -0,0 +1,157 @@
+import heapq
+import numpy as np
+from statistics import NormalDist
+from . import utils
+from .tree import CompiledTree
+
+
+def _parents(tree: CompiledTree) -> np.ndarray:
+    parent = np.full(tree.n_nodes, -1)
+    for node in range(tree.n_nodes):
+        parent[tree.children(node)] = node
+    return parent
+
+
+def _weakest_links(tree: CompiledTree, criterion: str) -> tuple:
+    """
+    Sequência de podas do "elo mais fraco" (poda por custo-complexidade).
+
+    Usa apenas as contagens por classe guardadas nos nós: o custo de um nó é
+    R(t) = (n_t / n) * impureza(t) e o de sua sub-árvore, R(T_t), é a soma das
+    folhas. A cada passo, o nó interno ativo de menor
+    alpha(t) = (R(t) - R(T_t)) / (|folhas(T_t)| - 1) é podado, e só os seus
+    ancestrais são atualizados (O(profundidade · log n) por poda).
+
+    Returns:
+        Uma tupla (nos_podados, alphas, impurezas): o nó podado em cada passo,
+        o seu alpha efetivo e a impureza total das folhas após a poda.
+    """
+    impurity = utils.gini_from_counts if criterion == 'gini' else utils.entropy_from_counts
+    counts = tree.counts
+    is_leaf = tree.feature < 0
+    # Listas Python: o laço abaixo é escalar, e escalares NumPy o deixariam lento
+    node_cost = (counts.sum(axis=1) / counts[0].sum() * impurity(counts)).tolist()
+    parent = _parents(tree).tolist()
+
+    # Custos e número de folhas das sub-árvores, de baixo para cima (pré-ordem invertida)
+    subtree_cost = np.where(is_leaf, node_cost, 0.0).tolist()
+    n_leaves = is_leaf.astype(np.int64).tolist()
+    for node in reversed(range(1, tree.n_nodes)):
+        subtree_cost[parent[node]] += subtree_cost[node]
+        n_leaves[parent[node]] += n_leaves[node]
+
+    def effective_alpha(node):
+        # Nós com um único ramo (possíveis no ID3/C4.5) têm custo de poda zero
+        return (node_cost[node] - subtree_cost[node]) / max(n_leaves[node] - 1, 1)
+
+    # Fila de prioridade (alpha, nó) com invalidação preguiçosa: ao podar um nó,
+    # só os seus ancestrais mudam e recebem uma nova entrada
+    active = ~is_leaf
+    version = [0] * tree.n_nodes
+    heap = [(effective_alpha(node), node, 0) for node in np.flatnonzero(active).tolist()]
+    heapq.heapify(heap)
+    end = tree.subtree_end()
+    pruned, alphas, impurities = [], [], []
+    while heap:
+        alpha, weakest, entry_version = heapq.heappop(heap)
+        if not active[weakest] or entry_version != version[weakest]:
+            continue
+        # A sub-árvore vira folha: os ancestrais perdem a diferença de custo e de folhas
+        cost_change = node_cost[weakest] - subtree_cost[weakest]
+        leaves_change = n_leaves[weakest] - 1
+        active[weakest:end[weakest]] = False
+        subtree_cost[weakest], n_leaves[weakest] = node_cost[weakest], 1
+        ancestor = parent[weakest]
+        while ancestor >= 0:
+            subtree_cost[ancestor] += cost_change
+            n_leaves[ancestor] -= leaves_change
+            version[ancestor] += 1
+            heapq.heappush(heap, (effective_alpha(ancestor), ancestor, version[ancestor]))
+            ancestor = parent[ancestor]
+        pruned.append(weakest)
+        alphas.append(max(alpha, 0.0))
+        impurities.append(subtree_cost[0])
+    return pruned, alphas, impurities
+
+
+def cost_complexity_path(tree: CompiledTree, criterion: str = 'gini') -> dict:
+    """
+    Caminho completo da poda por custo-complexidade, como o do scikit-learn.
+
+    Args:
+        tree: Árvore compilada, com as contagens por nó.
+        criterion: 'gini' ou 'entropy' (impureza usada no custo R(t)).
+
+    Returns:
+        Dicionário com `ccp_alphas` (crescentes, começando em 0) e `impurities`
+        (impureza total das folhas da árvore podada com cada alpha).
+    """
+    _, alphas, impurities = _weakest_links(tree, criterion)
+    impurity = utils.gini_from_counts if criterion == 'gini' else utils.entropy_from_counts
+    leaves = tree.counts[tree.feature < 0]
+    full_cost = np.sum(leaves.sum(axis=1) / tree.counts[0].sum() * impurity(leaves))
+    return {'ccp_alphas': np.array([0.0] + alphas), 'impurities': np.array([full_cost] + impurities)}
+
+
+def cost_complexity_prune(tree: CompiledTree, ccp_alpha: float, criterion: str = 'gini') -> CompiledTree:
+    """Poda mínima por custo-complexidade: remove os elos com alpha efetivo <= `ccp_alpha`."""
+    if ccp_alpha <= 0 or tree.n_nodes == 1:
+        return tree
+    pruned, alphas, _ = _weakest_links(tree, criterion)
+    # Os alphas da sequência não decrescem, exceto por ruído numérico
+    collapse = [node for node, alpha in zip(pruned, np.maximum.accumulate(alphas)) if alpha <= ccp_alpha]
+    return tree.prune(collapse) if collapse else tree
+
+
+def _estimated_errors(n: np.ndarray, errors: np.ndarray, confidence: float) -> np.ndarray:
+    """
+    Erros previstos do C4.5: n vezes o limite superior, com confiança
+    `confidence`, da taxa de erro binomial observada (errors / n). Segue a
+    aproximação da função `AddErrs` do C4.5 original.
+    """
+    coefficient = NormalDist().inv_cdf(1 - confidence) ** 2
+    n = np.asarray(n, dtype=np.float64)
+    errors = np.asarray(errors, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zero_errors = n * (1 - confidence ** (1 / n))
+        one_error = np.where(1.5 >= n, 0.67 * (n - 1), n * _upper_rate(n, 1.0, coefficient) - 1)
+        upper = n * _upper_rate(n, errors, coefficient) - errors
+
+    extra = np.where(errors < 1e-6, zero_errors, 0.0)
+    small = (errors >= 1e-6) & (errors < 0.9999)
+    extra = np.where(small, zero_errors + errors * (one_error - zero_errors), extra)
+    large = errors >= 0.9999
+    extra = np.where(large & (errors + 0.5 >= n), 0.67 * (n - errors), extra)
+    extra = np.where(large & (errors + 0.5 < n), upper, extra)
+    return np.where(n > 0, errors + extra, 0.0)
+
+
+def _upper_rate(n, errors, coefficient):
+    errors = errors + 0.5
+    return (errors + coefficient / 2 + np.sqrt(coefficient * (errors * (1 - errors / n) + coefficient / 4))) \
+        / (n + coefficient)
+
+
+def pessimistic_prune(tree: CompiledTree, confidence: float = 0.25) -> CompiledTree:
+    """
+    Poda pessimista (baseada em erro) do C4.5, em uma passada de baixo para cima.
+
+    O erro previsto de uma folha é o limite superior, com confiança
+    `confidence`, do seu erro de treino. Um nó interno vira folha quando o
+    erro previsto como folha não supera o erro previsto da sub-árvore (a soma
+    das suas folhas) mais 0,1, como no C4.5.
+    """
+    counts = tree.counts
+    n = counts.sum(axis=1)
+    leaf_errors = _estimated_errors(n, n - counts.max(axis=1), confidence)
+    subtree_errors = leaf_errors.copy()
+    collapse = []
+    for node in reversed(range(tree.n_nodes)):
+        children = tree.children(node)
+        if not children:
+            continue
+        subtree_errors[node] = sum(subtree_errors[child] for child in children)
+        if leaf_errors[node] <= subtree_errors[node] + 0.1:
+            collapse.append(node)
+            subtree_errors[node] = leaf_errors[node]
+    return tree.prune(collapse) if collapse else tree
@@ -0,0 +1,32 @@
+"""
+Runtime de predição, separado do treino.
+
+Carrega modelos gravados por `save` (ID3, C45, CART, CARTRegressor, Bagging e
+RandomForest) e prediz dicionários, listas de linhas ou arrays NumPy sem
+pandas e sem importar os módulos de treino:
+
+    from decision_tree_lib import runtime
+    model = runtime.load('modelo.dtl')
+    model.predict({'Sex': 'female', 'Age': 30})   # uma linha, em Python puro
+    model.predict([['female', 30], ['male', 22]])  # lote, com NumPy
+
+Os nomes abaixo são importados só no primeiro acesso, então
+`import decision_tree_lib.runtime` não carrega nem o NumPy.
+"""
+import importlib
+
+_EXPORTS = {'Model': '.model', 'load': '.model'}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
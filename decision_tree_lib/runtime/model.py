@@ -0,0 +1,149 @@
+import bisect
+import numpy as np
+from .. import serialization
+
+_ENSEMBLES = ('Bagging', 'RandomForest')
+
+
+def load(path: str, mmap: bool = True) -> 'Model':
+    """
+    Carrega um modelo gravado por `save`.
+
+    Args:
+        path: Caminho do arquivo.
+        mmap: Se True (padrão), os arrays das árvores são mapeados do arquivo
+            em vez de lidos (ver `serialization.read_trees`).
+    """
+    header, trees = serialization.read_trees(path, mmap)
+    return Model(header, trees)
+
+
+class Model:
+    """
+    Modelo só de predição: as árvores compiladas de um arquivo de `save`.
+
+    `predict` aceita:
+    - um dicionário {atributo: valor} ou uma lista/tupla de valores na ordem
+      de `feature_names_` (em `predict_one`): a linha é roteada em Python
+      puro, sobre listas com os nós criadas uma única vez, e só os atributos
+      testados no caminho são convertidos;
+    - uma lista de dicionários, uma lista de linhas ou um array 2D: o lote é
+      codificado e roteado pela árvore compilada (`CompiledTree.apply`).
+    Atributos ausentes, None e NaN são valores faltantes e seguem a direção
+    aprendida no treino, como nos estimadores. Os ensembles votam (empates:
+    a menor classe); na regressão, a predição é o valor do nó.
+    """
+    def __init__(self, header: dict, trees: list):
+        self.estimator = header.get('estimator')
+        self.params = header.get('params', {})
+        self.trees = trees
+        self.feature_names_ = trees[0].feature_names
+        self.classes_ = trees[0].classes
+        self.is_ensemble = self.estimator in _ENSEMBLES
+        self.is_regressor = self.estimator == 'CARTRegressor'
+        self._nodes = None
+
+    # --- LOTES ---
+    def _encode(self, X) -> np.ndarray:
+        schema = self.trees[0]
+        if hasattr(X, 'columns'):
+            return schema.encode(X)
+        if not isinstance(X, np.ndarray) and len(X) and isinstance(X[0], dict):
+            return schema.encode_records(X)
+        return schema.encode_rows(X)
+
+    def predict(self, X):
+        """Prediz uma linha (dicionário) ou um lote de linhas (ver a classe)."""
+        if isinstance(X, dict):
+            return self.predict_one(X)
+        X_encoded = self._encode(X)
+        if not self.is_ensemble:
+            tree = self.trees[0]
+            return self.classes_[tree.value[tree.apply(X_encoded)]]
+        votes = np.zeros((len(X_encoded), len(self.classes_)), dtype=np.float64)
+        rows = np.arange(len(X_encoded))
+        for tree in self.trees:
+            votes[rows, tree.value[tree.apply(X_encoded)]] += 1
+        return self.classes_[np.argmax(votes, axis=1)]
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Distribuição de treino do nó em que cada linha termina (média das
+        árvores nos ensembles), com colunas na ordem de `classes_`. Um
+        dicionário devolve a distribuição de uma linha.
+        """
+        if self.is_regressor:
+            raise ValueError("predict_proba não se aplica a um CARTRegressor")
+        if isinstance(X, dict):
+            return self.predict_proba([X])[0]
+        X_encoded = self._encode(X)
+        proba = np.zeros((len(X_encoded), len(self.classes_)), dtype=np.float64)
+        for tree in self.trees:
+            proba += tree.probabilities()[tree.apply(X_encoded)]
+        return proba / len(self.trees)
+
+    # --- UMA LINHA ---
+    def _node_lists(self) -> tuple:
+        """Nós de cada árvore e esquema como listas Python (criados no primeiro `predict_one`)."""
+        if self._nodes is None:
+            schema = self.trees[0]
+            trees = [(tree.feature.tolist(), tree.threshold.tolist(), tree.left.tolist(), tree.right.tolist(),
+                      tree.cat_offset.tolist(), tree.cat_table.tolist(), tree.value.tolist(),
+                      tree.missing_left.tolist()) for tree in self.trees]
+            bin_edges = [None if edges is None else edges.tolist() for edges in schema.bin_edges]
+            self._nodes = (trees, schema.is_categorical.tolist(), schema.category_codes(), bin_edges,
+                           self.classes_.tolist())
+        return self._nodes
+
+    def _encode_value(self, j: int, value):
+        """Valor bruto do atributo j na codificação das árvores (código ou float)."""
+        _, is_categorical, category_codes, bin_edges, _ = self._nodes
+        if is_categorical[j] and bin_edges[j] is None:
+            return category_codes[j].get(value, -1)
+        value = float('nan') if value is None else float(value)
+        if is_categorical[j]:
+            return -1 if value != value else bisect.bisect_left(bin_edges[j], value)
+        return value
+
+    def _route(self, nodes: tuple, get) -> int:
+        """Valor (índice em `classes_`) do nó em que a linha termina; o mesmo percurso de `CompiledTree.apply`."""
+        feature, threshold, left, right, cat_offset, cat_table, value, missing_left = nodes
+        node = 0
+        while feature[node] >= 0:
+            x = self._encode_value(feature[node], get(feature[node]))
+            offset = cat_offset[node]
+            if offset < 0:
+                node = left[node] if x <= threshold[node] or (x != x and missing_left[node]) else right[node]
+                continue
+            child = cat_table[offset + x + 1]
+            if left[node] >= 0:
+                node = left[node] if child == left[node] else right[node]
+            elif child < 0:
+                break
+            else:
+                node = child
+        return value[node]
+
+    def predict_one(self, row):
+        """
+        Prediz uma linha em Python puro.
+
+        Args:
+            row: Dicionário {atributo: valor} ou sequência de valores na ordem
+                de `feature_names_`.
+
+        Returns:
+            O rótulo previsto (ou o valor, na regressão) como objeto Python.
+        """
+        trees, _, _, _, classes = self._node_lists()
+        if isinstance(row, dict):
+            names = self.feature_names_
+            get = lambda j: row.get(names[j])
+        else:
+            get = row.__getitem__
+        if len(trees) == 1:
+            return classes[self._route(trees[0], get)]
+        votes = [0] * len(classes)
+        for nodes in trees:
+            votes[self._route(nodes, get)] += 1
+        return classes[max(range(len(votes)), key=votes.__getitem__)]
@@ -0,0 +1,208 @@
+import json
+import numpy as np
+from .tree import CompiledTree
+
+# Layout do arquivo (little-endian):
+#   MAGIC (8 bytes) | versão (uint32) | tamanho do cabeçalho (uint32) | cabeçalho JSON
+#   | arrays dos nós, cada um alinhado em 64 bytes a partir do início da seção de dados.
+# O cabeçalho guarda o esquema (nomes dos atributos, vocabulários, classes), os
+# parâmetros do estimador e, para cada array, o dtype, a forma e o deslocamento.
+MAGIC = b'DTLTREE\x00'
+# Versão 2: array `missing_left` (direção dos ausentes); arquivos da versão 1
+# continuam legíveis, com os ausentes indo para a direita
+FORMAT_VERSION = 2
+_ALIGNMENT = 64
+_PREFIX_SIZE = len(MAGIC) + 8
+
+# Arrays de cada árvore; os inteiros são gravados em int64 e os booleanos em
+# uint8 para que o mapeamento em memória seja usado sem cópia pela CompiledTree
+_NODE_ARRAYS = {
+    'feature': '<i8',
+    'threshold': '<f8',
+    'left': '<i8',
+    'right': '<i8',
+    'cat_offset': '<i8',
+    'cat_table': '<i8',
+    'value': '<i8',
+    'counts': '<f8',
+    'missing_left': '|u1',
+}
+
+# Parâmetros que dependem de estado que o arquivo não guarda
+_UNSAVED_PARAMS = ('incremental',)
+
+
+def _plain(value):
+    """Converte escalares NumPy em tipos Python (serializáveis em JSON)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _encode_values(values) -> dict:
+    array = np.asarray(values)
+    return {'dtype': array.dtype.str if array.dtype != object else 'object', 'values': array.tolist()}
+
+
+def _decode_values(encoded: dict) -> np.ndarray:
+    return np.array(encoded['values'], dtype=encoded['dtype'])
+
+
+def _aligned(size: int) -> int:
+    return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+
+def estimator_params(model) -> dict:
+    """
+    Parâmetros do construtor do modelo que podem ser gravados (None, bool,
+    números e strings); os demais, como `instrument`, voltam ao padrão. O
+    arquivo não guarda as linhas do treino, então `incremental` também volta
+    ao padrão (o modelo carregado não aceita `update`).
+    """
+    import inspect
+    params = {}
+    for name in list(inspect.signature(type(model).__init__).parameters)[1:]:
+        if name in _UNSAVED_PARAMS:
+            continue
+        value = _plain(getattr(model, name, None))
+        if value is None or isinstance(value, (bool, int, float, str)):
+            params[name] = value
+    return params
+
+
+def write_trees(path: str, trees: list, metadata: dict):
+    """
+    Grava uma ou mais árvores compiladas (com o mesmo esquema de atributos)
+    em um arquivo binário.
+
+    Args:
+        path: Caminho do arquivo.
+        trees: Lista de CompiledTree; o esquema é lido da primeira.
+        metadata: Dicionário serializável em JSON (estimador, parâmetros etc.).
+    """
+    schema_tree = trees[0]
+    arrays = {}
+    for i, tree in enumerate(trees):
+        for name, dtype in _NODE_ARRAYS.items():
+            values = getattr(tree, name)
+            if values is not None:
+                arrays[f'{i}/{name}'] = np.ascontiguousarray(values, dtype=dtype)
+    bin_edges = []
+    for j, edges in enumerate(schema_tree.bin_edges):
+        if edges is None:
+            bin_edges.append(None)
+        else:
+            bin_edges.append(f'bin_edges/{j}')
+            arrays[f'bin_edges/{j}'] = np.ascontiguousarray(edges, dtype='<f8')
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = _aligned(offset + array.nbytes)
+
+    header = {
+        **metadata,
+        'n_trees': len(trees),
+        'schema': {
+            'feature_names': [_plain(name) for name in schema_tree.feature_names],
+            'is_categorical': schema_tree.is_categorical.tolist(),
+            'categories': [None if values is None else _encode_values(values)
+                           for values in schema_tree.categories],
+            'classes': _encode_values(schema_tree.classes),
+            'bin_edges': bin_edges,
+        },
+        'arrays': layout,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_start = _aligned(_PREFIX_SIZE + len(header_bytes))
+
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(np.array([FORMAT_VERSION, len(header_bytes)], dtype='<u4').tobytes())
+        file.write(header_bytes)
+        file.write(b'\x00' * (data_start - _PREFIX_SIZE - len(header_bytes)))
+        position = 0
+        for name, array in arrays.items():
+            file.write(b'\x00' * (layout[name]['offset'] - position))
+            file.write(array.tobytes())
+            position = layout[name]['offset'] + array.nbytes
+
+
+def read_header(buffer) -> tuple:
+    """
+    Valida o prefixo do arquivo e lê o cabeçalho.
+
+    Returns:
+        Uma tupla (cabecalho, inicio_dos_dados).
+    """
+    prefix = bytes(buffer[:_PREFIX_SIZE])
+    if len(prefix) < _PREFIX_SIZE or prefix[:len(MAGIC)] != MAGIC:
+        raise ValueError("O arquivo não é um modelo salvo por decision_tree_lib.")
+    version, header_size = np.frombuffer(prefix[len(MAGIC):], dtype='<u4')
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Versão de formato {version} não suportada (máximo: {FORMAT_VERSION}).")
+    header = json.loads(bytes(buffer[_PREFIX_SIZE:_PREFIX_SIZE + header_size]).decode('utf-8'))
+    return header, _aligned(_PREFIX_SIZE + int(header_size))
+
+
+def read_trees(path: str, mmap: bool = False) -> tuple:
+    """
+    Lê um arquivo gravado por `write_trees`.
+
+    Args:
+        path: Caminho do arquivo.
+        mmap: Se True, os arrays dos nós são mapeados diretamente do arquivo
+            (somente leitura): nada é copiado nem desserializado, e vários
+            processos que carregam o mesmo arquivo compartilham as páginas.
+
+    Returns:
+        Uma tupla (cabecalho, arvores), com as CompiledTree na ordem gravada.
+    """
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        with open(path, 'rb') as file:
+            buffer = bytearray(file.read())
+    header, data_start = read_header(buffer)
+
+    def array(name):
+        spec = header['arrays'][name]
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape']))
+        if count == 0:
+            return np.empty(spec['shape'], dtype=dtype)
+        values = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + spec['offset'])
+        return values.reshape(spec['shape'])
+
+    schema = header['schema']
+    categories = [None if values is None else _decode_values(values) for values in schema['categories']]
+    classes = _decode_values(schema['classes'])
+    bin_edges = [None if name is None else array(name) for name in schema['bin_edges']]
+    trees = []
+    for i in range(header['n_trees']):
+        nodes = {name: array(f'{i}/{name}') if f'{i}/{name}' in header['arrays'] else None
+                 for name in _NODE_ARRAYS}
+        if nodes['missing_left'] is not None:
+            nodes['missing_left'] = nodes['missing_left'].view(bool)
+        trees.append(CompiledTree(nodes['feature'], nodes['threshold'], nodes['left'], nodes['right'],
+                                  nodes['cat_offset'], nodes['cat_table'], nodes['value'],
+                                  schema['feature_names'], schema['is_categorical'], categories, classes,
+                                  bin_edges, nodes['counts'], nodes['missing_left']))
+    return header, trees
+
+
+def save_estimator(model, path: str):
+    """Grava um ID3, C45, CART ou CARTRegressor treinado (usado pelos métodos `save`)."""
+    if model.compiled_ is None:
+        raise ValueError("O modelo ainda não foi treinado.")
+    metadata = {'estimator': type(model).__name__, 'params': estimator_params(model)}
+    write_trees(path, [model.compiled_], metadata)
+
+
+def load_estimator(cls, path: str, mmap: bool = False):
+    """Recria um ID3, C45, CART ou CARTRegressor gravado por `save_estimator` (usado pelos métodos `load`)."""
+    header, trees = read_trees(path, mmap)
+    if header.get('estimator') != cls.__name__ or len(trees) != 1:
+        raise ValueError(f"O arquivo contém um {header.get('estimator')}, não um {cls.__name__}.")
+    model = cls(**header['params'])
+    model.compiled_ = trees[0]
+    model.bin_edges_ = trees[0].bin_edges
+    return model
@@ -0,0 +1,438 @@
+"""
+Servidor de predição assíncrono (asyncio) para modelos salvos com `save`.
+
+Requisições concorrentes são agrupadas em micro-lotes: o primeiro pedido
+abre um lote, que é fechado quando atinge `max_batch_size` linhas ou quando
+`max_wait` segundos se passam, e o lote inteiro é predito de uma vez pela
+árvore compilada (`CompiledTree.predict_records`), sem DataFrame por pedido.
+
+Uso:
+    python -m decision_tree_lib.serving titanic=modelo.dtl --port 8000
+
+Rotas HTTP (JSON):
+    POST /predict/<modelo>   {"rows": [{atributo: valor, ...}, ...]} -> {"predictions": [...]}
+    GET  /models             nomes e estimadores carregados
+    GET  /stats              contadores e histogramas em JSON
+    GET  /metrics            os mesmos dados no formato texto do Prometheus
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from . import serialization
+from .c45 import C45
+from .cart import CART, CARTRegressor
+from .ensemble import Bagging, RandomForest
+from .id3 import ID3
+
+ESTIMATORS = {cls.__name__: cls for cls in (ID3, C45, CART, CARTRegressor, Bagging, RandomForest)}
+
+# Limites superiores (em segundos) dos baldes do histograma de latência
+LATENCY_BUCKETS = (5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Limites superiores (em linhas) dos baldes do histograma de tamanho de lote
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error'}
+
+
+def load_model(path: str, mmap: bool = True):
+    """Carrega um modelo salvo por `save`, identificando o estimador pelo cabeçalho do arquivo."""
+    header, _ = serialization.read_header(np.memmap(path, dtype=np.uint8, mode='r'))
+    cls = ESTIMATORS.get(header.get('estimator'))
+    if cls is None:
+        raise ValueError(f"Estimador desconhecido no arquivo: {header.get('estimator')}.")
+    return cls.load(path, mmap=mmap)
+
+
+def predict_records(model, records: list) -> np.ndarray:
+    """Prediz uma lista de dicionários {atributo: valor} com um ID3, C45, CART ou ensemble."""
+    if hasattr(model, 'estimators_'):
+        X_encoded = model.estimators_[0].compiled_.encode_records(records)
+        return model.classes_[np.argmax(model._votes(X_encoded), axis=1)]
+    return model.compiled_.predict_records(records)
+
+
+class Histogram:
+    """Histograma cumulativo de baldes fixos (como o do Prometheus)."""
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Limite superior do balde que contém o quantil `q` (inf se for o último)."""
+        if not self.count:
+            return float('nan')
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+    def to_dict(self) -> dict:
+        cumulative = np.cumsum(self.counts).tolist()
+        return {
+            'buckets': {str(bound): count for bound, count in zip(self.bounds + ('+Inf',), cumulative)},
+            'sum': self.total,
+            'count': self.count,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+        }
+
+
+class MicroBatcher:
+    """
+    Agrupa pedidos de predição de um modelo em micro-lotes.
+
+    Cada pedido (uma lista de linhas) entra em uma fila; uma tarefa de fundo
+    retira o primeiro, espera até `max_wait` segundos por outros enquanto o
+    lote tiver menos de `max_batch_size` linhas e prediz todos juntos. Um
+    pedido nunca é dividido, então um lote pode passar de `max_batch_size`
+    quando um único pedido já é maior. A predição roda em uma thread própria,
+    para que o laço de eventos continue aceitando e lendo conexões enquanto o
+    modelo pontua um lote.
+    """
+    def __init__(self, model, max_batch_size: int = 64, max_wait: float = 0.002):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.batch_latency = Histogram(LATENCY_BUCKETS)
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self._queue = None
+        self._worker = None
+        self._executor = None
+
+    async def predict(self, records: list) -> list:
+        """Enfileira as linhas e devolve as predições quando o lote delas for processado."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='micro-batcher')
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        try:
+            return await future
+        finally:
+            self.requests += 1
+            self.latency.observe(time.perf_counter() - start)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            n_rows = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while n_rows < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                n_rows += len(batch[-1][0])
+            # Pedidos que chegaram enquanto o lote fechava entram sem espera adicional
+            while n_rows < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                n_rows += len(batch[-1][0])
+            start = time.perf_counter()
+            results = await loop.run_in_executor(self._executor, self._score, [request for request, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if future.cancelled():
+                    continue
+                if isinstance(result, Exception):
+                    self.errors += 1
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self._record_batch(n_rows, time.perf_counter() - start)
+
+    def _score(self, requests: list) -> list:
+        """
+        Prediz os pedidos de um lote (na thread de predição). Devolve, por
+        pedido, a lista de predições ou a exceção que ele levantou.
+        """
+        records = [record for request in requests for record in request]
+        try:
+            predictions = predict_records(self.model, records).tolist()
+        except Exception:
+            # Um pedido inválido não derruba o lote: cada um é predito separadamente
+            results = []
+            for request in requests:
+                try:
+                    results.append(predict_records(self.model, request).tolist())
+                except Exception as error:
+                    results.append(error)
+            return results
+        results, position = [], 0
+        for request in requests:
+            results.append(predictions[position:position + len(request)])
+            position += len(request)
+        return results
+
+    def _record_batch(self, n_rows: int, elapsed: float):
+        self.batches += 1
+        self.rows += n_rows
+        self.batch_size.observe(n_rows)
+        self.batch_latency.observe(elapsed)
+
+    def stats(self) -> dict:
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'errors': self.errors,
+            'latency_seconds': self.latency.to_dict(),
+            'batch_latency_seconds': self.batch_latency.to_dict(),
+            'batch_size': self.batch_size.to_dict(),
+        }
+
+
+class PredictionServer:
+    """
+    Servidor HTTP/1.1 mínimo (só asyncio, com keep-alive) sobre um
+    `MicroBatcher` por modelo.
+
+    Args:
+        models: Dicionário {nome: caminho do arquivo ou estimador treinado}.
+        max_batch_size: Linhas a partir das quais um lote é fechado.
+        max_wait: Espera máxima, em segundos, para completar um lote.
+        mmap: Se True, os arquivos são mapeados na memória (ver `serialization`).
+    """
+    def __init__(self, models: dict, max_batch_size: int = 64, max_wait: float = 0.002, mmap: bool = True):
+        self.models = {name: load_model(model, mmap) if isinstance(model, str) else model
+                       for name, model in models.items()}
+        self.batchers = {name: MicroBatcher(model, max_batch_size, max_wait) for name, model in self.models.items()}
+        self.started = time.perf_counter()
+        self._server = None
+
+    async def predict(self, name: str, records: list) -> list:
+        """Prediz no próprio processo, pelo mesmo caminho em micro-lotes das requisições HTTP."""
+        return await self.batchers[name].predict(records)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8000) -> int:
+        """Começa a aceitar conexões e devolve a porta (útil com `port=0`)."""
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in self.batchers.values():
+            await batcher.close()
+
+    # --- MÉTRICAS ---
+    def stats(self) -> dict:
+        uptime = time.perf_counter() - self.started
+        models = {name: batcher.stats() for name, batcher in self.batchers.items()}
+        for model in models.values():
+            model['rows_per_second'] = model['rows'] / uptime if uptime > 0 else 0.0
+        return {'uptime_seconds': uptime, 'models': models}
+
+    def prometheus(self) -> str:
+        """Contadores e histogramas no formato de exposição em texto do Prometheus."""
+        lines = []
+        for metric, kind in (('requests', 'counter'), ('rows', 'counter'), ('batches', 'counter'),
+                             ('errors', 'counter')):
+            lines.append(f'# TYPE dtl_{metric}_total {kind}')
+            for name, batcher in self.batchers.items():
+                lines.append(f'dtl_{metric}_total{{model="{name}"}} {getattr(batcher, metric)}')
+        for metric, attribute in (('request_latency_seconds', 'latency'),
+                                  ('batch_latency_seconds', 'batch_latency'), ('batch_size', 'batch_size')):
+            lines.append(f'# TYPE dtl_{metric} histogram')
+            for name, batcher in self.batchers.items():
+                histogram = getattr(batcher, attribute)
+                for bound, count in histogram.to_dict()['buckets'].items():
+                    lines.append(f'dtl_{metric}_bucket{{model="{name}",le="{bound}"}} {count}')
+                lines.append(f'dtl_{metric}_sum{{model="{name}"}} {histogram.total}')
+                lines.append(f'dtl_{metric}_count{{model="{name}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    # --- HTTP ---
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    status, content_type, payload = 400, 'application/json', {'error': "Requisição malformada."}
+                else:
+                    status, content_type, payload = await self._route(parts[0], parts[1], body)
+                data = payload.encode('utf-8') if isinstance(payload, str) else json.dumps(payload).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close' and len(parts) == 3
+                writer.write(f'HTTP/1.1 {status} {_STATUS[status]}\r\nContent-Type: {content_type}\r\n'
+                             f'Content-Length: {len(data)}\r\nConnection: {"keep-alive" if keep_alive else "close"}'
+                             f'\r\n\r\n'.encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, body: bytes) -> tuple:
+        """Devolve (status, content-type, corpo) de uma requisição."""
+        path = target.split('?', 1)[0].rstrip('/')
+        if path == '/metrics' and method == 'GET':
+            return 200, 'text/plain; version=0.0.4', self.prometheus()
+        if path == '/stats' and method == 'GET':
+            return 200, 'application/json', self.stats()
+        if path == '/models' and method == 'GET':
+            return 200, 'application/json', {name: type(model).__name__ for name, model in self.models.items()}
+        if not path.startswith('/predict/'):
+            return 404, 'application/json', {'error': f"Rota desconhecida: {path}."}
+        if method != 'POST':
+            return 405, 'application/json', {'error': "Use POST para predizer."}
+        name = path[len('/predict/'):]
+        if name not in self.batchers:
+            return 404, 'application/json', {'error': f"Modelo desconhecido: {name}."}
+        try:
+            request = json.loads(body)
+            records = request['rows'] if isinstance(request, dict) else None
+            if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+                raise ValueError
+        except (ValueError, KeyError):
+            return 400, 'application/json', {'error': 'O corpo deve ser {"rows": [{atributo: valor}, ...]}.'}
+        if not records:
+            return 200, 'application/json', {'predictions': []}
+        try:
+            predictions = await self.predict(name, records)
+        except (ValueError, TypeError, KeyError) as error:
+            # Valores que não podem ser codificados (ex.: texto em um atributo contínuo) são erro do cliente
+            return 400, 'application/json', {'error': str(error)}
+        except Exception as error:
+            return 500, 'application/json', {'error': str(error)}
+        return 200, 'application/json', {'predictions': predictions}
+
+
+class PredictionClient:
+    """
+    Cliente local de um `PredictionServer`, com uma conexão keep-alive.
+    Várias instâncias em paralelo simulam clientes concorrentes.
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 8000):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def request(self, method: str, path: str, payload=None) -> tuple:
+        """Envia uma requisição e devolve (status, corpo decodificado)."""
+        body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        async with self._lock:
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            self._writer.write(f'{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n'
+                               f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'
+                               .encode('latin-1') + body)
+            await self._writer.drain()
+            status = int((await self._reader.readline()).split()[1])
+            headers = {}
+            while True:
+                line = await self._reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            data = await self._reader.readexactly(int(headers.get('content-length', 0)))
+            if headers.get('connection', '').lower() == 'close':
+                await self.close()
+        if headers.get('content-type', '').startswith('application/json'):
+            return status, json.loads(data)
+        return status, data.decode('utf-8')
+
+    async def predict(self, model: str, records: list) -> list:
+        status, body = await self.request('POST', f'/predict/{model}', {'rows': records})
+        if status != 200:
+            raise RuntimeError(f"Erro {status}: {body.get('error')}")
+        return body['predictions']
+
+    async def stats(self) -> dict:
+        return (await self.request('GET', '/stats'))[1]
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de predição em micro-lotes para modelos salvos.")
+    parser.add_argument('models', nargs='+', help="Modelos no formato nome=caminho (ou só o caminho).")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=64, help="Linhas a partir das quais o lote fecha.")
+    parser.add_argument('--max-wait', type=float, default=0.002, help="Espera máxima por lote, em segundos.")
+    parser.add_argument('--no-mmap', dest='mmap', action='store_false', help="Lê os modelos em vez de mapeá-los.")
+    args = parser.parse_args(argv)
+
+    models = {}
+    for spec in args.models:
+        name, _, path = spec.rpartition('=')
+        models[name or path.rsplit('/', 1)[-1].split('.')[0]] = path
+
+    async def run():
+        server = PredictionServer(models, args.max_batch_size, args.max_wait, args.mmap)
+        port = await server.start(args.host, args.port)
+        print(f"Servindo {', '.join(server.models)} em http://{args.host}:{port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
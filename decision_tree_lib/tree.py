@@ -0,0 +1,536 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class CompiledTree:
+    """
+    Forma compilada (em arrays paralelos) de uma árvore de decisão treinada.
+
+    Cada nó `i` é descrito por:
+    - feature[i]: índice do atributo testado (-1 nas folhas);
+    - threshold[i]: limiar dos testes contínuos `x <= limiar` (NaN nos demais);
+    - left[i] / right[i]: filhos dos testes binários (-1 quando não há);
+    - cat_offset[i]: início, em `cat_table`, da tabela de roteamento de um
+      teste categórico (-1 nos testes contínuos e nas folhas);
+    - value[i]: índice em `classes` da predição do nó. Nas folhas é a classe
+      prevista; nos nós internos é o valor de fallback usado quando a
+      categoria do exemplo não tem ramo;
+    - counts[i]: contagens por classe dos exemplos de treino que chegaram ao
+      nó (usadas na poda, sem reler os dados, e em `predict_proba`). Nas
+      árvores de regressão, são as somas (n, soma de y, soma de y²) do nó e
+      `classes` guarda a predição de cada nó (média ou mediana);
+    - missing_left[i]: direção aprendida no treino para valores ausentes
+      (NaN) nos testes contínuos; sem ela, vão para a direita.
+
+    A tabela de roteamento de um teste categórico tem uma entrada por código
+    de categoria do atributo, mais uma entrada inicial para categorias
+    desconhecidas (código -1). Cada entrada guarda o filho de destino; -1
+    indica que o exemplo para no nó e recebe `value[i]`. Um teste de
+    subconjunto do CART é, portanto, um bitset expandido (filho esquerdo ou
+    direito por categoria) e uma divisão multi-ramos do ID3/C4.5 usa a mesma
+    tabela com um filho por categoria.
+
+    Valores ausentes de atributos categóricos são codificados como -1, como
+    as categorias desconhecidas, e seguem a mesma entrada inicial da tabela:
+    quando o nó viu ausentes no treino, ela aponta para o filho que os
+    recebeu (a direção aprendida); caso contrário, mantém o padrão acima.
+    """
+    def __init__(self, feature, threshold, left, right, cat_offset, cat_table, value,
+                 feature_names, is_categorical, categories, classes, bin_edges=None, counts=None,
+                 missing_left=None):
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.cat_offset = np.asarray(cat_offset, dtype=np.intp)
+        self.cat_table = np.asarray(cat_table, dtype=np.intp)
+        self.value = np.asarray(value, dtype=np.intp)
+        self.feature_names = list(feature_names)
+        self.is_categorical = np.asarray(is_categorical, dtype=bool)
+        self.categories = list(categories)
+        self.classes = np.asarray(classes)
+        # Limites dos atributos numéricos tratados como intervalos (ID3 com max_bins)
+        self.bin_edges = list(bin_edges) if bin_edges is not None else [None] * len(self.feature_names)
+        self.counts = np.asarray(counts, dtype=np.float64) if counts is not None else None
+        self.missing_left = (np.asarray(missing_left, dtype=bool) if missing_left is not None
+                             else np.zeros(len(self.feature), dtype=bool))
+        self._category_codes = None
+        self._probabilities = None
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    def children(self, node: int) -> list:
+        """Filhos de um nó, em ordem crescente de índice."""
+        if self.cat_offset[node] >= 0 and self.left[node] < 0:
+            offset = self.cat_offset[node]
+            table = self.cat_table[offset:offset + len(self.categories[self.feature[node]]) + 1]
+            return sorted(set(table[table >= 0].tolist()))
+        return [int(child) for child in (self.left[node], self.right[node]) if child >= 0]
+
+    def subtree_end(self) -> np.ndarray:
+        """
+        Os nós estão em pré-ordem, então a sub-árvore de `i` ocupa o intervalo
+        contíguo [i, subtree_end[i]).
+        """
+        end = np.arange(1, self.n_nodes + 1)
+        for node in reversed(range(self.n_nodes)):
+            for child in self.children(node):
+                end[node] = max(end[node], end[child])
+        return end
+
+    def depths(self) -> np.ndarray:
+        """Profundidade de cada nó (a raiz tem profundidade 0)."""
+        depth = np.zeros(self.n_nodes, dtype=np.intp)
+        for node in range(self.n_nodes):
+            depth[self.children(node)] = depth[node] + 1
+        return depth
+
+    def truncate(self, max_depth: int) -> 'CompiledTree':
+        """
+        Corta a árvore na profundidade `max_depth`: os nós internos nessa
+        profundidade viram folhas. Sem poda nem sorteios de atributos, é a
+        mesma árvore que um novo treino com `max_depth` produziria.
+        """
+        cut = np.flatnonzero((self.depths() == max_depth) & (self.feature >= 0))
+        return self.prune(cut) if len(cut) else self
+
+    def prune(self, nodes) -> 'CompiledTree':
+        """
+        Transforma os nós dados em folhas (que passam a prever a classe
+        majoritária de `counts`) e compacta os arrays, removendo as
+        sub-árvores podadas e renumerando os nós restantes em pré-ordem.
+        """
+        end = self.subtree_end()
+        keep = np.ones(self.n_nodes, dtype=bool)
+        collapsed = np.zeros(self.n_nodes, dtype=bool)
+        for node in sorted(nodes):
+            if keep[node]:
+                collapsed[node] = True
+                keep[node + 1:end[node]] = False
+        new_id = np.where(keep, np.cumsum(keep) - 1, -1)
+        internal = keep & ~collapsed & (self.feature >= 0)
+
+        def remap(children):
+            return np.where(internal & (children >= 0), new_id[children], -1)[keep]
+
+        cat_offset = np.full(self.n_nodes, -1, dtype=np.intp)
+        cat_table = []
+        for node in np.flatnonzero(internal & (self.cat_offset >= 0)):
+            offset = self.cat_offset[node]
+            table = self.cat_table[offset:offset + len(self.categories[self.feature[node]]) + 1]
+            cat_offset[node] = len(cat_table)
+            cat_table.extend(np.where(table >= 0, new_id[table], -1))
+
+        value = self.value.copy()
+        value[collapsed] = np.argmax(self.counts[collapsed], axis=1)
+        feature = np.where(internal, self.feature, -1)[keep]
+        threshold = np.where(internal, self.threshold, np.nan)[keep]
+        return CompiledTree(feature, threshold, remap(self.left), remap(self.right), cat_offset[keep], cat_table,
+                            value[keep], self.feature_names, self.is_categorical, self.categories, self.classes,
+                            self.bin_edges, self.counts[keep], self.missing_left[keep] & internal[keep])
+
+    def encode(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Converte X na mesma matriz numérica usada no treino: colunas contínuas
+        em float64 e categóricas nos códigos do vocabulário de treino
+        (-1 para categorias desconhecidas ou colunas ausentes).
+        """
+        import pandas as pd
+        encoded = np.empty((len(X), len(self.feature_names)), dtype=np.float64, order='F')
+        for j, column in enumerate(self.feature_names):
+            if column not in X.columns:
+                encoded[:, j] = -1 if self.is_categorical[j] else np.nan
+            elif self.is_categorical[j] and self.bin_edges[j] is not None:
+                values = X[column].to_numpy(dtype=np.float64)
+                codes = np.searchsorted(self.bin_edges[j], values, side='left')
+                encoded[:, j] = np.where(np.isnan(values), -1, codes)
+            elif self.is_categorical[j]:
+                encoded[:, j] = pd.Index(self.categories[j]).get_indexer(X[column])
+            else:
+                encoded[:, j] = X[column].to_numpy(dtype=np.float64)
+        return encoded
+
+    def encode_records(self, records: list) -> np.ndarray:
+        """
+        Como `encode`, mas a partir de uma lista de dicionários {atributo: valor}
+        (por exemplo, linhas JSON), sem construir um DataFrame. Atributos
+        ausentes ou None são tratados como valores faltantes.
+        """
+        encoded = np.empty((len(records), len(self.feature_names)), dtype=np.float64, order='F')
+        for j, column in enumerate(self.feature_names):
+            encoded[:, j] = self._encode_column(j, [record.get(column) for record in records])
+        return encoded
+
+    def encode_rows(self, rows) -> np.ndarray:
+        """
+        Como `encode`, mas a partir de linhas com os valores na ordem de
+        `feature_names`: uma lista de listas/tuplas ou um array 2D (de dtype
+        object quando há atributos categóricos de texto). None e NaN são
+        tratados como valores faltantes.
+        """
+        if isinstance(rows, np.ndarray) and rows.dtype != object:
+            columns = rows.astype(np.float64, copy=False).T
+        else:
+            columns = list(zip(*rows)) if len(rows) else [()] * len(self.feature_names)
+        if len(columns) != len(self.feature_names):
+            raise ValueError(f"As linhas têm {len(columns)} valores; o modelo espera {len(self.feature_names)}")
+        encoded = np.empty((len(rows), len(self.feature_names)), dtype=np.float64, order='F')
+        for j, values in enumerate(columns):
+            encoded[:, j] = self._encode_column(j, values)
+        return encoded
+
+    def category_codes(self) -> list:
+        """Dicionário {categoria: código} de cada atributo categórico (None nos demais), criado uma vez."""
+        if self._category_codes is None:
+            self._category_codes = [None if values is None else {value: code for code, value in enumerate(values)}
+                                    for values in self.categories]
+        return self._category_codes
+
+    def _encode_column(self, j: int, values) -> np.ndarray:
+        """Códigos (categóricos) ou floats (contínuos) de uma sequência de valores brutos do atributo j."""
+        if self.is_categorical[j] and self.bin_edges[j] is None:
+            codes = self.category_codes()[j]
+            return np.array([codes.get(value, -1) for value in values], dtype=np.float64)
+        if isinstance(values, np.ndarray) and values.dtype != object:
+            values = values.astype(np.float64, copy=False)
+        else:
+            values = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        if self.is_categorical[j]:
+            codes = np.searchsorted(self.bin_edges[j], values, side='left')
+            return np.where(np.isnan(values), -1, codes)
+        return values
+
+    def apply(self, X_encoded: np.ndarray) -> np.ndarray:
+        """
+        Roteia o lote inteiro pela árvore, um nível por vez, com máscaras NumPy.
+
+        A cada nível, as linhas que chegaram a um nó interno são divididas
+        entre os filhos por uma única máscara vetorizada sobre a coluna do
+        atributo testado; nenhuma linha é visitada individualmente em Python.
+
+        Returns:
+            O índice do nó em que cada exemplo termina (uma folha ou, no caso
+            de categoria sem ramo, o nó interno cujo fallback será usado).
+        """
+        n_samples = len(X_encoded)
+        node_of = np.zeros(n_samples, dtype=np.intp)
+        # Índices de linha em int32 reduzem pela metade o tráfego de memória
+        index_dtype = np.int32 if n_samples < np.iinfo(np.int32).max else np.intp
+        frontier = [(0, np.arange(n_samples, dtype=index_dtype))]
+
+        while frontier:
+            next_frontier = []
+            for node, rows in frontier:
+                feature = self.feature[node]
+                if feature < 0 or not rows.size:
+                    node_of[rows] = node
+                    continue
+
+                values = X_encoded[:, feature].take(rows)
+                if self.cat_offset[node] < 0:
+                    # Teste contínuo: x <= limiar vai para a esquerda; NaN segue a direção aprendida
+                    goes_left = values <= self.threshold[node]
+                    if self.missing_left[node]:
+                        goes_left |= np.isnan(values)
+                    next_frontier.append((self.left[node], rows.take(np.flatnonzero(goes_left))))
+                    next_frontier.append((self.right[node], rows.take(np.flatnonzero(~goes_left))))
+                    continue
+
+                # Teste categórico: consulta direta na tabela de roteamento
+                destination = self.cat_table[self.cat_offset[node] + values.astype(np.intp) + 1]
+                if self.left[node] >= 0:
+                    goes_left = destination == self.left[node]
+                    next_frontier.append((self.left[node], rows.take(np.flatnonzero(goes_left))))
+                    next_frontier.append((self.right[node], rows.take(np.flatnonzero(~goes_left))))
+                    continue
+                order = np.argsort(destination, kind='stable')
+                children, starts = np.unique(destination[order], return_index=True)
+                for child, group in zip(children, np.split(rows[order], starts[1:])):
+                    if child < 0:
+                        node_of[group] = node
+                    else:
+                        next_frontier.append((child, group))
+            frontier = next_frontier
+
+        return node_of
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """Prediz as classes de todas as linhas de X em lote."""
+        return self.classes[self.value[self.apply(self.encode(X))]]
+
+    def probabilities(self) -> np.ndarray:
+        """
+        Distribuição de classes de cada nó (linhas de `counts` normalizadas),
+        calculada uma vez e reaproveitada. Nós sem exemplos recebem a
+        distribuição uniforme.
+        """
+        if self._probabilities is None:
+            totals = self.counts.sum(axis=1, keepdims=True)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self._probabilities = np.where(totals > 0, self.counts / totals, 1.0 / self.counts.shape[1])
+        return self._probabilities
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Probabilidades por classe (colunas na ordem de `classes`): a
+        distribuição de treino do nó em que cada linha termina. Uma categoria
+        sem ramo para no nó interno e recebe a distribuição dele.
+        """
+        return self.probabilities()[self.apply(self.encode(X))]
+
+    def predict_records(self, records: list) -> np.ndarray:
+        """Prediz uma lista de dicionários {atributo: valor} em lote (ver `encode_records`)."""
+        return self.classes[self.value[self.apply(self.encode_records(records))]]
+
+    def to_dict(self, node: int = 0):
+        """
+        Reconstrói a representação em dicionários aninhados (a mesma de
+        `tree_`), útil para exibir a árvore no notebook. Usa uma pilha
+        explícita, sem limite de profundidade de recursão.
+        """
+        result = {}
+        stack = [(node, result, None)]
+        while stack:
+            node, container, key = stack.pop()
+            feature = self.feature[node]
+            if feature < 0:
+                container[key] = self.classes[self.value[node]]
+                continue
+
+            feature_name = self.feature_names[feature]
+            branches = {}
+            if self.cat_offset[node] < 0:
+                container[key] = {f"{feature_name} <= {self.threshold[node]:.2f}": branches}
+                children = [('True', self.left[node]), ('False', self.right[node])]
+            elif self.left[node] >= 0:
+                table = self._category_table(node)
+                left_values = {self.categories[feature][code] for code in np.flatnonzero(table == self.left[node])}
+                container[key] = {f"{feature_name} in {left_values}": branches}
+                children = [('True', self.left[node]), ('False', self.right[node])]
+            else:
+                # Multi-ramos: ramos na ordem em que os filhos foram criados
+                table = self._category_table(node)
+                container[key] = {feature_name: branches}
+                children = [(self.categories[feature][code], child)
+                            for child, code in sorted((child, code) for code, child in enumerate(table) if child >= 0)]
+
+            # As chaves são criadas já na ordem final; os filhos as preenchem depois
+            for branch, child in children:
+                branches[branch] = None
+            stack.extend((child, branches, branch) for branch, child in reversed(children))
+        return result[None]
+
+    def _category_table(self, node: int) -> np.ndarray:
+        """Tabela de roteamento do nó, sem a entrada das categorias desconhecidas."""
+        offset = self.cat_offset[node] + 1
+        return self.cat_table[offset:offset + len(self.categories[self.feature[node]])]
+
+
+class CompiledTreeMixin:
+    """
+    Métodos comuns aos estimadores cuja árvore treinada fica em `compiled_`
+    (ID3, C45, CART e CARTRegressor).
+    """
+    @property
+    def tree_(self):
+        """Representação em dicionários aninhados (para exibição), gerada a partir da árvore compilada."""
+        return None if self.compiled_ is None else self.compiled_.to_dict()
+
+    def save(self, path: str):
+        """Grava a árvore treinada em `path`, no formato binário de `serialization`."""
+        from . import serialization
+        serialization.save_estimator(self, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False):
+        """
+        Carrega uma árvore gravada por `save`.
+
+        Args:
+            path: Caminho do arquivo.
+            mmap: Se True, os arrays dos nós são mapeados do arquivo em vez de
+                lidos: processos que carregam o mesmo modelo compartilham uma
+                única cópia na memória.
+        """
+        from . import serialization
+        return serialization.load_estimator(cls, path, mmap)
+
+    def export_function(self, path: str = None, vectorized: bool = False):
+        """
+        Gera o código da árvore treinada e o compila em uma função nativa.
+
+        Args:
+            path: Se informado, grava também um módulo Python autônomo (sem
+                dependência desta biblioteca) com a função gerada.
+            vectorized: Se False, devolve `predict_one(row)`, que recebe um
+                dicionário {atributo: valor}; se True, `predict_batch(X)`, que
+                recebe um DataFrame ou um dicionário de colunas.
+
+        Returns:
+            A função gerada, com o código-fonte em `.source`.
+        """
+        from . import codegen
+        if self.compiled_ is None:
+            raise ValueError("O modelo ainda não foi treinado.")
+        return codegen.export_function(self.compiled_, path, vectorized)
+
+
+class CompiledClassifierMixin(CompiledTreeMixin):
+    """Métodos comuns aos classificadores (ID3, C45 e CART)."""
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Probabilidades por classe (colunas na ordem de `classes_`), lidas das
+        contagens de treino guardadas em cada nó da árvore compilada.
+        """
+        return self.compiled_.predict_proba(X)
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return None if self.compiled_ is None else self.compiled_.classes
+
+    def update(self, X_new: pd.DataFrame, y_new: pd.Series):
+        """
+        Atualiza a árvore (treinada com `incremental=True`) com as linhas
+        novas, reavaliando só os nós que elas alcançam e crescendo de novo só
+        as sub-árvores cuja divisão mudou (ver `incremental`). As estatísticas
+        de reaproveitamento ficam em `update_stats_`.
+        """
+        from . import incremental
+        return incremental.update(self, X_new, y_new)
+
+
+class TreeBuilder:
+    """
+    Acumula os nós durante o treinamento e gera a CompiledTree ao final.
+
+    Os nós podem ser criados em qualquer ordem (em profundidade ou pela
+    fila de prioridade do crescimento melhor-primeiro); cada filho é ligado
+    ao pai com `attach`. `build` renumera os nós em pré-ordem: um nó sempre
+    antecede seus filhos e cada sub-árvore ocupa um intervalo contíguo.
+    """
+    def __init__(self, data):
+        self._data = data
+        self.feature = []
+        self.threshold = []
+        self.left = []
+        self.right = []
+        self.value = []
+        self.counts = []
+        self.missing = []
+        self._routes = []
+        self.node_order = None
+
+    def _add_node(self, feature, value, counts, threshold=np.nan, route=None, missing=None) -> int:
+        self.feature.append(feature)
+        self.threshold.append(threshold)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.value.append(value)
+        self.counts.append(counts)
+        self.missing.append(missing)
+        self._routes.append(route)
+        return len(self.feature) - 1
+
+    def add_leaf(self, value: int, counts: np.ndarray) -> int:
+        """Adiciona uma folha que prediz a classe de índice `value`; `counts` são as contagens do nó."""
+        return self._add_node(-1, value, counts)
+
+    def add_threshold_split(self, feature: int, threshold: float, value: int, counts: np.ndarray,
+                            missing_left: bool = False) -> int:
+        """
+        Adiciona um teste contínuo `x <= threshold` (filhos ligados depois, com
+        os lados 0 e 1); valores ausentes vão para a esquerda se `missing_left`.
+        """
+        return self._add_node(feature, value, counts, threshold, missing=bool(missing_left))
+
+    def add_subset_split(self, feature: int, left_codes, value: int, counts: np.ndarray,
+                         missing_left: bool = False) -> int:
+        """
+        Adiciona um teste de subconjunto: os códigos em `left_codes` vão para o
+        lado 0 (esquerdo) e o resto para o 1. Valores ausentes e categorias
+        desconhecidas vão para a esquerda se `missing_left`, senão para a direita.
+        """
+        return self._add_node(feature, value, counts, route={int(code) for code in left_codes},
+                              missing=bool(missing_left))
+
+    def add_category_split(self, feature: int, codes, value: int, counts: np.ndarray, missing_code: int = None) -> int:
+        """
+        Adiciona uma divisão multi-ramos, com um ramo por código em `codes`
+        (na ordem dada). Valores ausentes e categorias desconhecidas seguem o
+        ramo de `missing_code`; sem ele, param no nó, como as categorias sem ramo.
+        """
+        return self._add_node(feature, value, counts, route={int(code): -1 for code in codes},
+                              missing=None if missing_code is None else int(missing_code))
+
+    def attach(self, parent: int, side, child: int):
+        """Liga `child` ao pai: `side` é 0/1 nos testes binários ou o código da categoria."""
+        if isinstance(self._routes[parent], dict):
+            self._routes[parent][int(side)] = child
+        elif side == 0:
+            self.left[parent] = child
+        else:
+            self.right[parent] = child
+
+    def children(self, node: int) -> list:
+        """Filhos de um nó, na ordem dos ramos."""
+        if isinstance(self._routes[node], dict):
+            return list(self._routes[node].values())
+        return [child for child in (self.left[node], self.right[node]) if child >= 0]
+
+    def build(self, classes=None) -> CompiledTree:
+        """
+        Gera a CompiledTree. `classes` substitui as classes dos dados (na
+        regressão, as predições dos nós, indexadas por `value`).
+        """
+        data = self._data
+        n_nodes = len(self.feature)
+        # Renumeração em pré-ordem (percurso em profundidade sem recursão)
+        order, stack = [], [0]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(reversed(self.children(node)))
+        order = np.asarray(order, dtype=np.intp)
+        new_id = np.full(n_nodes + 1, -1, dtype=np.intp) # new_id[-1] = -1 mantém "sem filho"
+        new_id[order] = np.arange(len(order))
+        self.node_order = new_id[:n_nodes]
+
+        cat_offset = np.full(len(order), -1, dtype=np.intp)
+        cat_table = []
+        for position, node in enumerate(order):
+            route = self._routes[node]
+            if route is None:
+                continue
+            n_categories = len(data.categories[self.feature[node]])
+            if isinstance(route, dict):
+                table = [-1] * (n_categories + 1)
+                for code, child in route.items():
+                    table[code + 1] = new_id[child]
+                if self.missing[node] is not None:
+                    table[0] = table[self.missing[node] + 1]
+            else:
+                table = [new_id[self.right[node]]] * (n_categories + 1)
+                for code in route:
+                    table[code + 1] = new_id[self.left[node]]
+                if self.missing[node]:
+                    table[0] = new_id[self.left[node]]
+            cat_offset[position] = len(cat_table)
+            cat_table.extend(table)
+
+        def reorder(values):
+            return np.asarray(values)[order]
+
+        counts = np.array(self.counts, dtype=np.float64).reshape(n_nodes, -1)
+        # Direção dos ausentes nos testes contínuos (nos categóricos, já está na tabela)
+        missing_left = [self.missing[node] is True and self._routes[node] is None for node in order]
+        return CompiledTree(reorder(self.feature), reorder(self.threshold), new_id[reorder(self.left)],
+                            new_id[reorder(self.right)], cat_offset, cat_table, reorder(self.value),
+                            data.feature_names, data.is_categorical, data.categories,
+                            data.classes if classes is None else classes,
+                            data.bin_edges, counts[order], missing_left)
@@ -1,5 +1,17 @@
+from __future__ import annotations
+import heapq
+from typing import TYPE_CHECKING
 import numpy as np
-import pandas as pd
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+def _encode(values) -> tuple:
+    """Códigos inteiros 0..k-1 de um vetor de valores (NaN é descartado) e k."""
+    import pandas as pd
+    codes, uniques = pd.factorize(np.asarray(values))
+    return codes, len(uniques)
+
 
 def calculate_entropy(y: pd.Series) -> float:
     """
@@ -14,16 +26,8 @@ def calculate_entropy(y: pd.Series) -> float:
     Returns:
         O valor da entropia como um float.
     """
-    # Conta a ocorrência de cada classe
-    class_counts = y.value_counts()
-    
-    # Calcula a probabilidade de cada classe
-    probabilities = class_counts / len(y)
-    
-    # Calcula a entropia
-    entropy = -np.sum(probabilities * np.log2(probabilities))
-    
-    return entropy
+    codes, n_classes = _encode(y)
+    return entropy_from_counts(label_counts(codes[codes >= 0], n_classes))
 
 def calculate_gini_index(y: pd.Series) -> float:
     """
@@ -38,13 +42,15 @@ def calculate_gini_index(y: pd.Series) -> float:
     Returns:
         O valor do índice de Gini como um float.
     """
-    class_counts = y.value_counts()
-    probabilities = class_counts / len(y)
-    
-    # Calcula o Gini
-    gini = 1 - np.sum(probabilities**2)
-    
-    return gini
+    codes, n_classes = _encode(y)
+    return gini_from_counts(label_counts(codes[codes >= 0], n_classes))
+
+def _attribute_counts(data: pd.DataFrame, attribute_name: str, target_name: str) -> np.ndarray:
+    """Matriz (valores do atributo, classes) de contagens, montada em uma única passada."""
+    attribute_codes, n_values = _encode(data[attribute_name])
+    target_codes, n_classes = _encode(data[target_name])
+    known = (attribute_codes >= 0) & (target_codes >= 0)
+    return partition_counts(attribute_codes[known], target_codes[known], n_values, n_classes)
 
 def calculate_information_gain(data: pd.DataFrame, attribute_name: str, target_name: str) -> float:
     """
@@ -59,22 +65,7 @@ def calculate_information_gain(data: pd.DataFrame, attribute_name: str, target_n
     Returns:
         O ganho de informação como um float.
     """
-    # 1. Calcular a entropia total do conjunto de dados
-    total_entropy = calculate_entropy(data[target_name])
-    
-    # 2. Calcular a entropia ponderada para o atributo
-    weighted_entropy = 0
-    unique_values = data[attribute_name].unique()
-    
-    for value in unique_values:
-        subset = data[data[attribute_name] == value]
-        weight = len(subset) / len(data)
-        subset_entropy = calculate_entropy(subset[target_name])
-        weighted_entropy += weight * subset_entropy
-        
-    # 3. Retornar a diferença
-    information_gain = total_entropy - weighted_entropy
-    return information_gain
+    return partition_gain(_attribute_counts(data, attribute_name, target_name), 'entropy')
 
 def calculate_gain_ratio(data: pd.DataFrame, attribute_name: str, target_name: str) -> float:
     """
@@ -89,21 +80,469 @@ def calculate_gain_ratio(data: pd.DataFrame, attribute_name: str, target_name: s
     Returns:
         A razão de ganho como um float.
     """
-    # 1. Calcular o Ganho de Informação
-    information_gain = calculate_information_gain(data, attribute_name, target_name)
+    # Ganho e Split Info saem da mesma matriz de contagens
+    counts = _attribute_counts(data, attribute_name, target_name)
+    information_gain = partition_gain(counts, 'entropy')
+    split_info = entropy_from_counts(counts.sum(axis=1))
     
-    # 2. Calcular o Split Info do atributo
-    attribute_counts = data[attribute_name].value_counts()
-    attribute_probabilities = attribute_counts / len(data)
-    split_info = -np.sum(attribute_probabilities * np.log2(attribute_probabilities))
-    
-    # 3. Evitar divisão por zero
+    # Evitar divisão por zero
     if split_info == 0:
         return 0
         
-    # 4. Retornar a razão
-    gain_ratio = information_gain / split_info
-    return gain_ratio
+    return information_gain / split_info
+
+def entropy_from_counts(counts: np.ndarray) -> np.ndarray:
+    """
+    Entropia de cada linha de uma matriz de contagens por classe.
+    Linhas vazias têm entropia 0 (convenção 0 * log2(0) = 0).
+    """
+    totals = counts.sum(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probabilities = np.where(totals > 0, counts / totals, 0.0)
+        log_p = np.where(probabilities > 0, np.log2(probabilities), 0.0)
+    return -np.sum(probabilities * log_p, axis=-1)
+
+
+def gini_from_counts(counts: np.ndarray) -> np.ndarray:
+    """
+    Índice de Gini de cada linha de uma matriz de contagens por classe.
+    """
+    totals = counts.sum(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probabilities = np.where(totals > 0, counts / totals, 0.0)
+    return 1 - np.sum(probabilities**2, axis=-1)
+
+
+_IMPURITY_FROM_COUNTS = {
+    'entropy': entropy_from_counts,
+    'gini': gini_from_counts,
+}
+
+
+# --- NÚCLEOS SOBRE CONTAGENS ---
+# Rótulos codificados como inteiros 0..k-1 viram contagens com `np.bincount`;
+# as funções abaixo avaliam muitas partições de uma vez a partir de matrizes
+# de contagens, e a impureza do nó pai pode ser passada já calculada.
+
+def label_counts(labels: np.ndarray, n_classes: int) -> np.ndarray:
+    """Contagem de cada classe em um vetor de rótulos codificados 0..n_classes-1."""
+    return np.bincount(labels, minlength=n_classes)
+
+
+def partition_counts(groups: np.ndarray, labels: np.ndarray, n_groups: int, n_classes: int) -> np.ndarray:
+    """
+    Matriz (n_groups, n_classes) de contagens por (grupo, classe), em uma única
+    chamada a `np.bincount`.
+
+    Args:
+        groups: Código 0..n_groups-1 do grupo (ramo, categoria) de cada exemplo.
+        labels: Rótulos codificados 0..n_classes-1.
+    """
+    counts = np.bincount(groups * n_classes + labels, minlength=n_groups * n_classes)
+    return counts.reshape(n_groups, n_classes)
+
+
+def split_gains(parent_counts: np.ndarray, left_counts: np.ndarray, criterion: str = 'entropy',
+                parent_impurity: float = None) -> np.ndarray:
+    """
+    Ganho de cada divisão binária candidata de um nó.
+
+    Args:
+        parent_counts: Contagens por classe do nó (ou uma pilha delas, que
+            é combinada com `left_counts` por broadcasting).
+        left_counts: Matriz (candidatos, classes) com as contagens do lado
+            esquerdo de cada candidato; o lado direito é o complemento.
+        criterion: 'entropy' (Ganho de Informação) ou 'gini' (Ganho Gini).
+        parent_impurity: Impureza do nó, se já calculada.
+
+    Returns:
+        Array com o ganho de cada candidato.
+    """
+    impurity = _IMPURITY_FROM_COUNTS[criterion]
+    if parent_impurity is None:
+        parent_impurity = impurity(parent_counts)
+    n_total = parent_counts.sum(axis=-1)
+    n_left = left_counts.sum(axis=-1)
+    weighted_impurity = (n_left * impurity(left_counts) +
+                         (n_total - n_left) * impurity(parent_counts - left_counts)) / n_total
+    return parent_impurity - weighted_impurity
+
+
+def partition_gain(counts: np.ndarray, criterion: str = 'entropy', parent_impurity: float = None) -> float:
+    """
+    Ganho de uma divisão multi-ramos a partir da matriz (ramos, classes) de
+    contagens: impureza do nó menos a impureza média ponderada dos ramos.
+    """
+    impurity = _IMPURITY_FROM_COUNTS[criterion]
+    if parent_impurity is None:
+        parent_impurity = impurity(counts.sum(axis=0))
+    branch_sizes = counts.sum(axis=1)
+    weights = branch_sizes / branch_sizes.sum()
+    return parent_impurity - np.sum(weights * impurity(counts))
+
+
+def best_threshold_sweep(values: np.ndarray, labels: np.ndarray, criterion: str = 'entropy',
+                         n_classes: int = None, min_samples_leaf: int = 1, parent_impurity: float = None) -> tuple:
+    """
+    Motor de busca de limiar para atributos contínuos em uma única varredura.
+
+    Ordena a coluna uma única vez (argsort), acumula as contagens por classe
+    ao longo da ordem (histogramas cumulativos) e avalia TODOS os pontos médios
+    candidatos de forma vetorizada, sem criar subconjuntos do DataFrame.
+    Custo O(n log n) por atributo, contra O(n²) da varredura ingênua.
+
+    Args:
+        values: Array com os valores do atributo contínuo.
+        labels: Array com os rótulos da classe (qualquer tipo).
+        criterion: 'entropy' (Ganho de Informação) ou 'gini' (Ganho Gini).
+        n_classes: Se informado, `labels` já está codificado como inteiros
+            0..n_classes-1 e a recodificação é dispensada.
+        min_samples_leaf: Número mínimo de exemplos em cada lado do corte.
+        parent_impurity: Impureza do nó, se já calculada.
+
+    Returns:
+        Uma tupla (melhor_limiar, maior_ganho). Se não houver ao menos dois
+        valores distintos (ou nenhum corte respeitar `min_samples_leaf`),
+        retorna (None, -1), como as funções originais.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n < 2:
+        return None, -1
+
+    # Rótulos codificados como inteiros 0..k-1
+    if n_classes is None:
+        _, label_codes = np.unique(np.asarray(labels), return_inverse=True)
+        label_codes = label_codes.ravel()
+        n_classes = label_codes.max() + 1
+    else:
+        label_codes = labels
+
+    order = np.argsort(values, kind='mergesort')
+    sorted_values = values[order]
+
+    # Contagens acumuladas por classe: left_counts[i] = classes de sorted[:i+1]
+    one_hot = np.zeros((n, n_classes), dtype=np.float64)
+    one_hot[np.arange(n), label_codes[order]] = 1
+    left_counts = np.cumsum(one_hot, axis=0)[:-1]
+    total_counts = left_counts[-1] + one_hot[-1]
+
+    # Candidatos válidos: apenas entre valores distintos consecutivos
+    # (NaN fica no fim da ordenação e nunca vira limiar)
+    candidates = np.flatnonzero((sorted_values[:-1] != sorted_values[1:]) & ~np.isnan(sorted_values[1:]))
+    if min_samples_leaf > 1:
+        candidates = candidates[(candidates + 1 >= min_samples_leaf) & (n - candidates - 1 >= min_samples_leaf)]
+    if len(candidates) == 0:
+        return None, -1
+
+    gains = split_gains(total_counts, left_counts[candidates], criterion, parent_impurity)
+
+    # Primeiro máximo (com tolerância a ruído de ponto flutuante), o mesmo
+    # desempate da varredura original, que só troca de limiar com ganho maior
+    best = np.flatnonzero(gains >= gains.max() - 1e-12)[0]
+    position = candidates[best]
+    threshold = (sorted_values[position] + sorted_values[position + 1]) / 2
+    return threshold, gains[best]
+
+
+def best_threshold_missing(values: np.ndarray, labels: np.ndarray, criterion: str = 'gini',
+                           n_classes: int = None, min_samples_leaf: int = 1, parent_impurity: float = None) -> tuple:
+    """
+    Como `best_threshold_sweep`, mas com direção aprendida para os valores
+    ausentes (NaN): cada corte entre valores conhecidos é avaliado com os
+    ausentes do lado esquerdo e do direito, e o melhor dos dois é mantido.
+
+    Args:
+        values: Array com os valores do atributo contínuo (pode ter NaN).
+        labels: Rótulos codificados 0..n_classes-1.
+        criterion: 'entropy' ou 'gini'.
+        n_classes: Número de classes.
+        min_samples_leaf: Número mínimo de exemplos conhecidos em cada lado.
+        parent_impurity: Impureza do nó (com os ausentes), se já calculada.
+
+    Returns:
+        Uma tupla (melhor_limiar, maior_ganho, ausentes_a_esquerda); sem
+        corte válido, (None, -1, False).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    missing_counts = label_counts(labels[missing], n_classes)
+    known_values, known_labels = values[~missing], labels[~missing]
+    n = len(known_values)
+    if n < 2:
+        return None, -1, False
+
+    order = np.argsort(known_values, kind='mergesort')
+    sorted_values = known_values[order]
+    one_hot = np.zeros((n, n_classes), dtype=np.float64)
+    one_hot[np.arange(n), known_labels[order]] = 1
+    left_counts = np.cumsum(one_hot, axis=0)[:-1]
+    total_counts = left_counts[-1] + one_hot[-1] + missing_counts
+
+    candidates = np.flatnonzero(sorted_values[:-1] != sorted_values[1:])
+    if min_samples_leaf > 1:
+        candidates = candidates[(candidates + 1 >= min_samples_leaf) & (n - candidates - 1 >= min_samples_leaf)]
+    if len(candidates) == 0:
+        return None, -1, False
+
+    gains = split_gains(total_counts, left_counts[candidates], criterion, parent_impurity)
+    gains_missing_left = split_gains(total_counts, left_counts[candidates] + missing_counts, criterion,
+                                     parent_impurity)
+    # Empate: os ausentes ficam à direita
+    missing_left = gains_missing_left > gains + 1e-12
+    gains = np.where(missing_left, gains_missing_left, gains)
+    best = np.flatnonzero(gains >= gains.max() - 1e-12)[0]
+    position = candidates[best]
+    threshold = (sorted_values[position] + sorted_values[position + 1]) / 2
+    return threshold, gains[best], bool(missing_left[best])
+
+
+def best_histogram_splits(histogram: np.ndarray, criterion: str = 'entropy', min_samples_leaf: int = 1,
+                          parent_impurity: float = None, missing: str = 'right') -> tuple:
+    """
+    Melhor limiar de cada atributo a partir dos histogramas de um nó (modo
+    histograma, no estilo do LightGBM / HistGradientBoosting).
+
+    Em vez de reordenar os valores brutos, acumula as contagens por classe
+    ao longo dos bins e avalia todos os cortes "bin <= b" de todos os
+    atributos de uma só vez. O último bin guarda os valores ausentes, que
+    nunca são cortados; `missing` define como eles entram na avaliação:
+    - 'right': ficam sempre do lado direito;
+    - 'known': ficam de fora, e o ganho calculado sobre os valores conhecidos
+      é multiplicado pela fração de conhecidos (como no C4.5);
+    - 'learn': cada corte é avaliado com os ausentes em cada lado, e o
+      melhor lado é escolhido (direção aprendida, como no XGBoost).
+
+    Args:
+        histogram: Array (atributos, bins, classes) de contagens do nó.
+        criterion: 'entropy' ou 'gini'.
+        min_samples_leaf: Número mínimo de exemplos em cada lado do corte.
+        parent_impurity: Impureza do nó, se já calculada.
+        missing: 'right', 'known' ou 'learn'.
+
+    Returns:
+        Uma tupla de arrays (melhor_bin, maior_ganho, n_esquerda,
+        ausentes_a_esquerda), um valor por atributo. Atributos sem corte
+        válido têm bin -1 e ganho -1; n_esquerda não inclui os ausentes.
+    """
+    scanned = histogram[:, :-1, :]
+    missing_counts = histogram[:, -1, :]
+    totals = histogram.sum(axis=1)
+    left_counts = np.cumsum(scanned, axis=1)
+    n_left = left_counts.sum(axis=2)
+    n_right = totals.sum(axis=1)[:, None] - n_left
+    has_missing = missing != 'right' and missing_counts.any()
+    if has_missing:
+        # Só valores conhecidos contam para o tamanho mínimo dos lados
+        n_right = n_right - missing_counts.sum(axis=1)[:, None]
+
+    # Um corte só é candidato logo após um bin ocupado, com os dois lados não vazios
+    valid = (scanned.sum(axis=2) > 0) & (n_left >= max(min_samples_leaf, 1)) & (n_right >= max(min_samples_leaf, 1))
+    missing_left = np.zeros(scanned.shape[:2], dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if not has_missing:
+            gains = split_gains(totals[:, None, :], left_counts, criterion, parent_impurity)
+        elif missing == 'known':
+            known = totals - missing_counts
+            fraction = known.sum(axis=1) / totals.sum(axis=1)
+            gains = fraction[:, None] * split_gains(known[:, None, :], left_counts, criterion)
+        else:
+            gains = split_gains(totals[:, None, :], left_counts, criterion, parent_impurity)
+            gains_missing_left = split_gains(totals[:, None, :], left_counts + missing_counts[:, None, :],
+                                             criterion, parent_impurity)
+            # Empate: os ausentes ficam à direita
+            missing_left = gains_missing_left > gains + 1e-12
+            gains = np.where(missing_left, gains_missing_left, gains)
+    gains = np.where(valid, gains, -np.inf)
+
+    # Primeiro máximo de cada atributo, com a mesma tolerância da varredura exata
+    max_gains = gains.max(axis=1)
+    best_bins = np.argmax(gains >= max_gains[:, None] - 1e-12, axis=1)
+    has_split = valid.any(axis=1)
+    rows = np.arange(len(gains))
+    return (np.where(has_split, best_bins, -1), np.where(has_split, max_gains, -1),
+            np.where(has_split, n_left[rows, best_bins], 0), has_split & missing_left[rows, best_bins])
+
+
+# --- NÚCLEOS DE REGRESSÃO ---
+# O alvo numérico de um grupo de exemplos é resumido pelas somas (n, soma de
+# y, soma de y²) no último eixo; somas acumuladas ao longo da coluna ordenada
+# dão o erro quadrático de todos os cortes em uma única passada.
+
+def target_sums(targets: np.ndarray) -> np.ndarray:
+    """Somas (n, soma de y, soma de y²) de um vetor de alvos numéricos."""
+    return np.array([len(targets), targets.sum(), np.dot(targets, targets)], dtype=np.float64)
+
+
+def squared_error_from_sums(sums: np.ndarray) -> np.ndarray:
+    """Soma dos quadrados dos desvios em torno da média, a partir das somas (0 em grupos vazios)."""
+    n, total, total_sq = sums[..., 0], sums[..., 1], sums[..., 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(n > 0, np.maximum(total_sq - total**2 / n, 0.0), 0.0)
+
+
+def variance_reductions(parent_sums: np.ndarray, left_sums: np.ndarray) -> np.ndarray:
+    """
+    Redução do erro quadrático médio (por exemplo do nó) de cada divisão
+    binária candidata; o lado direito é o complemento de `left_sums`.
+    """
+    return (squared_error_from_sums(parent_sums) - squared_error_from_sums(left_sums) -
+            squared_error_from_sums(parent_sums - left_sums)) / parent_sums[..., 0]
+
+
+def prefix_absolute_errors(targets: np.ndarray) -> np.ndarray:
+    """
+    Soma dos desvios absolutos em torno da mediana de cada prefixo
+    targets[:i+1], em O(n log n): dois heaps mantêm a mediana corrente e as
+    somas das duas metades.
+    """
+    low, high = [], [] # low: metade inferior (heap de máximo, negado); high: superior
+    sum_low = sum_high = 0.0
+    errors = np.empty(len(targets))
+    for i, target in enumerate(targets.tolist()):
+        if low and target > -low[0]:
+            heapq.heappush(high, target)
+            sum_high += target
+        else:
+            heapq.heappush(low, -target)
+            sum_low += target
+        # A metade inferior fica com o elemento a mais (a sua raiz é a mediana)
+        if len(low) > len(high) + 1:
+            moved = -heapq.heappop(low)
+            sum_low -= moved
+            heapq.heappush(high, moved)
+            sum_high += moved
+        elif len(high) > len(low):
+            moved = heapq.heappop(high)
+            sum_high -= moved
+            heapq.heappush(low, -moved)
+            sum_low += moved
+        median = -low[0]
+        errors[i] = median * len(low) - sum_low + sum_high - median * len(high)
+    return errors
+
+
+def _absolute_error_splits(known_targets: np.ndarray, missing_targets: np.ndarray) -> tuple:
+    """
+    Erro absoluto dos lados esquerdo e direito de cada corte i (esquerda =
+    known_targets[:i+1]), com os ausentes à direita e à esquerda.
+
+    Returns:
+        Uma tupla (esquerda, direita, esquerda_com_ausentes, direita_com_ausentes).
+    """
+    n_missing = len(missing_targets)
+    left = prefix_absolute_errors(known_targets)[:-1]
+    right = prefix_absolute_errors(known_targets[::-1])[-2::-1]
+    if not n_missing:
+        return left, right, left, right
+    # Os ausentes entram primeiro em cada varredura, e a ordem deles não altera as somas
+    left_missing = prefix_absolute_errors(np.concatenate([missing_targets, known_targets]))[n_missing:-1]
+    right_missing = prefix_absolute_errors(np.concatenate([missing_targets, known_targets[::-1]]))[-2:n_missing - 1:-1]
+    return left, right, left_missing, right_missing
+
+
+def best_threshold_regression(values: np.ndarray, targets: np.ndarray, criterion: str = 'mse',
+                              min_samples_leaf: int = 1) -> tuple:
+    """
+    Melhor limiar de um atributo contínuo para um alvo numérico, em uma
+    única varredura da coluna ordenada.
+
+    Com 'mse', as somas acumuladas de y e y² dão o erro quadrático dos dois
+    lados de todos os cortes de uma vez (os alvos são centrados na média do
+    nó antes, para evitar cancelamento numérico). Com 'mae', os erros
+    absolutos vêm de `prefix_absolute_errors` nas duas direções. Os valores
+    ausentes (NaN) são avaliados em cada lado de cada corte, e o melhor lado
+    é guardado, como em `best_threshold_missing`.
+
+    Args:
+        values: Valores do atributo contínuo.
+        targets: Alvos numéricos (float64).
+        criterion: 'mse' (redução do erro quadrático) ou 'mae' (do erro absoluto).
+        min_samples_leaf: Número mínimo de exemplos conhecidos em cada lado.
+
+    Returns:
+        Uma tupla (limiar, ganho, ausentes_a_esquerda); o ganho é a redução
+        do erro por exemplo do nó. Sem corte válido, (None, -1, False).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    missing = np.isnan(values)
+    has_missing = missing.any()
+    known = np.flatnonzero(~missing) if has_missing else np.arange(n)
+    order = known[np.argsort(values[known], kind='mergesort')]
+    sorted_values = values[order]
+    n_known = len(order)
+
+    candidates = np.flatnonzero(sorted_values[:-1] != sorted_values[1:])
+    candidates = candidates[(candidates + 1 >= max(min_samples_leaf, 1)) &
+                            (n_known - candidates - 1 >= max(min_samples_leaf, 1))]
+    if len(candidates) == 0:
+        return None, -1, False
+
+    if criterion == 'mse':
+        centered = targets - targets.mean()
+        known_targets = centered[order]
+        left_sums = np.cumsum(np.stack([np.ones(n_known), known_targets, known_targets**2], axis=1), axis=0)
+        parent_sums = target_sums(centered)
+        gains = variance_reductions(parent_sums, left_sums[candidates])
+        gains_missing_left = gains
+        if has_missing:
+            missing_sums = target_sums(centered[missing])
+            gains_missing_left = variance_reductions(parent_sums, left_sums[candidates] + missing_sums)
+    elif criterion == 'mae':
+        parent_error = np.abs(targets - np.median(targets)).sum()
+        left, right, left_missing, right_missing = _absolute_error_splits(targets[order], targets[missing])
+        # Sem mudar de lado, os ausentes ficam à direita
+        gains = (parent_error - left[candidates] - right_missing[candidates]) / n
+        gains_missing_left = (parent_error - left_missing[candidates] - right[candidates]) / n
+    else:
+        raise ValueError(f"criterion inválido: {criterion!r}")
+
+    # Empate: os ausentes ficam à direita; entre cortes, o primeiro máximo
+    missing_left = gains_missing_left > gains + 1e-12
+    gains = np.where(missing_left, gains_missing_left, gains)
+    best = np.flatnonzero(gains >= gains.max() - 1e-12)[0]
+    position = candidates[best]
+    threshold = (sorted_values[position] + sorted_values[position + 1]) / 2
+    return threshold, gains[best], bool(has_missing and missing_left[best])
+
+
+def best_histogram_regression_splits(histogram: np.ndarray, min_samples_leaf: int = 1) -> tuple:
+    """
+    Como `best_histogram_splits` (com missing='learn'), para um alvo
+    numérico: cada bin guarda as somas (n, soma de y, soma de y²) e o ganho
+    é a redução do erro quadrático.
+
+    Args:
+        histogram: Array (atributos, bins, 3) de somas do nó; o último bin
+            guarda os valores ausentes.
+        min_samples_leaf: Número mínimo de exemplos conhecidos em cada lado.
+
+    Returns:
+        Uma tupla de arrays (melhor_bin, maior_ganho, ausentes_a_esquerda),
+        um valor por atributo; bin -1 e ganho -1 sem corte válido.
+    """
+    scanned = histogram[:, :-1, :]
+    missing_sums = histogram[:, -1, :]
+    totals = histogram.sum(axis=1)
+    left_sums = np.cumsum(scanned, axis=1)
+    n_left = left_sums[..., 0]
+    n_right = (totals[:, 0] - missing_sums[:, 0])[:, None] - n_left
+
+    valid = (scanned[..., 0] > 0) & (n_left >= max(min_samples_leaf, 1)) & (n_right >= max(min_samples_leaf, 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gains = variance_reductions(totals[:, None, :], left_sums)
+        gains_missing_left = variance_reductions(totals[:, None, :], left_sums + missing_sums[:, None, :])
+    missing_left = (missing_sums[:, None, 0] > 0) & (gains_missing_left > gains + 1e-12)
+    gains = np.where(valid, np.where(missing_left, gains_missing_left, gains), -np.inf)
+
+    max_gains = gains.max(axis=1)
+    best_bins = np.argmax(gains >= max_gains[:, None] - 1e-12, axis=1)
+    has_split = valid.any(axis=1)
+    rows = np.arange(len(gains))
+    return (np.where(has_split, best_bins, -1), np.where(has_split, max_gains, -1),
+            has_split & missing_left[rows, best_bins])
+
 
 def find_best_continuous_split(data: pd.DataFrame, attribute_name: str, target_name: str) -> tuple:
     """
@@ -118,80 +557,11 @@ def find_best_continuous_split(data: pd.DataFrame, attribute_name: str, target_n
     Returns:
         Uma tupla contendo (melhor_limiar, maior_ganho_de_informacao).
     """
-    total_entropy = calculate_entropy(data[target_name])
-    unique_values = sorted(data[attribute_name].unique())
-    best_threshold = None
-    max_info_gain = -1
-
-    if len(unique_values) < 2:
-        return None, -1
-
-    for i in range(len(unique_values) - 1):
-        threshold = (unique_values[i] + unique_values[i+1]) / 2
-        
-        left_subset = data[data[attribute_name] <= threshold]
-        right_subset = data[data[attribute_name] > threshold]
-
-        # Ignorar divisões que não separam os dados
-        if len(left_subset) == 0 or len(right_subset) == 0:
-            continue
-            
-        # Calcular entropia ponderada da divisão binária
-        weight_left = len(left_subset) / len(data)
-        entropy_left = calculate_entropy(left_subset[target_name])
-        
-        weight_right = len(right_subset) / len(data)
-        entropy_right = calculate_entropy(right_subset[target_name])
-        
-        weighted_entropy = (weight_left * entropy_left) + (weight_right * entropy_right)
-        
-        # Calcular o ganho de informação para esta divisão
-        current_info_gain = total_entropy - weighted_entropy
-        
-        if current_info_gain > max_info_gain:
-            max_info_gain = current_info_gain
-            best_threshold = threshold
-            
-    return best_threshold, max_info_gain
+    return best_threshold_sweep(data[attribute_name].to_numpy(), data[target_name].to_numpy(), 'entropy')
 
 
 def find_best_continuous_split_gini(data: pd.DataFrame, attribute_name: str, target_name: str) -> tuple:
     """
     Encontra o melhor limiar para um atributo contínuo usando o Ganho Gini.
     """
-    unique_values = sorted(data[attribute_name].unique())
-    best_threshold = None
-    max_gini_gain = -1
-
-    if len(unique_values) < 2:
-        return None, -1
-
-    # Gini do nó pai
-    parent_gini = calculate_gini_index(data[target_name])
-
-    for i in range(len(unique_values) - 1):
-        threshold = (unique_values[i] + unique_values[i+1]) / 2
-        
-        left_subset = data[data[attribute_name] <= threshold]
-        right_subset = data[data[attribute_name] > threshold]
-
-        if len(left_subset) == 0 or len(right_subset) == 0:
-            continue
-            
-        # Gini ponderado dos filhos
-        gini_left = calculate_gini_index(left_subset[target_name])
-        gini_right = calculate_gini_index(right_subset[target_name])
-        
-        weight_left = len(left_subset) / len(data)
-        weight_right = len(right_subset) / len(data)
-        
-        weighted_gini_children = (weight_left * gini_left) + (weight_right * gini_right)
-        
-        # Ganho Gini = Gini(pai) - Gini_ponderado(filhos)
-        current_gini_gain = parent_gini - weighted_gini_children
-        
-        if current_gini_gain > max_gini_gain:
-            max_gini_gain = current_gini_gain
-            best_threshold = threshold
-            
-    return best_threshold, max_gini_gain
\ No newline at end of file
+    return best_threshold_sweep(data[attribute_name].to_numpy(), data[target_name].to_numpy(), 'gini')
@@ -0,0 +1,10 @@
+import numpy as np
+
+FIELDS = ('feature', 'threshold', 'left', 'right', 'cat_offset', 'cat_table', 'value', 'counts', 'missing_left')
+
+
+def assert_same_tree(a, b, fields=FIELDS):
+    """Compara, campo a campo, as árvores compiladas de dois estimadores (ou duas `CompiledTree`)."""
+    a, b = getattr(a, 'compiled_', a), getattr(b, 'compiled_', b)
+    for field in fields:
+        np.testing.assert_array_equal(getattr(a, field), getattr(b, field), err_msg=field)
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+from decision_tree_lib import fit_sharded
+from decision_tree_lib.c45 import C45
+from decision_tree_lib.cart import CART
+from conftest import assert_same_tree
+
+
+@pytest.fixture(scope='module')
+def frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 900
+    df = pd.DataFrame({'a': rng.normal(size=n), 'b': rng.choice(['x', 'y', 'z'], n),
+                       'c': rng.integers(0, 50, n).astype(float)})
+    df.loc[rng.random(n) < 0.05, 'a'] = np.nan
+    df['t'] = np.where(df['a'].fillna(0) + (df['b'] == 'x') > 0.5, 'p', 'n')
+    return df
+
+
+@pytest.mark.parametrize('cls', [C45, CART])
+def test_fit_sharded_matches_fit(frame, cls):
+    shards = [frame.iloc[:300], frame.iloc[300:650], frame.iloc[650:]]
+    sharded = fit_sharded(cls(max_bins=32, max_depth=5), shards, 't')
+    single = cls(max_bins=32, max_depth=5).fit(frame.drop(columns='t'), frame['t'])
+    assert_same_tree(sharded, single)
+
+
+@pytest.mark.parametrize('estimator', [CART(), CART(max_bins=32, incremental=True), C45(max_bins=32, instrument=True)])
+def test_fit_sharded_rejects_row_based_training(frame, estimator):
+    with pytest.raises(ValueError):
+        fit_sharded(estimator, [frame], 't')
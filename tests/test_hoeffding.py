@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+from decision_tree_lib.hoeffding import HoeffdingTree
+from conftest import assert_same_tree
+
+# Os nós cortados param de contar exemplos quando se dividem, então só a estrutura é comparada
+STRUCTURE = ('feature', 'threshold', 'left', 'right', 'cat_offset', 'cat_table')
+
+
+@pytest.fixture(scope='module')
+def stream() -> list:
+    rng = np.random.default_rng(0)
+    n = 30000
+    X = pd.DataFrame({'a': rng.normal(size=n), 'b': rng.choice(list('xyz'), n), 'c': rng.normal(size=n)})
+    y = pd.Series(np.where((X['a'] > 0) ^ (X['b'] == 'x') ^ (X['c'] > 0.5), 'p', 'n'), name='y')
+    return [(X.iloc[start:start + 5000], y.iloc[start:start + 5000]) for start in range(0, n, 5000)]
+
+
+@pytest.mark.parametrize('max_depth', [1, 2, 3])
+def test_truncate_matches_max_depth(stream, max_depth):
+    full = HoeffdingTree(grace_period=100).fit(stream)
+    limited = HoeffdingTree(grace_period=100, max_depth=max_depth).fit(stream)
+    truncated = full.compiled_.truncate(max_depth)
+    assert_same_tree(truncated, limited, STRUCTURE)
+    X = pd.concat([X for X, _ in stream])
+    np.testing.assert_array_equal(truncated.predict(X), limited.predict(X))
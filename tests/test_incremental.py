@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from decision_tree_lib.c45 import C45
+from decision_tree_lib.cart import CART
+from decision_tree_lib.id3 import ID3
+from conftest import assert_same_tree
+
+
+def make_data(n: int, seed: int, missing: bool = False) -> tuple:
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({'a': rng.normal(size=n), 'b': rng.integers(0, 20, n).astype(float),
+                      'c': rng.choice(list('xyzw'), n)})
+    if missing:
+        X.loc[rng.random(n) < 0.05, 'a'] = np.nan
+    y = pd.Series(np.where(X['a'].fillna(0) + (X['c'] == 'x') + rng.normal(0, 0.5, n) > 0.5, 'p', 'n'), name='y')
+    return X, y
+
+
+@pytest.mark.parametrize('cls, params', [
+    (C45, {}),
+    (C45, {'max_leaf_nodes': 12, 'confidence': 0.25}),
+    (CART, {}),
+    (CART, {'max_depth': 6, 'ccp_alpha': 0.001}),
+])
+def test_update_matches_refit(cls, params):
+    X_old, y_old = make_data(600, 1, missing=cls is C45)
+    X_new, y_new = make_data(80, 2, missing=cls is C45)
+    model = cls(incremental=True, **params).fit(X_old, y_old).update(X_new, y_new)
+    refit = cls(**params).fit(pd.concat([X_old, X_new], ignore_index=True), pd.concat([y_old, y_new], ignore_index=True))
+    assert_same_tree(model, refit)
+    assert model.update_stats_['n_new_samples'] == 80
+
+
+@pytest.mark.parametrize('cls, params', [(ID3, {'max_bins': 8}), (C45, {'max_bins': 32}), (CART, {'max_bins': 64})])
+def test_update_matches_refit_with_same_bins(cls, params):
+    # Com `max_bins`, os bins do primeiro treino são mantidos: a referência usa a mesma codificação
+    X_old, y_old = make_data(600, 1)
+    X_new, y_new = make_data(80, 2)
+    model = cls(incremental=True, **params).fit(X_old, y_old)
+    data = model._incremental['data'].append(X_new, y_new)
+    model.update(X_new, y_new)
+    assert_same_tree(model, cls(**params)._fit_data(data))
+
+
+def test_update_requires_incremental():
+    X, y = make_data(50, 1)
+    with pytest.raises(ValueError):
+        CART().fit(X, y).update(X, y)
+
+
+def test_loaded_model_is_not_incremental(tmp_path):
+    X, y = make_data(50, 1)
+    path = str(tmp_path / 'cart.dtl')
+    CART(incremental=True).fit(X, y).save(path)
+    model = CART.load(path)
+    assert model.incremental is False
+    with pytest.raises(ValueError, match='save'):
+        model.update(X, y)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from decision_tree_lib.c45 import C45
+from decision_tree_lib.cart import CART
+from decision_tree_lib.id3 import ID3
+from decision_tree_lib.model_selection import GridSearchCV, cross_val_score
+from conftest import assert_same_tree
+
+DEPTHS = [1, 2, 3, 5, None]
+
+
+@pytest.fixture(scope='module')
+def data() -> tuple:
+    rng = np.random.default_rng(0)
+    n = 600
+    X = pd.DataFrame({'a': rng.normal(size=n), 'b': rng.integers(0, 20, n).astype(float),
+                      'c': rng.choice(list('xyzw'), n)})
+    noise = rng.normal(0, 0.7, n)
+    y = pd.Series(np.where(X['a'] + (X['c'] == 'x') - X['b'] / 20 + noise > 0, 'p', 'n'), name='y')
+    return X, y
+
+
+@pytest.mark.parametrize('cls, params', [(ID3, {'max_bins': 8}), (C45, {}), (CART, {})])
+def test_truncate_matches_refit(data, cls, params):
+    X, y = data
+    full = cls(**params).fit(X, y).compiled_
+    for depth in DEPTHS[:-1]:
+        assert_same_tree(full.truncate(depth), cls(max_depth=depth, **params).fit(X, y))
+
+
+# Com `confidence`, a poda depende da árvore inteira: `_reuses_depth` deve recusar o corte
+@pytest.mark.parametrize('cls, params', [(ID3, {'max_bins': 8}), (C45, {}), (CART, {}), (C45, {'confidence': 0.25})])
+def test_grid_search_matches_separate_fits(data, cls, params):
+    X, y = data
+    search = GridSearchCV(cls(**params), {'max_depth': DEPTHS}, cv=3, refit=False).fit(X, y)
+    for index, depth in enumerate(DEPTHS):
+        scores = [search.cv_results_[f'split{fold}_test_score'][index] for fold in range(3)]
+        np.testing.assert_array_equal(scores, cross_val_score(cls(max_depth=depth, **params), X, y, cv=3))
@@ -0,0 +1,63 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from decision_tree_lib.cart import CART
+from decision_tree_lib.serving import PredictionClient, PredictionServer
+
+
+@pytest.fixture(scope='module')
+def model_path(tmp_path_factory) -> tuple:
+    rng = np.random.default_rng(0)
+    n = 400
+    X = pd.DataFrame({'Age': rng.normal(40, 12, n).round(), 'Sex': rng.choice(['male', 'female'], n)})
+    y = pd.Series(np.where((X['Sex'] == 'female') | (X['Age'] < 20), 'yes', 'no'), name='Survived')
+    model = CART(max_depth=4).fit(X, y)
+    path = str(tmp_path_factory.mktemp('models') / 'cart.dtl')
+    model.save(path)
+    return model, path, X.iloc[:50]
+
+
+async def _serve(path: str, scenario):
+    server = PredictionServer({'cart': path}, max_wait=0.01)
+    port = await server.start('127.0.0.1', 0)
+    try:
+        return await scenario(server, port)
+    finally:
+        await server.close()
+
+
+def test_concurrent_clients_match_predict(model_path):
+    model, path, X = model_path
+    rows = X.to_dict('records')
+
+    async def scenario(server, port):
+        clients = [PredictionClient('127.0.0.1', port) for _ in range(10)]
+        try:
+            predictions = await asyncio.gather(*[clients[i % len(clients)].predict('cart', [row])
+                                                 for i, row in enumerate(rows)])
+            _, metrics = await clients[0].request('GET', '/metrics')
+        finally:
+            for client in clients:
+                await client.close()
+        return [prediction for batch in predictions for prediction in batch], server.stats(), metrics
+
+    predictions, stats, metrics = asyncio.run(_serve(path, scenario))
+    assert predictions == model.predict(X).tolist()
+    # As requisições concorrentes são agrupadas em menos lotes
+    assert stats['models']['cart']['requests'] == len(rows)
+    assert stats['models']['cart']['batches'] < len(rows)
+    assert f'dtl_rows_total{{model="cart"}} {len(rows)}' in metrics
+
+
+def test_error_statuses(model_path):
+    _, path, _ = model_path
+
+    async def scenario(server, port):
+        async with PredictionClient('127.0.0.1', port) as client:
+            return [(await client.request('POST', '/predict/unknown', {'rows': [{'Age': 30}]}))[0],
+                    (await client.request('POST', '/predict/cart', {'rows': [{'Age': 'abc'}]}))[0],
+                    (await client.request('POST', '/predict/cart', {'linhas': []}))[0],
+                    (await client.request('GET', '/predict/cart'))[0]]
+
+    assert asyncio.run(_serve(path, scenario)) == [404, 400, 400, 405]